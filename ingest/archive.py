@@ -0,0 +1,134 @@
+"""
+Raw API response archive
+
+Every page an API returns is appended, untouched, to compressed NDJSON
+segment files on local disk:
+
+    data/archive/{source}/{run_date}/segment-00000.ndjson.gz
+    data/archive/{source}/{run_date}/index.ndjson
+
+Each page is written as its own gzip member (one JSON line), so a segment is
+a valid .ndjson.gz file that can be streamed end to end, and the index
+(city, role, page -> segment, byte offset, length) allows reading one page
+without decompressing the rest. Segments roll over at RAW_ARCHIVE_SEGMENT_MB.
+
+bronze.raw_jobs only keeps the latest payload per job; the archive keeps
+every response, so bronze can be rebuilt (--replay) without API calls.
+"""
+import gzip
+import json
+import os
+import threading
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+ARCHIVE_DIR = Path(os.getenv("RAW_ARCHIVE_DIR", "data/archive"))
+ARCHIVE_ENABLED = os.getenv("RAW_ARCHIVE_ENABLED", "true").lower() in ('1', 'true', 'yes', 'on')
+SEGMENT_BYTES = int(float(os.getenv("RAW_ARCHIVE_SEGMENT_MB", "64")) * 1024 * 1024)
+
+class ResponseArchive:
+    """Append-only, thread-safe writer for one archive directory"""
+
+    def __init__(self, root=ARCHIVE_DIR, segment_bytes=SEGMENT_BYTES):
+        self.root = Path(root)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._segments = {}
+
+    def _day_dir(self, source, run_date):
+        return self.root / source / str(run_date)
+
+    def _current_segment(self, day_dir):
+        """Latest segment in day_dir, or a new one if it is full"""
+        segment = self._segments.get(day_dir)
+        if segment is None:
+            existing = sorted(day_dir.glob("segment-*.ndjson.gz"))
+            segment = existing[-1] if existing else day_dir / "segment-00000.ndjson.gz"
+        if segment.exists() and segment.stat().st_size >= self.segment_bytes:
+            number = int(segment.name.split('-')[1].split('.')[0]) + 1
+            segment = day_dir / f"segment-{number:05d}.ndjson.gz"
+        self._segments[day_dir] = segment
+        return segment
+
+    def append(self, source, city, role, page, response, query=None, run_date=None):
+        """
+        Archive one API response page
+        `query` holds request options worth replaying (e.g. sort_by), never credentials
+        """
+        run_date = run_date or date.today()
+        record = {
+            'source': source,
+            'run_date': str(run_date),
+            'city': city,
+            'role': role,
+            'page': page,
+            'query': query or {},
+            'fetched_at': datetime.now(timezone.utc).isoformat(),
+            'response': response,
+        }
+        member = gzip.compress((json.dumps(record) + "\n").encode("utf-8"))
+        day_dir = self._day_dir(source, run_date)
+
+        with self._lock:
+            day_dir.mkdir(parents=True, exist_ok=True)
+            segment = self._current_segment(day_dir)
+            with open(segment, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+            with open(day_dir / "index.ndjson", "a") as f:
+                f.write(json.dumps({
+                    'city': city,
+                    'role': role,
+                    'page': page,
+                    'segment': segment.name,
+                    'offset': offset,
+                    'length': len(member),
+                }) + "\n")
+
+    def run_dates(self, source):
+        """Archived run dates for a source, oldest first"""
+        source_dir = self.root / source
+        if not source_dir.exists():
+            return []
+        return sorted(date.fromisoformat(d.name) for d in source_dir.iterdir() if d.is_dir())
+
+    def iter_pages(self, source, run_date):
+        """Stream every archived page record for one run date, in the order it was fetched"""
+        day_dir = self._day_dir(source, run_date)
+        for segment in sorted(day_dir.glob("segment-*.ndjson.gz")):
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def read_page(self, source, run_date, city, role, page):
+        """Read one archived page using the index, or None if it was never archived"""
+        day_dir = self._day_dir(source, run_date)
+        index_path = day_dir / "index.ndjson"
+        if not index_path.exists():
+            return None
+
+        entry = None
+        with open(index_path) as f:
+            for line in f:
+                candidate = json.loads(line)
+                if (candidate['city'], candidate['role'], candidate['page']) == (city, role, page):
+                    entry = candidate  # keep the latest if a page was fetched twice
+
+        if entry is None:
+            return None
+        with open(day_dir / entry['segment'], "rb") as f:
+            f.seek(entry['offset'])
+            return json.loads(gzip.decompress(f.read(entry['length'])))
+
+# Shared by every fetcher in the process
+RAW_ARCHIVE = ResponseArchive()
+
+def archive_page(source, city, role, page, response, query=None):
+    """Archive one fetched page (no-op when RAW_ARCHIVE_ENABLED is off); never fails the fetch"""
+    if not ARCHIVE_ENABLED:
+        return
+    try:
+        RAW_ARCHIVE.append(source, city, role, page, response, query)
+    except OSError as e:
+        print(f"Warning: could not archive {source} page {page} for {role} in {city}: {e}")
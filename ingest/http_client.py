@@ -0,0 +1,184 @@
+"""
+Shared HTTP client for API ingest
+
+One keep-alive requests.Session per process (connection pooling, so pages
+reuse TLS connections instead of opening a new one each time), with:
+
+- retries on connection errors, timeouts, 429 and 5xx, using jittered
+  exponential backoff
+- 429 Retry-After respected for the whole host, so every thread backs off,
+  not just the one that got throttled
+- a cap on in-flight requests per host
+- per-host stats (latency, retries, bytes) to see where ingest time goes
+
+Other 4xx responses are not retried and raise requests.HTTPError right away.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class _HostState:
+    """Concurrency cap, shared cooldown and counters for one host"""
+
+    def __init__(self, max_in_flight):
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.lock = threading.Lock()
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.bytes = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'failures': self.failures,
+                'bytes': self.bytes,
+                'avg_latency_ms': self.total_latency / self.attempts * 1000 if self.attempts else 0.0,
+                'max_latency_ms': self.max_latency * 1000,
+            }
+
+class HttpClient:
+    """
+    Thread-safe JSON GET client
+
+    Args:
+        max_retries: retries after the first attempt for retryable failures
+        backoff_base / backoff_max: backoff is uniform(0, min(max, base * 2**retry)) seconds
+        max_per_host: in-flight requests allowed per host
+        timeout: per-request timeout in seconds
+    """
+
+    def __init__(self, max_retries=HTTP_MAX_RETRIES, backoff_base=HTTP_BACKOFF_BASE, backoff_max=HTTP_BACKOFF_MAX,
+                 max_per_host=HTTP_MAX_PER_HOST, timeout=HTTP_TIMEOUT):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host(self, url):
+        host = urlparse(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostState(self.max_per_host)
+            return self._hosts[host]
+
+    def _backoff(self, retry):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    def get_json(self, url, params=None, headers=None, timeout=None, rate_limiter=None):
+        """
+        GET `url` and return the decoded JSON body
+        rate_limiter (a TokenBucket) is charged for every attempt, retries included
+        Raises requests.RequestException once retries are exhausted
+        """
+        host = self._host(url)
+        with host.lock:
+            host.requests += 1
+
+        retry = 0
+        while True:
+            # wait out a Retry-After another thread got for this host
+            wait = host.blocked_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            if rate_limiter:
+                rate_limiter.acquire()
+
+            error = None
+            retry_after = None
+            with host.slots:
+                started = time.monotonic()
+                try:
+                    response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    response, error = None, e
+                latency = time.monotonic() - started
+
+            with host.lock:
+                host.attempts += 1
+                host.total_latency += latency
+                host.max_latency = max(host.max_latency, latency)
+                if response is not None:
+                    host.bytes += len(response.content)
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.HTTPError(f"{response.status_code} Error for url: {response.url}", response=response)
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    with host.lock:
+                        host.throttled += 1
+
+            if retry >= self.max_retries:
+                with host.lock:
+                    host.failures += 1
+                raise error
+
+            delay = retry_after if retry_after is not None else self._backoff(retry)
+            if retry_after is not None:
+                with host.lock:
+                    host.blocked_until = max(host.blocked_until, time.monotonic() + retry_after)
+            with host.lock:
+                host.retries += 1
+            retry += 1
+            time.sleep(delay)
+
+    def get_stats(self):
+        """Per-host stats: {host: {'requests', 'attempts', 'retries', 'throttled', 'failures', 'bytes', 'avg_latency_ms', 'max_latency_ms'}}"""
+        with self._hosts_lock:
+            hosts = dict(self._hosts)
+        return {host: state.stats() for host, state in hosts.items()}
+
+# Shared by every fetcher in the process
+HTTP_CLIENT = HttpClient()
+
+def get_http_stats():
+    return HTTP_CLIENT.get_stats()
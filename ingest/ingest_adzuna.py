@@ -1,11 +1,10 @@
-import time
 from datetime import datetime, timezone, date
 import pandas as pd
-import requests
-from database.db import get_engine
+from database.db import get_engine, get_table
+from ingest.http_client import HTTP_CLIENT
+from ingest.ingest_adzuna_v2 import ADZUNA_BASE_URL, ADZUNA_RATE_LIMITER
 import os
 import json
-from sqlalchemy import MetaData, Table
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 ADZUNA_APP_ID = os.getenv("ADZUNA_APP_ID")
@@ -13,7 +12,7 @@ ADZUNA_APP_KEY = os.getenv("ADZUNA_APP_KEY")
 
 def fetch_page(city, role, page=1, per_page=50):
     """Fetch a single page of jobs from the Adzuna API"""
-    url = f"https://api.adzuna.com/v1/api/jobs/us/search/{page}"
+    url = f"{ADZUNA_BASE_URL}/{page}"
     params = {
         "app_id": ADZUNA_APP_ID,
         "app_key": ADZUNA_APP_KEY,
@@ -22,9 +21,8 @@ def fetch_page(city, role, page=1, per_page=50):
         "results_per_page": per_page,
         "content-type": "application/json"
     }
-    r = requests.get(url, params=params, timeout=10)
-    r.raise_for_status()
-    return r.json().get("results", [])
+    # Same session, retries and request budget as the v2 ingest
+    return HTTP_CLIENT.get_json(url, params=params, rate_limiter=ADZUNA_RATE_LIMITER).get("results", [])
 
 def iter_jobs(city, role, max_pages=20):
     """Iterate through all pages of jobs for a given (city, role) pair"""
@@ -33,7 +31,6 @@ def iter_jobs(city, role, max_pages=20):
         if not rows:
             break
         yield from rows
-        time.sleep(0.5)
         
 def normalize_job(job):
     """Normalize job data for insertion"""
@@ -50,8 +47,7 @@ def insert_rows(rows):
     """
     if not rows:
         return
-    meta = MetaData()
-    table = Table('adzuna_jobs', meta, autoload_with=get_engine(), schema='bronze')
+    table = get_table('adzuna_jobs', schema='bronze')
     stmt = pg_insert(table).values(rows).on_conflict_do_nothing(index_elements=['job_id', 'fetched_at'])
     with get_engine().begin() as conn:
         conn.execute(stmt)
@@ -5,10 +5,15 @@ Implements the new bronze schema design with job_calls and raw_jobs tables
 Stores a record of the API call once per city/role/day
 Only records API calls if there are new jobs found
 """
-import time
+import math
 from datetime import date
-import requests
-from database.db import get_engine
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database.db import get_engine, copy_rows
+from ingest.rate_limit import TokenBucket
+from ingest.http_client import HTTP_CLIENT
+from ingest.watermarks import get_watermark, days_since, record_pair_jobs, carry_forward_pair_jobs
+from ingest.pipeline import BronzeWriter
+from ingest.archive import archive_page
 import os
 import json
 from sqlalchemy import text
@@ -16,9 +21,28 @@ from sqlalchemy import text
 ADZUNA_APP_ID = os.getenv("ADZUNA_APP_ID")
 ADZUNA_APP_KEY = os.getenv("ADZUNA_APP_KEY")
 
-def fetch_page(city, role, page=1, per_page=50):
-    """Fetch a single page of jobs from the Adzuna API"""
-    url = f"https://api.adzuna.com/v1/api/jobs/us/search/{page}"
+# Point at a local stand-in (scripts/mock_job_api.py) for load tests
+ADZUNA_BASE_URL = os.getenv("ADZUNA_BASE_URL", "https://api.adzuna.com/v1/api/jobs/us/search").rstrip("/")
+
+# Shared by every thread making Adzuna calls (default 2 req/s = the old 0.5s sleep)
+ADZUNA_RATE_LIMITER = TokenBucket(
+    rate=float(os.getenv("ADZUNA_REQUESTS_PER_SECOND", "2")),
+    capacity=float(os.getenv("ADZUNA_BURST", "0")) or None
+)
+
+# Pages of one (city, role) pair fetched at the same time
+ADZUNA_PAGE_WORKERS = int(os.getenv("ADZUNA_PAGE_WORKERS", "4"))
+
+# Incremental runs still do a full pass this often, so expired jobs drop out of is_active
+ADZUNA_FULL_REFRESH_DAYS = int(os.getenv("ADZUNA_FULL_REFRESH_DAYS", "7"))
+
+def fetch_page(city, role, page=1, per_page=50, sort_by=None, max_days_old=None):
+    """
+    Fetch a single page of jobs from the Adzuna API
+    sort_by='date' and max_days_old are used by incremental runs
+    Transient failures (timeouts, 429, 5xx) are retried by the shared HTTP client
+    """
+    url = f"{ADZUNA_BASE_URL}/{page}"
     params = {
         "app_id": ADZUNA_APP_ID,
         "app_key": ADZUNA_APP_KEY,
@@ -27,41 +51,22 @@ def fetch_page(city, role, page=1, per_page=50):
         "results_per_page": per_page,
         "content-type": "application/json"
     }
-    r = requests.get(url, params=params, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    query = {}
+    if sort_by:
+        query["sort_by"] = sort_by
+    if max_days_old:
+        query["max_days_old"] = max_days_old
+    params.update(query)
+    data = HTTP_CLIENT.get_json(url, params=params, rate_limiter=ADZUNA_RATE_LIMITER)
+    archive_page('adzuna', city, role, page, data, query)
+    return data
 
-def get_existing_job_ids_for_today(source, run_date):
-    """Get all job IDs we've already seen today"""
-    engine = get_engine()
-    
-    with engine.connect() as conn:
-        result = conn.execute(text("""
-            SELECT job_id 
-            FROM bronze.raw_jobs 
-            WHERE source = :source 
-            AND last_seen = :run_date
-        """), {
-            'source': source,
-            'run_date': run_date
-        })
-        
-        return {row.job_id for row in result}
-
-def filter_new_jobs(jobs, source, run_date):
-    """Filter out jobs we've already processed today"""
-    existing_today = get_existing_job_ids_for_today(source, run_date)
-    
-    new_jobs = []
-    for job in jobs:
-        job_id = str(job['id'])
-        if job_id not in existing_today:
-            new_jobs.append(job)
-    
-    return new_jobs
-
-def record_api_call_if_new_jobs(city, role, pages_fetched, api_response, run_date, jobs_retrieved, new_jobs_count):
-    """Only record API call if there were new jobs found"""
+def record_api_call_if_new_jobs(city, role, pages_fetched, api_response, run_date, jobs_retrieved, new_jobs_count,
+                                newest_created=None, fetch_mode='full'):
+    """
+    Only record API call if there were new jobs found
+    newest_created and fetch_mode feed the pair's watermark (see ingest/watermarks.py)
+    """
     
     if new_jobs_count == 0:
         print(f"  No new jobs found for {role} in {city} - skipping job_calls update")
@@ -74,13 +79,15 @@ def record_api_call_if_new_jobs(city, role, pages_fetched, api_response, run_dat
     with engine.begin() as conn:
         # Upsert: one row per city/role/day
         conn.execute(text("""
-            INSERT INTO bronze.job_calls (run_date, city, role, pages_fetched, api_count, api_mean_salary, jobs_retrieved)
-            VALUES (:run_date, :city, :role, :pages_fetched, :api_count, :api_mean_salary, :jobs_retrieved)
+            INSERT INTO bronze.job_calls (run_date, city, role, pages_fetched, api_count, api_mean_salary, jobs_retrieved, newest_created, fetch_mode)
+            VALUES (:run_date, :city, :role, :pages_fetched, :api_count, :api_mean_salary, :jobs_retrieved, :newest_created, :fetch_mode)
             ON CONFLICT (run_date, city, role) DO UPDATE SET
                 pages_fetched = EXCLUDED.pages_fetched,
                 api_count = EXCLUDED.api_count,
                 api_mean_salary = EXCLUDED.api_mean_salary,
                 jobs_retrieved = bronze.job_calls.jobs_retrieved + EXCLUDED.jobs_retrieved,
+                newest_created = GREATEST(bronze.job_calls.newest_created, EXCLUDED.newest_created),
+                fetch_mode = CASE WHEN bronze.job_calls.fetch_mode = 'full' THEN 'full' ELSE EXCLUDED.fetch_mode END,
                 pulled_at = CURRENT_TIMESTAMP
         """), {
             'run_date': run_date,
@@ -89,179 +96,276 @@ def record_api_call_if_new_jobs(city, role, pages_fetched, api_response, run_dat
             'pages_fetched': pages_fetched,
             'api_count': api_count,
             'api_mean_salary': api_mean_salary,
-            'jobs_retrieved': new_jobs_count  # Only count NEW jobs
+            'jobs_retrieved': new_jobs_count,  # Only count NEW jobs
+            'newest_created': newest_created,
+            'fetch_mode': fetch_mode
         })
 
-def upsert_raw_jobs_v2_optimized(jobs, run_date):
-    """Insert or update jobs, but only process new jobs for today"""
-    if not jobs:
-        return 0
-        
-    engine = get_engine()
-    new_jobs_processed = 0
+def upsert_raw_jobs_bulk(jobs, run_date, source='adzuna', return_ids=False):
+    """
+    Set-based upsert of a whole batch of jobs into bronze.raw_jobs
+    
+    COPYs the batch into a temp table and applies one INSERT ... ON CONFLICT,
+    instead of a SELECT plus UPDATE/INSERT per job:
+    - completely new jobs are inserted with times_seen = 1
+    - jobs last seen on an earlier day get last_seen, times_seen + 1 and the new payload
+    - jobs already seen on run_date are left alone
+    payload_hash (md5 of the jsonb text) lets enrichment skip payloads that didn't change
     
-    # Pre-filter: only process jobs we haven't seen today
-    new_jobs = filter_new_jobs(jobs, 'adzuna', run_date)
+    Returns the number of jobs that were new or new for today (what
+    record_api_call_if_new_jobs expects as new_jobs_count), or their ids if return_ids
+    """
+    if not jobs:
+        return [] if return_ids else 0
     
-    if not new_jobs:
-        return 0  # No new jobs to process
+    # ordinal keeps the first copy of a job that shows up twice in one batch
+    rows = [(i, str(job['id']), json.dumps(job)) for i, job in enumerate(jobs)]
     
+    engine = get_engine()
     with engine.begin() as conn:
-        for job in new_jobs:
-            job_id = str(job['id'])
-            
-            # Check if job exists at all (any day)
-            result = conn.execute(text("""
-                SELECT first_seen, last_seen, times_seen 
-                FROM bronze.raw_jobs 
-                WHERE source = 'adzuna' AND job_id = :job_id
-            """), {'job_id': job_id})
-            
-            existing_job = result.fetchone()
-            
-            if existing_job:
-                # Job exists from previous day - update last_seen and increment times_seen
-                last_seen_date = existing_job.last_seen
-                
-                if last_seen_date < run_date:
-                    # New day for this job
-                    conn.execute(text("""
-                        UPDATE bronze.raw_jobs 
-                        SET last_seen = :last_seen,
-                            times_seen = times_seen + 1,
-                            payload = :payload,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE source = 'adzuna' AND job_id = :job_id
-                    """), {
-                        'job_id': job_id,
-                        'last_seen': run_date,
-                        'payload': json.dumps(job)
-                    })
-                    new_jobs_processed += 1
-                # If last_seen == run_date, we already processed this job today (shouldn't happen due to pre-filter)
-                
-            else:
-                # Completely new job - insert
-                conn.execute(text("""
-                    INSERT INTO bronze.raw_jobs (job_id, source, first_seen, last_seen, times_seen, payload)
-                    VALUES (:job_id, 'adzuna', :first_seen, :last_seen, 1, :payload)
-                """), {
-                    'job_id': job_id,
-                    'first_seen': run_date,
-                    'last_seen': run_date,
-                    'payload': json.dumps(job)
-                })
-                new_jobs_processed += 1
-    
-    return new_jobs_processed
+        conn.execute(text("DROP TABLE IF EXISTS raw_jobs_stage"))
+        conn.execute(text("CREATE TEMP TABLE raw_jobs_stage (ord int, job_id text, payload jsonb)"))
+        copy_rows(conn, 'raw_jobs_stage', ['ord', 'job_id', 'payload'], rows)
+        
+        result = conn.execute(text("""
+            INSERT INTO bronze.raw_jobs (job_id, source, first_seen, last_seen, times_seen, payload, payload_hash)
+            SELECT DISTINCT ON (job_id) job_id, :source, :run_date, :run_date, 1, payload, md5(payload::text)
+            FROM raw_jobs_stage
+            ORDER BY job_id, ord
+            ON CONFLICT (source, job_id) DO UPDATE SET
+                last_seen = EXCLUDED.last_seen,
+                times_seen = bronze.raw_jobs.times_seen + 1,
+                payload = EXCLUDED.payload,
+                payload_hash = EXCLUDED.payload_hash,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE bronze.raw_jobs.last_seen < EXCLUDED.last_seen
+            RETURNING job_id
+        """), {
+            'source': source,
+            'run_date': run_date
+        })
+        new_job_ids = [row.job_id for row in result]
+        
+        conn.execute(text("DROP TABLE raw_jobs_stage"))
+    
+    return new_job_ids if return_ids else len(new_job_ids)
 
-def upsert_raw_jobs_v2(jobs, run_date):
-    """Insert or update jobs, only increment times_seen for new days"""
-    engine = get_engine()
+def touch_raw_jobs(job_ids, run_date, source='adzuna'):
+    """
+    Cheap path for jobs we already hold: bump last_seen/times_seen without rewriting the payload
+    Returns the number of jobs that were new for today
+    """
+    if not job_ids:
+        return 0
     
+    engine = get_engine()
     with engine.begin() as conn:
-        for job in jobs:
-            job_id = str(job['id'])
-            
-            result = conn.execute(text("""
-                SELECT first_seen, last_seen, times_seen 
-                FROM bronze.raw_jobs 
-                WHERE source = 'adzuna' AND job_id = :job_id
-            """), {'job_id': job_id})
-            
-            existing_job = result.fetchone()
-            
-            if existing_job:
-                last_seen_date = existing_job.last_seen
-                
-                # Only increment times_seen if this is a new day
-                if last_seen_date < run_date:
-                    conn.execute(text("""
-                        UPDATE bronze.raw_jobs 
-                        SET last_seen = :last_seen,
-                            times_seen = times_seen + 1,
-                            payload = :payload,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE source = 'adzuna' AND job_id = :job_id
-                    """), {
-                        'job_id': job_id,
-                        'last_seen': run_date,
-                        'payload': json.dumps(job)
-                    })
-                else:
-                    # Same day - just update payload, don't increment times_seen
-                    conn.execute(text("""
-                        UPDATE bronze.raw_jobs 
-                        SET payload = :payload,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE source = 'adzuna' AND job_id = :job_id
-                    """), {
-                        'job_id': job_id,
-                        'payload': json.dumps(job)
-                    })
-            else:
-                # New job - insert normally
-                conn.execute(text("""
-                    INSERT INTO bronze.raw_jobs (job_id, source, first_seen, last_seen, times_seen, payload)
-                    VALUES (:job_id, 'adzuna', :first_seen, :last_seen, 1, :payload)
-                """), {
-                    'job_id': job_id,
-                    'first_seen': run_date,
-                    'last_seen': run_date,
-                    'payload': json.dumps(job)
-                })
+        result = conn.execute(text("""
+            UPDATE bronze.raw_jobs
+            SET last_seen = :run_date,
+                times_seen = times_seen + 1
+            WHERE source = :source
+                AND job_id = ANY(:job_ids)
+                AND last_seen < :run_date
+        """), {
+            'source': source,
+            'job_ids': list(job_ids),
+            'run_date': run_date
+        })
+    
+    return result.rowcount
 
-def ingest_adzuna_v2(city, role, max_pages=20):
+def plan_pages(api_count, per_page=50, max_pages=20):
+    """
+    Number of pages needed to cover `api_count` results, capped at the per-pair budget
+    Lets us skip the trailing empty-page call we used to make to detect the end
+    """
+    if not api_count:
+        return 0
+    return min(max_pages, math.ceil(api_count / per_page))
+
+def fetch_remaining_pages(city, role, pages, handle_page, page_workers=ADZUNA_PAGE_WORKERS):
+    """
+    Fetch pages in parallel (the shared rate limiter still caps the request rate)
+    Each page is handed to handle_page(page, jobs) from the worker thread as soon as it
+    arrives, so pages are never collected in memory. Failed pages are logged and skipped.
+    Returns the number of pages that returned jobs.
+    """
+    if not pages:
+        return 0
+    
+    def fetch_and_handle(page):
+        jobs = fetch_page(city, role, page).get('results', [])
+        if jobs:
+            handle_page(page, jobs)
+        return len(jobs)
+    
+    pages_fetched = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(page_workers, len(pages))), thread_name_prefix="page") as pool:
+        futures = {pool.submit(fetch_and_handle, page): page for page in pages}
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                if future.result():
+                    pages_fetched += 1
+            except Exception as e:
+                print(f"Error on page {page}: {e}")
+    
+    return pages_fetched
+
+def start_writer(**kwargs):
+    """Start a streaming bronze writer (see ingest/pipeline.py) backed by the bulk upsert"""
+    return BronzeWriter(upsert_raw_jobs_bulk, **kwargs).start()
+
+def ingest_adzuna_v2(city, role, max_pages=20, per_page=50, page_workers=ADZUNA_PAGE_WORKERS, writer=None):
     """
     Ingest Adzuna jobs with optimized duplicate handling
+    
+    Page 1 tells us the total `count`, so we plan exactly how many pages are
+    needed (capped at max_pages) and fetch the rest in parallel. Pages stream
+    into bronze through `writer` as they arrive; pass a shared writer to batch
+    writes across pairs, otherwise one is started for this pair.
     """
     run_date = date.today()
-    all_jobs = []
-    pages_fetched = 0
-    api_metadata = None
+    pair = (city, role)
     
     print(f"Fetching {role} jobs in {city}...")
     
-    for page in range(1, max_pages + 1):
-        try:
-            # Fetch page from API
-            api_response = fetch_page(city, role, page)
+    try:
+        api_metadata = fetch_page(city, role, 1, per_page)
+    except Exception as e:
+        print(f"Error on page 1: {e}")
+        return 0
+    
+    first_page = api_metadata.get('results', [])
+    if not first_page:
+        print(f"No results for {role} in {city}")
+        return 0
+    
+    own_writer = writer is None
+    if own_writer:
+        writer = start_writer()
+    
+    try:
+        writer.put_page(pair, first_page, run_date)
+        print(f"  Page 1: Got {len(first_page)} jobs")
+        
+        total_pages = plan_pages(api_metadata.get('count', 0), per_page, max_pages)
+        print(f"  API count: {api_metadata.get('count', 0)} -> fetching {total_pages} page(s)")
+        
+        def handle_page(page, jobs):
+            writer.put_page(pair, jobs, run_date)
+            print(f"  Page {page}: Got {len(jobs)} jobs")
+        
+        pages_fetched = 1 + fetch_remaining_pages(city, role, range(2, total_pages + 1), handle_page, page_workers)
+        
+        # Wait for this pair's pages to land in bronze
+        stats = writer.finish_pair(pair)
+    finally:
+        if own_writer:
+            writer.close()
+    
+    new_jobs_count = stats['new_jobs']
+    jobs_retrieved = stats['jobs_retrieved']
+    
+    # Only record API call if we found new jobs
+    if new_jobs_count > 0:
+        record_api_call_if_new_jobs(city, role, pages_fetched, api_metadata, run_date, jobs_retrieved, new_jobs_count,
+                                    newest_created=stats['newest_created'], fetch_mode='full')
+        print(f"Total: Found {jobs_retrieved} jobs, {new_jobs_count} were new for {role} in {city}")
+    else:
+        print(f"Total: Found {jobs_retrieved} jobs, but all were already processed today for {role} in {city}")
+    
+    return new_jobs_count  # Return count of NEW jobs, not total jobs
+
+def ingest_adzuna_incremental(city, role, max_pages=20, per_page=50, writer=None):
+    """
+    Ingest only what changed since the pair's last run
+    
+    Asks Adzuna for date-sorted results no older than the pair's watermark and
+    stops paging at the first page made entirely of jobs we already hold.
+    Unseen jobs stream into bronze through `writer`; jobs we see again are
+    touched without rewriting their payload, and jobs the pair returned last
+    run but that fall outside today's window are carried forward the same way.
+    Falls back to a full ingest for pairs with no history or whose last full
+    pass is older than ADZUNA_FULL_REFRESH_DAYS.
+    """
+    run_date = date.today()
+    pair = (city, role)
+    watermark = get_watermark(city, role, run_date=run_date)
+    
+    if (watermark is None or watermark['last_full_run'] is None
+            or (run_date - watermark['last_full_run']).days >= ADZUNA_FULL_REFRESH_DAYS):
+        return ingest_adzuna_v2(city, role, max_pages, per_page, writer=writer)
+    
+    if watermark['last_run'] >= run_date:
+        print(f"{role} in {city} already ingested today - skipping")
+        return 0
+    
+    max_days_old = days_since(watermark, run_date)
+    known_ids = watermark['known_ids']
+    seen_jobs = []
+    api_metadata = None
+    pages_fetched = 0
+    total_pages = 1
+    
+    own_writer = writer is None
+    if own_writer:
+        writer = start_writer()
+    
+    print(f"Fetching {role} jobs in {city} posted in the last {max_days_old} day(s)...")
+    
+    try:
+        page = 1
+        while page <= total_pages:
+            try:
+                api_response = fetch_page(city, role, page, per_page, sort_by='date', max_days_old=max_days_old)
+            except Exception as e:
+                print(f"Error on page {page}: {e}")
+                break
             
-            # Capture metadata from first successful response
             if api_metadata is None:
                 api_metadata = api_response
+                total_pages = plan_pages(api_response.get('count', 0), per_page, max_pages)
             
             jobs = api_response.get('results', [])
-            
             if not jobs:
-                print(f"No more results after page {page - 1}")
                 break
-                
-            all_jobs.extend(jobs)
-            print(f"  Page {page}: Got {len(jobs)} jobs")
-            time.sleep(0.5)  # Rate limiting
             pages_fetched += 1
             
-        except Exception as e:
-            print(f"Error on page {page}: {e}")
-            break
+            unseen = [job for job in jobs if str(job['id']) not in known_ids]
+            seen_jobs.extend({'id': str(job['id'])} for job in jobs if str(job['id']) in known_ids)
+            writer.put_page(pair, unseen, run_date)
+            print(f"  Page {page}: Got {len(jobs)} jobs, {len(unseen)} unseen")
+            
+            # Date-sorted: a page of nothing but known jobs means everything older is known too
+            if not unseen:
+                break
+            page += 1
+        
+        stats = writer.finish_pair(pair)
+    finally:
+        if own_writer:
+            writer.close()
     
-    # Process only new jobs
-    new_jobs_count = upsert_raw_jobs_v2_optimized(all_jobs, run_date)
+    new_jobs_count = stats['new_jobs'] + touch_raw_jobs([job['id'] for job in seen_jobs], run_date)
+    record_pair_jobs(city, role, seen_jobs, run_date)
+    carried = carry_forward_pair_jobs(city, role, watermark['last_run'], run_date)
     
-    # Only record API call if we found new jobs
     if api_metadata and new_jobs_count > 0:
-        record_api_call_if_new_jobs(city, role, pages_fetched, api_metadata, run_date, len(all_jobs), new_jobs_count)
-        print(f"Total: Found {len(all_jobs)} jobs, {new_jobs_count} were new for {role} in {city}")
-    elif new_jobs_count == 0:
-        print(f"Total: Found {len(all_jobs)} jobs, but all were already processed today for {role} in {city}")
+        record_api_call_if_new_jobs(city, role, pages_fetched, api_metadata, run_date,
+                                    stats['jobs_retrieved'] + len(seen_jobs), new_jobs_count,
+                                    newest_created=stats['newest_created'], fetch_mode='incremental')
     
-    return new_jobs_count  # Return count of NEW jobs, not total jobs
+    print(f"Total: {stats['jobs_retrieved']} unseen, {len(seen_jobs)} re-seen, {carried} carried forward "
+          f"in {pages_fetched} page(s) for {role} in {city}")
+    
+    return new_jobs_count
 
 # Backward compatibility - keep old function name during migration
-def ingest_adzuna(city, role, max_pages=20):
+def ingest_adzuna(city, role, max_pages=20, **kwargs):
     """Wrapper for backward compatibility"""
-    return ingest_adzuna_v2(city, role, max_pages)
+    return ingest_adzuna_v2(city, role, max_pages, **kwargs)
 
 if __name__ == "__main__":
     # Test the function
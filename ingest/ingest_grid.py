@@ -0,0 +1,84 @@
+"""
+Concurrent ingest over the (city, role) grid
+
+Fans every (city, role) pair out to a bounded thread pool. All threads share
+the provider's token bucket, so adding workers raises throughput up to the
+API budget without ever going over it. Fetched pages stream into one shared
+bronze writer, so memory stays flat however large the grid is.
+"""
+import itertools
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from database.db import get_pool_stats
+from ingest.http_client import get_http_stats
+from ingest.ingest_adzuna_v2 import ingest_adzuna_v2, start_writer, ADZUNA_RATE_LIMITER
+
+
+def ingest_grid(cities, roles, concurrency=1, ingest_fn=ingest_adzuna_v2, rate_limiter=ADZUNA_RATE_LIMITER, stream=True,
+                pairs=None):
+    """
+    Ingest all (city, role) pairs with up to `concurrency` pairs in flight
+    With stream=True every pair writes through one shared bronze writer (ingest_fn must accept writer=)
+    Pass `pairs` to ingest only those (city, role) pairs instead of the full grid
+
+    Returns a dict of run stats: pairs, failed pairs, new jobs, requests, elapsed seconds, requests/sec,
+    DB pool stats and per-host HTTP stats
+    """
+    pairs = list(pairs) if pairs is not None else list(itertools.product(cities, roles))
+    concurrency = max(1, min(concurrency, len(pairs) or 1))
+
+    print(f"Ingesting {len(pairs)} (city, role) pairs with concurrency={concurrency}, "
+          f"rate limit={rate_limiter.rate:g} req/s")
+
+    requests_before = rate_limiter.requests_made
+    started = time.monotonic()
+    new_jobs = 0
+    failed = []
+
+    writer = start_writer() if stream else None
+    if writer:
+        ingest_fn = partial(ingest_fn, writer=writer)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest") as pool:
+            futures = {pool.submit(ingest_fn, city, role): (city, role) for city, role in pairs}
+            for future in as_completed(futures):
+                city, role = futures[future]
+                try:
+                    new_jobs += future.result() or 0
+                except Exception as e:
+                    print(f"Error ingesting {role} in {city}: {e}")
+                    failed.append((city, role))
+    finally:
+        if writer:
+            writer.close()
+
+    elapsed = time.monotonic() - started
+    requests_made = rate_limiter.requests_made - requests_before
+    requests_per_sec = requests_made / elapsed if elapsed > 0 else 0.0
+
+    print(f"✅ Ingest complete: {len(pairs) - len(failed)}/{len(pairs)} pairs, {new_jobs} new jobs, "
+          f"{requests_made} requests in {elapsed:.1f}s ({requests_per_sec:.2f} req/s)")
+    
+    pool_stats = get_pool_stats()
+    print(f"   DB pool: {pool_stats['checkouts']} checkouts, avg wait {pool_stats['avg_wait_ms']:.1f}ms, "
+          f"max wait {pool_stats['max_wait_ms']:.1f}ms (size={pool_stats['pool_size']}, overflow={pool_stats['overflow']})")
+
+    http_stats = get_http_stats()
+    for host, stats in http_stats.items():
+        print(f"   HTTP {host}: {stats['attempts']} attempts, {stats['retries']} retries ({stats['throttled']} throttled), "
+              f"{stats['failures']} failed, avg {stats['avg_latency_ms']:.0f}ms, max {stats['max_latency_ms']:.0f}ms, "
+              f"{stats['bytes'] / 1e6:.1f} MB")
+
+    return {
+        'pairs': len(pairs),
+        'failed_pairs': failed,
+        'new_jobs': new_jobs,
+        'requests': requests_made,
+        'elapsed_seconds': elapsed,
+        'requests_per_sec': requests_per_sec,
+        'pool_stats': pool_stats,
+        'http_stats': http_stats,
+    }
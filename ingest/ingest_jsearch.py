@@ -5,12 +5,22 @@ import requests
 import os
 from datetime import datetime, timezone, date
 import pandas as pd
-from database.db import get_engine
+from database.db import get_engine, get_table
+from ingest.archive import archive_page
+from ingest.http_client import HTTP_CLIENT
+from ingest.rate_limit import TokenBucket
 import json
-import time
-from sqlalchemy import MetaData, Table
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+# Point at a local stand-in (scripts/mock_job_api.py) for load tests
+JSEARCH_BASE_URL = os.getenv("JSEARCH_BASE_URL", "https://jsearch.p.rapidapi.com").rstrip("/")
+
+# Shared by every thread making JSearch calls (default 2 req/s = the old 0.5s sleep)
+JSEARCH_RATE_LIMITER = TokenBucket(
+    rate=float(os.getenv("JSEARCH_REQUESTS_PER_SECOND", "2")),
+    capacity=float(os.getenv("JSEARCH_BURST", "0")) or None
+)
+
 # url = "https://jsearch.p.rapidapi.com/search"
 
 # querystring = {"query":"developer jobs in chicago","page":"1","num_pages":"1","country":"us","date_posted":"all"}
@@ -62,7 +72,7 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 
 def fetch_jsearch_page(city, role, page=1):
-    url = "https://jsearch.p.rapidapi.com/search"
+    url = f"{JSEARCH_BASE_URL}/search"
     headers ={
         'x-rapidapi-key': os.getenv('JSEARCH_API_KEY'),
         'x-rapidapi-host': 'jsearch.p.rapidapi.com'
@@ -77,9 +87,8 @@ def fetch_jsearch_page(city, role, page=1):
     
     # make http request
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = HTTP_CLIENT.get_json(url, params=params, headers=headers, rate_limiter=JSEARCH_RATE_LIMITER)
+        archive_page('jsearch', city, role, page, data)
         return data.get('data', [])
     except requests.exceptions.RequestException as e:
         print(f'Error fetching JSearch data: {e}')
@@ -92,7 +101,6 @@ def iter_jsearch_jobs(city, role, max_pages=1):
         if not jobs:
             break
         yield from jobs
-        time.sleep(0.5)
         
 def normalize_jsearch_job(job):
     """Normalize job data for insertion"""
@@ -107,8 +115,7 @@ def insert_jsearch_rows(rows):
     """Insert rows into the jsearch_jobs table"""
     if not rows:
         return
-    meta = MetaData()
-    table = Table('jsearch_jobs', meta, autoload_with=get_engine(), schema='bronze')
+    table = get_table('jsearch_jobs', schema='bronze')
     stmt = pg_insert(table).values(rows).on_conflict_do_nothing(index_elements=['job_id', 'fetched_at'])
     with get_engine().begin() as conn:
         conn.execute(stmt)
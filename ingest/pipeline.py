@@ -0,0 +1,133 @@
+"""
+Streaming writer stage for ingest
+
+Page fetchers push each page onto a bounded queue as soon as it arrives and
+one writer thread drains the queue into bronze in batches. Network and DB
+work overlap, and memory stays at (queue size + one batch) no matter how many
+pages or (city, role) pairs a run covers. When the queue is full, fetchers
+block until the writer catches up.
+"""
+import queue
+import threading
+from ingest.watermarks import record_pair_jobs
+
+class BronzeWriter:
+    """
+    Writer stage shared by every fetcher in a run
+
+    Args:
+        upsert_fn: bulk upsert taking (jobs, run_date, return_ids=True) and returning the new job ids
+        batch_size: jobs per bulk upsert
+        max_pending_pages: queue size; fetchers block when this many pages are waiting
+        flush_interval: seconds to wait for more pages before writing a partial batch
+    """
+
+    def __init__(self, upsert_fn, batch_size=500, max_pending_pages=32, flush_interval=0.5):
+        self.upsert_fn = upsert_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending_pages)
+        self._thread = None
+        self._batch = []
+        self._batch_jobs = 0
+        self._pairs = {}
+        self.jobs_written = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="bronze-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def put_page(self, pair, jobs, run_date):
+        """Queue one page of jobs for (city, role) `pair`; blocks while the queue is full"""
+        if jobs:
+            self._queue.put(('page', pair, run_date, jobs))
+
+    def finish_pair(self, pair):
+        """
+        Wait until every page queued for `pair` is written
+        Returns {'new_jobs', 'jobs_retrieved', 'newest_created'} for the pair
+        """
+        done = threading.Event()
+        self._queue.put(('done', pair, None, done))
+        done.wait()
+
+        stats = self._pairs.pop(pair, None) or self._new_pair_stats()
+        if stats['error']:
+            raise stats['error']
+        del stats['error']
+        return stats
+
+    def close(self):
+        """Flush what's left and stop the writer thread"""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    @staticmethod
+    def _new_pair_stats():
+        return {'new_jobs': 0, 'jobs_retrieved': 0, 'newest_created': None, 'error': None}
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush()
+                continue
+
+            if item is None:
+                self._flush()
+                return
+
+            kind, pair, run_date, payload = item
+            if kind == 'page':
+                self._batch.append((pair, run_date, payload))
+                self._batch_jobs += len(payload)
+                if self._batch_jobs >= self.batch_size:
+                    self._flush()
+            else:
+                # pair finished: its pages must be written before we report its counts
+                self._flush()
+                payload.set()
+
+    def _flush(self):
+        if not self._batch:
+            return
+
+        batch, self._batch, self._batch_jobs = self._batch, [], 0
+
+        # one bulk upsert per run_date (normally one), then attribute new ids to pairs
+        by_run_date = {}
+        for pair, run_date, jobs in batch:
+            by_run_date.setdefault(run_date, []).append((pair, jobs))
+
+        for run_date, pages in by_run_date.items():
+            by_pair = {}
+            for pair, jobs in pages:
+                by_pair.setdefault(pair, []).extend(jobs)
+
+            try:
+                new_ids = set(self.upsert_fn([job for _, jobs in pages for job in jobs], run_date, return_ids=True))
+                for (city, role), jobs in by_pair.items():
+                    record_pair_jobs(city, role, jobs, run_date)
+            except Exception as e:
+                print(f"Error writing batch to bronze: {e}")
+                for pair in by_pair:
+                    self._pairs.setdefault(pair, self._new_pair_stats())['error'] = e
+                continue
+
+            for pair, jobs in by_pair.items():
+                stats = self._pairs.setdefault(pair, self._new_pair_stats())
+                stats['jobs_retrieved'] += len(jobs)
+                for job in jobs:
+                    job_id = str(job['id'])
+                    # credit each new job once, to the first pair that returned it
+                    if job_id in new_ids:
+                        new_ids.discard(job_id)
+                        stats['new_jobs'] += 1
+                    created = job.get('created')
+                    if created and (stats['newest_created'] is None or created > stats['newest_created']):
+                        stats['newest_created'] = created
+                self.jobs_written += len(jobs)
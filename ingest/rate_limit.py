@@ -0,0 +1,56 @@
+"""
+Token bucket rate limiter for API calls
+
+One bucket is shared by every thread that talks to the same provider, so a
+concurrent ingest run can never go over the provider's request budget.
+Replaces the fixed time.sleep(0.5) that used to follow every page.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Args:
+        rate: tokens (requests) added per second
+        capacity: max burst size, defaults to one second worth of tokens
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests_made = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.requests_made += tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate, capacity=None):
+        """Change the rate (e.g. from a CLI flag) without replacing the shared bucket"""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+            self._tokens = min(self._tokens, self.capacity)
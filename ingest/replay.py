@@ -0,0 +1,104 @@
+"""
+Offline replay: rebuild bronze from the raw response archive
+
+Reads archived pages (see ingest/archive.py) run date by run date, oldest
+first, and pushes them through the same streaming writer a live ingest uses,
+so first_seen/last_seen/times_seen come out as if the API had been called on
+each of those days. No network calls are made.
+"""
+import time
+from datetime import date
+from ingest.archive import RAW_ARCHIVE
+from ingest.ingest_adzuna_v2 import start_writer, record_api_call_if_new_jobs
+from ingest.ingest_jsearch import normalize_jsearch_job, insert_jsearch_rows
+from ingest.watermarks import carry_forward_pair_jobs
+
+def replay_adzuna(run_dates=None, archive=RAW_ARCHIVE):
+    """
+    Rebuild bronze.raw_jobs, bronze.pair_jobs and bronze.job_calls from archived Adzuna pages
+
+    Args:
+        run_dates: dates to replay (default: every archived date)
+    Returns {'pages', 'jobs', 'new_jobs', 'elapsed_seconds'}
+    """
+    run_dates = sorted(run_dates or archive.run_dates('adzuna'))
+    if not run_dates:
+        print("No archived Adzuna pages to replay")
+        return {'pages': 0, 'jobs': 0, 'new_jobs': 0, 'elapsed_seconds': 0.0}
+
+    started = time.monotonic()
+    total_pages = total_jobs = total_new = 0
+    last_run = {}  # (city, role) -> previous replayed run date, for incremental carry-forward
+
+    writer = start_writer()
+    try:
+        for run_date in run_dates:
+            pairs = {}
+            for record in archive.iter_pages('adzuna', run_date):
+                pair = (record['city'], record['role'])
+                response = record['response']
+                state = pairs.setdefault(pair, {'metadata': None, 'pages': 0, 'incremental': False})
+
+                if record['page'] == 1 and state['metadata'] is None:
+                    state['metadata'] = {k: v for k, v in response.items() if k != 'results'}
+                if record.get('query', {}).get('sort_by'):
+                    state['incremental'] = True
+
+                jobs = response.get('results', [])
+                if jobs:
+                    writer.put_page(pair, jobs, run_date)
+                    state['pages'] += 1
+                    total_pages += 1
+                    total_jobs += len(jobs)
+
+            for (city, role), state in pairs.items():
+                stats = writer.finish_pair((city, role))
+                new_jobs = stats['new_jobs']
+
+                # incremental runs only fetched recent jobs; carry the rest forward like the live run did
+                if state['incremental'] and (city, role) in last_run:
+                    carry_forward_pair_jobs(city, role, last_run[(city, role)], run_date)
+                last_run[(city, role)] = run_date
+
+                if state['metadata'] and new_jobs > 0:
+                    record_api_call_if_new_jobs(city, role, state['pages'], state['metadata'], run_date,
+                                                stats['jobs_retrieved'], new_jobs,
+                                                newest_created=stats['newest_created'],
+                                                fetch_mode='incremental' if state['incremental'] else 'full')
+                total_new += new_jobs
+
+            print(f"  {run_date}: replayed {len(pairs)} (city, role) pairs")
+    finally:
+        writer.close()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Replayed {total_pages} pages / {total_jobs} jobs ({total_new} new) from {len(run_dates)} day(s) "
+          f"in {elapsed:.1f}s ({total_pages / elapsed if elapsed else 0:.0f} pages/s, "
+          f"{total_jobs / elapsed if elapsed else 0:.0f} jobs/s)")
+
+    return {'pages': total_pages, 'jobs': total_jobs, 'new_jobs': total_new, 'elapsed_seconds': elapsed}
+
+def replay_jsearch(run_dates=None, archive=RAW_ARCHIVE):
+    """Rebuild bronze.jsearch_jobs from archived JSearch pages"""
+    run_dates = sorted(run_dates or archive.run_dates('jsearch'))
+    total_jobs = 0
+
+    for run_date in run_dates:
+        rows = []
+        for record in archive.iter_pages('jsearch', run_date):
+            for job in record['response'].get('data', []):
+                row = normalize_jsearch_job(job)
+                row['fetched_at'] = run_date
+                rows.append(row)
+        insert_jsearch_rows(rows)
+        total_jobs += len(rows)
+        print(f"  {run_date}: replayed {len(rows)} JSearch jobs")
+
+    print(f"✅ Replayed {total_jobs} JSearch jobs from {len(run_dates)} day(s)")
+    return total_jobs
+
+def replay_archive(run_dates=None):
+    """Replay every archived source into bronze"""
+    run_dates = [date.fromisoformat(d) if isinstance(d, str) else d for d in (run_dates or [])]
+    replay_adzuna(run_dates)
+    replay_jsearch(run_dates)
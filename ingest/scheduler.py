@@ -0,0 +1,253 @@
+"""
+Daily API budget scheduler
+
+Adzuna caps calls per day, so instead of paging through every
+(city, role) pair to the same depth, spend the day's budget where it buys
+the most fresh jobs:
+
+1. Estimate each pair's churn from history: market size (latest api_count in
+   bronze.job_calls) and new jobs per day (jobs first returned by the pair
+   after its first run, from bronze.pair_jobs). Rates are smoothed with one
+   pseudo-job per day so quiet pairs still get refreshed eventually.
+2. Expected new jobs = churn rate x days since the pair was last fetched.
+3. Price each page a pair could use:
+   - never fetched: every job is new, up to max_pages
+   - incremental (date sorted): new jobs fill the first pages
+   - full refresh due: new jobs are spread evenly across relevance-sorted pages
+4. Hand out pages greedily, best expected new jobs per call first, until the
+   budget left for the day is used up.
+
+Planned and spent calls are recorded in bronze.api_budget (see sql/4_api_budget.sql).
+"""
+import heapq
+import os
+from datetime import date, timedelta
+from sqlalchemy import text
+from database.db import get_engine
+from ingest.ingest_adzuna_v2 import ingest_adzuna_incremental, plan_pages, ADZUNA_RATE_LIMITER, ADZUNA_FULL_REFRESH_DAYS
+from ingest.ingest_grid import ingest_grid
+
+ADZUNA_DAILY_CALL_BUDGET = int(os.getenv("ADZUNA_DAILY_CALL_BUDGET", "250"))
+
+# Share of the budget held back for retries (they count against the quota too)
+SCHEDULER_RESERVE = float(os.getenv("SCHEDULER_RESERVE", "0.1"))
+
+# How much history feeds the churn estimate
+SCHEDULER_LOOKBACK_DAYS = int(os.getenv("SCHEDULER_LOOKBACK_DAYS", "14"))
+
+def load_pair_history(cities, roles, run_date, source='adzuna', lookback_days=SCHEDULER_LOOKBACK_DAYS):
+    """
+    Churn inputs for every (city, role) pair that has history
+    Returns {(city, role): {'last_run', 'last_full_run', 'api_count', 'new_jobs', 'observed_days'}}
+    """
+    since = run_date - timedelta(days=lookback_days)
+    engine = get_engine()
+
+    with engine.connect() as conn:
+        calls = conn.execute(text("""
+            SELECT
+                city,
+                role,
+                MAX(run_date) as last_run,
+                MAX(run_date) FILTER (WHERE fetch_mode = 'full') as last_full_run,
+                (ARRAY_AGG(api_count ORDER BY run_date DESC))[1] as api_count
+            FROM bronze.job_calls
+            WHERE city = ANY(:cities) AND role = ANY(:roles)
+            GROUP BY city, role
+        """), {'cities': list(cities), 'roles': list(roles)}).fetchall()
+
+        # new jobs = first returned by the pair after its initial load, within the lookback window
+        arrivals = conn.execute(text("""
+            WITH firsts AS (
+                SELECT city, role, MIN(first_seen) as first_day, MAX(last_seen) as last_run
+                FROM bronze.pair_jobs
+                WHERE source = :source AND city = ANY(:cities) AND role = ANY(:roles)
+                GROUP BY city, role
+            )
+            SELECT
+                f.city,
+                f.role,
+                f.first_day,
+                f.last_run,
+                COUNT(*) FILTER (WHERE p.first_seen > f.first_day AND p.first_seen >= :since) as new_jobs
+            FROM firsts f
+            JOIN bronze.pair_jobs p
+                ON p.source = :source AND p.city = f.city AND p.role = f.role
+            GROUP BY f.city, f.role, f.first_day, f.last_run
+        """), {'source': source, 'cities': list(cities), 'roles': list(roles), 'since': since}).fetchall()
+
+    history = {}
+    for row in calls:
+        history[(row.city, row.role)] = {
+            'last_run': row.last_run,
+            'last_full_run': row.last_full_run,
+            'api_count': row.api_count or 0,
+            'new_jobs': 0,
+            'observed_days': 0,
+        }
+    for row in arrivals:
+        pair = history.setdefault((row.city, row.role), {
+            'last_run': None, 'last_full_run': None, 'api_count': 0, 'new_jobs': 0, 'observed_days': 0
+        })
+        pair['last_run'] = max(filter(None, [pair['last_run'], row.last_run]))
+        window_start = max(row.first_day + timedelta(days=1), since)
+        pair['new_jobs'] = row.new_jobs
+        pair['observed_days'] = max(0, (row.last_run - window_start).days + 1)
+    return history
+
+def _page_gains(mode, expected_new, api_count, depth, per_page):
+    """Expected new jobs from each page a pair could fetch, in fetch order"""
+    if mode == 'new':
+        return [per_page] * depth
+    if mode == 'full':
+        new_share = min(1.0, expected_new / api_count) if api_count else 0.0
+        return [per_page * new_share] * depth
+    # incremental: date-sorted, so new jobs fill the first pages
+    return [max(0.0, min(per_page, expected_new - page * per_page)) for page in range(depth)]
+
+def plan_refresh(cities, roles, budget, run_date=None, source='adzuna', max_pages=20, per_page=50,
+                 full_refresh_days=ADZUNA_FULL_REFRESH_DAYS):
+    """
+    Decide which pairs to refresh today and how deep to page, within `budget` calls
+
+    Returns (plan, skipped): plan is a list of dicts with city, role, mode ('new', 'full'
+    or 'incremental'), max_pages, expected_new, new_per_day, days_stale and api_count,
+    best value first; skipped holds the same dicts for pairs that got no pages
+    """
+    run_date = run_date or date.today()
+    history = load_pair_history(cities, roles, run_date, source)
+
+    # unknown markets are assumed to be the size of a typical known one
+    known_counts = sorted(h['api_count'] for h in history.values() if h['api_count'])
+    typical_count = known_counts[len(known_counts) // 2] if known_counts else max_pages * per_page
+
+    candidates = []
+    for city in cities:
+        for role in roles:
+            h = history.get((city, role))
+            if h is None or h['last_run'] is None:
+                candidates.append({
+                    'city': city, 'role': role, 'mode': 'new', 'api_count': typical_count,
+                    'new_per_day': None, 'days_stale': None, 'expected_new': float(typical_count),
+                })
+                continue
+
+            days_stale = (run_date - h['last_run']).days
+            new_per_day = (h['new_jobs'] + 1) / (h['observed_days'] + 1)
+            api_count = h['api_count'] or typical_count
+            full_due = h['last_full_run'] is None or (run_date - h['last_full_run']).days >= full_refresh_days
+            candidates.append({
+                'city': city, 'role': role, 'mode': 'full' if full_due else 'incremental',
+                'api_count': api_count, 'new_per_day': new_per_day, 'days_stale': days_stale,
+                'expected_new': min(float(api_count), new_per_day * days_stale),
+            })
+
+    # greedy: always buy the page with the most expected new jobs next
+    gains = []
+    heap = []
+    for i, c in enumerate(candidates):
+        depth = plan_pages(c['api_count'], per_page, max_pages) or 1
+        gains.append(_page_gains(c['mode'], c['expected_new'], c['api_count'], depth, per_page))
+        c['max_pages'] = 0
+        if gains[i][0] > 0:
+            heapq.heappush(heap, (-gains[i][0], i))
+
+    calls = 0
+    while heap and calls < budget:
+        _, i = heapq.heappop(heap)
+        c = candidates[i]
+        c['max_pages'] += 1
+        calls += 1
+        if c['max_pages'] < len(gains[i]) and gains[i][c['max_pages']] > 0:
+            heapq.heappush(heap, (-gains[i][c['max_pages']], i))
+
+    for i, c in enumerate(candidates):
+        c['expected_new'] = round(min(c['expected_new'], sum(gains[i][:c['max_pages']])), 1)
+
+    plan = sorted((c for c in candidates if c['max_pages']), key=lambda c: -c['expected_new'])
+    skipped = [c for c in candidates if not c['max_pages']]
+    return plan, skipped
+
+def get_budget_spent(run_date, source='adzuna'):
+    """Calls already spent today by earlier scheduled runs"""
+    engine = get_engine()
+    with engine.connect() as conn:
+        spent = conn.execute(text("""
+            SELECT calls_spent FROM bronze.api_budget WHERE run_date = :run_date AND source = :source
+        """), {'run_date': run_date, 'source': source}).scalar()
+    return spent or 0
+
+def record_budget(run_date, calls_allowed, calls_planned, calls_spent, pairs_planned, pairs_skipped, source='adzuna'):
+    """Add one scheduled run to the day's budget ledger"""
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO bronze.api_budget (run_date, source, calls_allowed, calls_planned, calls_spent, pairs_planned, pairs_skipped)
+            VALUES (:run_date, :source, :calls_allowed, :calls_planned, :calls_spent, :pairs_planned, :pairs_skipped)
+            ON CONFLICT (run_date, source) DO UPDATE SET
+                calls_allowed = EXCLUDED.calls_allowed,
+                calls_planned = bronze.api_budget.calls_planned + EXCLUDED.calls_planned,
+                calls_spent = bronze.api_budget.calls_spent + EXCLUDED.calls_spent,
+                pairs_planned = bronze.api_budget.pairs_planned + EXCLUDED.pairs_planned,
+                pairs_skipped = EXCLUDED.pairs_skipped,
+                updated_at = CURRENT_TIMESTAMP
+        """), {
+            'run_date': run_date,
+            'source': source,
+            'calls_allowed': calls_allowed,
+            'calls_planned': calls_planned,
+            'calls_spent': calls_spent,
+            'pairs_planned': pairs_planned,
+            'pairs_skipped': pairs_skipped
+        })
+
+def print_plan(plan, skipped, budget_left, calls_allowed):
+    """Dry-run style report of a refresh plan"""
+    print(f"{'city':<22} {'role':<24} {'mode':<12} {'pages':>5} {'stale':>5} {'new/day':>8} {'exp. new':>8}")
+    for c in plan:
+        stale = '-' if c['days_stale'] is None else c['days_stale']
+        rate = '-' if c['new_per_day'] is None else f"{c['new_per_day']:.1f}"
+        print(f"{c['city']:<22} {c['role']:<24} {c['mode']:<12} {c['max_pages']:>5} {stale:>5} {rate:>8} {c['expected_new']:>8.0f}")
+
+    planned = sum(c['max_pages'] for c in plan)
+    print(f"Plan: {planned}/{budget_left} calls left today (daily budget {calls_allowed}), "
+          f"{len(plan)} pairs refreshed, {len(skipped)} skipped, "
+          f"~{sum(c['expected_new'] for c in plan):.0f} new jobs expected")
+    if skipped:
+        print("Skipped: " + ", ".join(f"{c['role']} in {c['city']}" for c in skipped))
+
+def run_scheduled_ingest(cities, roles, budget=ADZUNA_DAILY_CALL_BUDGET, dry_run=False, concurrency=1,
+                         reserve=SCHEDULER_RESERVE, rate_limiter=ADZUNA_RATE_LIMITER):
+    """
+    Plan today's refresh under the daily call budget and (unless dry_run) run it
+
+    Pairs run through the incremental ingest, which falls back to a full pass
+    when one is due; each pair's page allocation is passed as its max_pages.
+    Returns the plan
+    """
+    run_date = date.today()
+    spent_today = get_budget_spent(run_date)
+    budget_left = max(0, budget - spent_today)
+    plan, skipped = plan_refresh(cities, roles, int(budget_left * (1 - reserve)), run_date)
+
+    print(f"📅 Refresh plan for {run_date} ({spent_today} of {budget} calls already spent today)")
+    print_plan(plan, skipped, budget_left, budget)
+
+    if dry_run or not plan:
+        return plan
+
+    pages = {(c['city'], c['role']): c['max_pages'] for c in plan}
+
+    def ingest_planned(city, role, writer=None):
+        return ingest_adzuna_incremental(city, role, max_pages=pages[(city, role)], writer=writer)
+
+    requests_before = rate_limiter.requests_made
+    try:
+        ingest_grid(cities, roles, concurrency=concurrency, ingest_fn=ingest_planned,
+                    rate_limiter=rate_limiter, pairs=list(pages))
+    finally:
+        calls_spent = rate_limiter.requests_made - requests_before
+        record_budget(run_date, budget, sum(pages.values()), calls_spent, len(plan), len(skipped))
+        print(f"💰 Budget: spent {calls_spent} calls this run, {spent_today + calls_spent}/{budget} today")
+
+    return plan
@@ -0,0 +1,141 @@
+"""
+Per-(city, role) watermarks for incremental ingest
+
+Built on bronze.job_calls (newest posting date, last full run) and
+bronze.pair_jobs (job ids each pair has returned). The incremental fetcher
+uses them to ask Adzuna only for recent, date-sorted results and to stop
+paging once a page contains nothing new.
+
+Jobs outside an incremental fetch's date window are carried forward
+(carry_forward_pair_jobs) without being fetched, but only for
+CARRY_FORWARD_MAX_DAYS after the API last actually returned them to the
+pair: a job that has silently expired is reported seen for at most that
+many days. (A full run, every ADZUNA_FULL_REFRESH_DAYS, usually catches
+it sooner: it returns every live job.)
+
+    CARRY_FORWARD_MAX_DAYS    days a job is carried forward after its last real return (default: 7)
+"""
+import os
+from datetime import date, timedelta
+from database.db import get_engine, copy_rows
+from sqlalchemy import text
+
+CARRY_FORWARD_MAX_DAYS = int(os.getenv("CARRY_FORWARD_MAX_DAYS", "7"))
+
+def get_watermark(city, role, source='adzuna', run_date=None):
+    """
+    Load the watermark for one (city, role) pair
+
+    Returns None if the pair has never been ingested, otherwise a dict with:
+        last_run: latest run date the pair returned jobs
+        last_full_run: latest run date that paged through everything
+        newest_created: newest posting timestamp we hold for the pair
+        known_ids: job ids the pair returned inside the window the next incremental
+            fetch covers (days_since before run_date, default today); older ids can't
+            come back from a fetch limited to max_days_old, so they aren't loaded
+    """
+    run_date = run_date or date.today()
+    engine = get_engine()
+    params = {'source': source, 'city': city, 'role': role}
+
+    with engine.connect() as conn:
+        calls = conn.execute(text("""
+            SELECT
+                MAX(run_date) FILTER (WHERE fetch_mode = 'full') as last_full_run,
+                MAX(newest_created) as newest_created
+            FROM bronze.job_calls
+            WHERE city = :city AND role = :role
+        """), params).fetchone()
+
+        last_run = conn.execute(text("""
+            SELECT MAX(last_seen)
+            FROM bronze.pair_jobs
+            WHERE source = :source AND city = :city AND role = :role
+        """), params).scalar()
+        if last_run is None:
+            return None
+
+        watermark = {
+            'last_run': last_run,
+            'last_full_run': calls.last_full_run,
+            'newest_created': calls.newest_created,
+        }
+        # Uses idx_pair_jobs_last_seen: only the ids the pair saw inside the fetch window
+        window_start = run_date - timedelta(days=days_since(watermark, run_date))
+        watermark['known_ids'] = set(conn.execute(text("""
+            SELECT job_id
+            FROM bronze.pair_jobs
+            WHERE source = :source AND city = :city AND role = :role AND last_seen >= :window_start
+        """), {**params, 'window_start': window_start}).scalars())
+
+    return watermark
+
+def days_since(watermark, run_date):
+    """
+    How far back the next incremental fetch must look (for Adzuna's max_days_old)
+    Covers everything since the older of the last run and the newest posting, plus a day of slack
+    """
+    since = watermark['last_run']
+    if watermark['newest_created']:
+        since = min(since, watermark['newest_created'].date())
+    return max(1, (run_date - since).days + 1)
+
+def record_pair_jobs(city, role, jobs, run_date, source='adzuna'):
+    """Record which job ids this (city, role) pair returned on run_date"""
+    if not jobs:
+        return
+
+    rows = {str(job['id']): job.get('created') for job in jobs}
+
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS pair_jobs_stage"))
+        conn.execute(text("CREATE TEMP TABLE pair_jobs_stage (job_id text, created timestamptz)"))
+        copy_rows(conn, 'pair_jobs_stage', ['job_id', 'created'], rows.items())
+        conn.execute(text("""
+            INSERT INTO bronze.pair_jobs (source, city, role, job_id, created, first_seen, last_seen, last_returned)
+            SELECT :source, :city, :role, job_id, created, :run_date, :run_date, :run_date
+            FROM pair_jobs_stage
+            ON CONFLICT (source, city, role, job_id) DO UPDATE SET
+                last_seen = GREATEST(bronze.pair_jobs.last_seen, EXCLUDED.last_seen),
+                last_returned = GREATEST(bronze.pair_jobs.last_returned, EXCLUDED.last_returned),
+                created = COALESCE(EXCLUDED.created, bronze.pair_jobs.created)
+        """), {'source': source, 'city': city, 'role': role, 'run_date': run_date})
+        conn.execute(text("DROP TABLE pair_jobs_stage"))
+
+def carry_forward_pair_jobs(city, role, previous_run, run_date, source='adzuna'):
+    """
+    Cheap last_seen refresh for jobs the pair returned on its previous run but
+    that fall outside today's date-limited fetch
+
+    Only touches last_seen/times_seen - the payload is not re-downloaded or rewritten.
+    Jobs the API hasn't returned to the pair in the last CARRY_FORWARD_MAX_DAYS are not carried
+    (they keep their last_seen and drop out of the pair's watermark until a fetch returns them again).
+    Returns the number of bronze.raw_jobs rows refreshed.
+    """
+    engine = get_engine()
+    params = {'source': source, 'city': city, 'role': role, 'previous_run': previous_run, 'run_date': run_date,
+              'oldest_return': run_date - timedelta(days=CARRY_FORWARD_MAX_DAYS)}
+
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE bronze.raw_jobs r
+            SET last_seen = :run_date,
+                times_seen = r.times_seen + 1
+            FROM bronze.pair_jobs p
+            WHERE p.source = :source AND p.city = :city AND p.role = :role
+                AND p.last_seen = :previous_run
+                AND p.last_returned >= :oldest_return
+                AND r.source = p.source AND r.job_id = p.job_id
+                AND r.last_seen < :run_date
+        """), params)
+
+        conn.execute(text("""
+            UPDATE bronze.pair_jobs
+            SET last_seen = :run_date
+            WHERE source = :source AND city = :city AND role = :role
+                AND last_seen = :previous_run
+                AND last_returned >= :oldest_return
+        """), params)
+
+    return result.rowcount
@@ -2,20 +2,26 @@
 look at projects/gfci-modular for better code structure
 
 # TODO:
-0. GET NUMBER OF TOTAL JOBS IN CITIES NOT JUST 50 PER PAGE
 1. update tables to include new fields from zillow and jsearch (e.g. rent, housing_type, etc.)
 2. add new data sources 
 3. add new enrichment logic
 4. add new utils in utils.py
 """
-from ingest.ingest_adzuna_v2 import ingest_adzuna
+from ingest.ingest_adzuna_v2 import ingest_adzuna, ingest_adzuna_incremental, ADZUNA_RATE_LIMITER
+from ingest.ingest_grid import ingest_grid
 from ingest.ingest_housing_data import ingest_zillow_csv
-from transform.enrich_housing_data import enrich_zori, enrich_zhvi
-from database.db import init_schema, create_tables, run_sql_file, get_engine, text
+from transform.enrich_housing_data import enrich_zori
+from database.db import init_schema, create_tables, apply_migrations, get_engine, text
 from pathlib import Path
 from transform.enrich_adzuna_v2 import run_adzuna_enrichment_v2
-from ingest.ingest_jsearch import ingest_jsearch
+from transform.parallel import run_parallel_enrichment, ENRICH_WORKERS, ENRICH_CHUNK_SIZE
+from transform.enrich_sql import run_adzuna_enrichment_sql
 from transform.enrich_jsearch import run_jsearch_enrichment
+from transform.derived_fields import recompute_stale_fields, DERIVED_FIELDS
+from transform.companies import refresh_companies
+from transform.dedup import dedup_jobs
+from ingest.replay import replay_archive
+from ingest.scheduler import run_scheduled_ingest, ADZUNA_DAILY_CALL_BUDGET
 import argparse
 
 # Config
@@ -30,21 +36,29 @@ HOUSING_DATASETS = {
     #'zhvi': Path('data/housing/zhvi-6-19-2025.csv')
 }
 
-def ingest_all_jobs(cities, roles):
+def ingest_all_jobs(cities, roles, concurrency=1, incremental=False):
     """Ingest all jobs from all cities and roles and store in bronze schema"""
-    for city in cities:
-        for role in roles:
-            # adzuna jobs 
-            ingest_adzuna(city, role)
-            
-            # jsearch jobs
-            #ingest_jsearch(city, role)
+    # jsearch jobs
+    #ingest_grid(cities, roles, concurrency=concurrency, ingest_fn=ingest_jsearch)
+    
+    # adzuna jobs - pairs run concurrently, sharing one rate limiter
+    ingest_fn = ingest_adzuna_incremental if incremental else ingest_adzuna
+    return ingest_grid(cities, roles, concurrency=concurrency, ingest_fn=ingest_fn)
 
         
-def enrich_all_jobs(cities, roles):
+def enrich_all_jobs(cities, roles, workers=None, chunk_size=None, full=False, sql_pushdown=False):
     """Enrich all jobs from all cities and roles and store in silver schema"""
-    run_adzuna_enrichment_v2()
-    #run_jsearch_enrichment()
+    # JSearch first: the Adzuna run ends with the gold pass, whose dedup and companies stages read both sources
+    run_jsearch_enrichment(chunk_size=chunk_size, workers=workers or 1)
+    # structural fields extracted inside Postgres, only the text classifiers run here
+    if sql_pushdown:
+        run_adzuna_enrichment_sql(full=full, chunk_size=chunk_size)
+    # large backlogs / full re-enrichment: keyset chunks across a process pool
+    elif workers or full:
+        run_parallel_enrichment(workers=workers or ENRICH_WORKERS, chunk_size=chunk_size or ENRICH_CHUNK_SIZE, full=full)
+    else:
+        # pending jobs streamed in chunks (STREAM_CHUNK_SIZE by default)
+        run_adzuna_enrichment_v2(chunk_size=chunk_size)
     print(f'Enriched all jobs for cities: {cities} and roles: {roles}')
     
             
@@ -85,14 +99,30 @@ def main():
     # setup (run once)
     parser.add_argument("--init", action="store_true", help="Initialize database schema")
     parser.add_argument("--create", action="store_true", help="Create database tables")
+    parser.add_argument("--migrate", action="store_true", help="Apply numbered schema migrations (sql/3_*.sql and later)")
     
     # fresh data ingestion
     parser.add_argument('--ingest-jobs', action='store_true', help='Ingest jobs (make API calls)')
     parser.add_argument('--ingest-housing', action='store_true', help='Ingest all housing data (no API call)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of (city, role) pairs to ingest at once (default: 1)')
+    parser.add_argument('--incremental', action='store_true', help='Only fetch jobs posted since each (city, role) pair was last ingested')
+    parser.add_argument('--requests-per-second', type=float, default=None, help='Override the Adzuna rate limit (default: ADZUNA_REQUESTS_PER_SECOND or 2)')
+    parser.add_argument('--schedule', action='store_true', help='Refresh the pairs with the most expected new jobs within the daily call budget')
+    parser.add_argument('--budget', type=int, default=ADZUNA_DAILY_CALL_BUDGET, help='Daily Adzuna call budget for --schedule (default: ADZUNA_DAILY_CALL_BUDGET or 250)')
+    parser.add_argument('--dry-run', action='store_true', help='With --schedule: print the refresh plan without making API calls; with --recompute-fields: only count stale rows')
+    
+    parser.add_argument('--replay', nargs='*', metavar='RUN_DATE', help='Rebuild bronze from the raw response archive, no API calls (default: every archived date)')
     
     # process data
     parser.add_argument('--enrich-jobs', action='store_true', help='Enrich jobs (no API calls)')
     parser.add_argument('--enrich-housing', action='store_true', help='Enrich housing data (no API calls)')
+    parser.add_argument('--workers', type=int, default=None, help='With --enrich-jobs: enrich in chunks across this many processes (default with --reenrich: ENRICH_WORKERS or the CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='With --enrich-jobs: jobs per chunk (default: ENRICH_CHUNK_SIZE with --workers, STREAM_CHUNK_SIZE otherwise; both 5000)')
+    parser.add_argument('--reenrich', action='store_true', help='With --enrich-jobs: re-enrich every Adzuna job, not just new/updated ones')
+    parser.add_argument('--recompute-fields', nargs='*', metavar='FIELD', choices=list(DERIVED_FIELDS), help='Recompute only stale derived fields of silver.jobs_v2 (default: every field); with --dry-run only count them; with --reenrich check every row, not just rows updated since the last pass')
+    parser.add_argument('--refresh-companies', action='store_true', help='Resolve company names to company_id and update gold.companies from jobs changed since the last refresh (with --reenrich: rebuild from every job)')
+    parser.add_argument('--dedup-jobs', action='store_true', help='Link near-duplicate jobs (MinHash/LSH) among jobs changed since the last run (with --reenrich: rebuild every signature and cluster)')
+    parser.add_argument('--sql-pushdown', action='store_true', help='With --enrich-jobs: extract structural fields from bronze JSONB in SQL, ship only classifier inputs to Python')
 
     # full pipeline
     #parser.add_argument('--all', action='store_true', help='Run all ingest and enrich scripts')
@@ -107,12 +137,28 @@ def main():
         init_schema()
     elif args.create:
         create_tables()
+    elif args.migrate:
+        apply_migrations()
     elif args.clear_silver:
         clear_silver_tables()
     elif args.ingest_jobs:
-        ingest_all_jobs(TARGET_CITIES, TARGET_ROLES)
+        if args.requests_per_second:
+            ADZUNA_RATE_LIMITER.set_rate(args.requests_per_second)
+        ingest_all_jobs(TARGET_CITIES, TARGET_ROLES, concurrency=args.concurrency, incremental=args.incremental)
+    elif args.schedule:
+        if args.requests_per_second:
+            ADZUNA_RATE_LIMITER.set_rate(args.requests_per_second)
+        run_scheduled_ingest(TARGET_CITIES, TARGET_ROLES, budget=args.budget, dry_run=args.dry_run, concurrency=args.concurrency)
     elif args.enrich_jobs:
-        enrich_all_jobs(TARGET_CITIES, TARGET_ROLES)
+        enrich_all_jobs(TARGET_CITIES, TARGET_ROLES, workers=args.workers, chunk_size=args.chunk_size, full=args.reenrich, sql_pushdown=args.sql_pushdown)
+    elif args.recompute_fields is not None:
+        recompute_stale_fields(args.recompute_fields, chunk_size=args.chunk_size, dry_run=args.dry_run, full=args.reenrich)
+    elif args.dedup_jobs:
+        dedup_jobs(full=args.reenrich, chunk_size=args.chunk_size)
+    elif args.refresh_companies:
+        refresh_companies(full=args.reenrich)
+    elif args.replay is not None:
+        replay_archive(args.replay)
     elif args.ingest_housing:
         ingest_all_housing(HOUSING_DATASETS)
     elif args.enrich_housing:
@@ -0,0 +1,36 @@
+"""
+Backfill one derived column of silver.jobs_v2 with the resumable runner
+
+Walks the table in keyset chunks, recomputes the column with its function
+from transform/utils.py, writes changed rows with one UPDATE per chunk and
+checkpoints after each chunk (silver.backfill_checkpoints). Rerunning after
+an interruption resumes where it stopped.
+
+Usage:
+    python scripts/backfill_column.py seniority                 # dry run: histogram + samples
+    python scripts/backfill_column.py seniority --apply
+    python scripts/backfill_column.py job_type --apply --chunk-size 10000
+    python scripts/backfill_column.py seniority --apply --restart
+    python scripts/backfill_column.py seniority --apply --workers 8   # chunks across 8 processes, not resumable
+"""
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.backfill import run_backfill, BACKFILLS
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable backfill of a derived silver.jobs_v2 column")
+    parser.add_argument('name', choices=sorted(BACKFILLS))
+    parser.add_argument('--apply', action='store_true', help='Write changes (default: dry run)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='Rows per chunk (default: STREAM_CHUNK_SIZE or 5000)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the beginning')
+    parser.add_argument('--workers', type=int, default=1, help='Recompute chunks across this many processes (default: 1, resumable)')
+    args = parser.parse_args()
+
+    run_backfill(args.name, dry_run=not args.apply, chunk_size=args.chunk_size, restart=args.restart, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark near-duplicate detection: MinHash signatures + LSH banding vs exact all-pairs Jaccard
+Jobs are random texts in a handful of places; a share of them get a near-duplicate (the same posting
+from another source: same place, title/company spelled differently, description cut short or extended,
+a few words changed) and some get an identical copy in another city, which must not be linked
+Reports signature throughput, how many true duplicate pairs LSH finds, and how many pairs it had to compare
+"""
+import sys
+import os
+import time
+import random
+import argparse
+from itertools import combinations
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.dedup import shingles, minhash_signatures, band_buckets, place_key, link_pairs, DEDUP_THRESHOLD, BANDS
+
+VOCABULARY = [f"word{i}" for i in range(3000)]
+TITLES = ["Data Analyst", "Senior Data Analyst", "Data Scientist", "Business Analyst", "Data Engineer"]
+COMPANIES = ["Acme Corp", "Globex LLC", "Initech Inc.", "Umbrella Health", "Stark Industries"]
+PLACES = [("Detroit", "MI", "19820"), ("Chicago", "IL", "16980"), ("Austin", "TX", "12420"), ("Lansing", "MI", None)]
+
+def make_jobs(n, duplicate_share=0.3, other_city_share=0.1, seed=42):
+    """
+    n jobs as (title, company, description) with a place_key each
+    Returns the jobs, their places, the index pairs that are duplicates and the pairs copied to another city
+    """
+    rng = random.Random(seed)
+    jobs, places, duplicates, other_city = [], [], [], []
+    while len(jobs) < n:
+        title, company = rng.choice(TITLES), rng.choice(COMPANIES)
+        words = rng.choices(VOCABULARY, k=rng.randint(60, 200))
+        place, original = rng.choice(PLACES), len(jobs)
+        jobs.append((title, company, ' '.join(words)))
+        places.append(place_key(*place))
+        if len(jobs) < n and rng.random() < duplicate_share:
+            edited = list(words[:rng.randint(55, len(words))])
+            for _ in range(rng.randint(0, 2)):
+                edited[rng.randrange(len(edited))] = rng.choice(VOCABULARY)
+            jobs.append((title, company.upper() + ', INC.', ' '.join(edited)))
+            places.append(place_key(*place))
+            duplicates.append((len(jobs) - 2, len(jobs) - 1))
+        if len(jobs) < n and rng.random() < other_city_share:
+            jobs.append((title, company, ' '.join(words)))
+            places.append(place_key(*rng.choice([other for other in PLACES if other != place])))
+            other_city.append((original, len(jobs) - 1))
+    return jobs, places, duplicates, other_city
+
+def lsh_pairs(buckets):
+    """Index pairs sharing at least one (band, bucket)"""
+    index = {}
+    for job, row in enumerate(buckets):
+        for band, bucket in enumerate(row):
+            index.setdefault((band, int(bucket)), []).append(job)
+    pairs = set()
+    for members in index.values():
+        pairs.update(combinations(members, 2))
+    return pairs
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MinHash/LSH near-duplicate detection')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 20000])
+    parser.add_argument('--check', type=int, default=2000, help='Jobs compared against exact all-pairs Jaccard')
+    args = parser.parse_args()
+
+    # Quality: LSH + signature threshold vs exact Jaccard over every pair
+    jobs, places, _, other_city = make_jobs(args.check)
+    sets = [shingles(*job) for job in jobs]
+    signatures = minhash_signatures(sets)
+    exact = {(a, b) for a, b in combinations(range(len(sets)), 2)
+             if places[a] == places[b] and len(sets[a] & sets[b]) / len(sets[a] | sets[b]) >= DEDUP_THRESHOLD}
+    candidates = lsh_pairs(band_buckets(signatures, places))
+    found = {(a, b) for a, b, _ in link_pairs(candidates, dict(enumerate(signatures)))}
+    all_pairs = len(sets) * (len(sets) - 1) // 2
+    print(f"check: {len(jobs)} jobs, {len(exact)} same-place pairs at Jaccard >= {DEDUP_THRESHOLD}; "
+          f"LSH ({BANDS} bands) compared {len(candidates)} of {all_pairs} pairs, "
+          f"found {len(found & exact)}/{len(exact)}, {len(found - exact)} false links, "
+          f"{len(found & set(other_city))}/{len(other_city)} other-city copies linked\n")
+
+    print(f"{'jobs':>7} {'signature (s)':>14} {'jobs/s':>10} {'LSH (s)':>8} {'candidates':>11} {'linked':>7} {'planted':>8}")
+    for size in args.sizes:
+        jobs, places, planted, _ = make_jobs(size)
+        started = time.perf_counter()
+        signatures = minhash_signatures([shingles(*job) for job in jobs])
+        buckets = band_buckets(signatures, places)
+        signature_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        candidates = lsh_pairs(buckets)
+        links = link_pairs(candidates, dict(enumerate(signatures)))
+        lsh_seconds = time.perf_counter() - started
+        print(f"{size:>7} {signature_seconds:>14.2f} {size / signature_seconds:>10,.0f} {lsh_seconds:>8.2f} "
+              f"{len(candidates):>11} {len(links):>7} {len(planted):>8}")
+
+if __name__ == "__main__":
+    main()
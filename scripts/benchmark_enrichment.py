@@ -0,0 +1,83 @@
+"""
+Benchmark per-row vs columnar Adzuna enrichment
+
+Times enrich_adzuna_job_v2 over df.iterrows() (the old run_adzuna_enrichment_v2
+loop) against enrich_adzuna_batch on synthetic bronze.raw_jobs rows, and
+checks that both produce identical output. No database needed.
+
+Usage:
+    python scripts/benchmark_enrichment.py
+    python scripts/benchmark_enrichment.py --sizes 10000 100000 1000000 --legacy-max 100000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import date, timedelta
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transform.enrich_adzuna_v2 import enrich_adzuna_job_v2
+from transform.enrich_batch import enrich_adzuna_batch
+from synthetic_jobs import make_adzuna_job
+
+def make_raw_rows(n, seed=42):
+    """Synthetic bronze.raw_jobs rows, with a few edge cases mixed in"""
+    rng = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(n):
+        job = make_adzuna_job(f"bench-{i}", rng)
+        if i % 7 == 0:
+            job['description'] += " Remote friendly, work from home two days a week."
+        if i % 11 == 0:
+            job['location']['area'] = job['location']['area'][:2]  # state-level location
+        if i % 13 == 0:
+            job['created'] = job['created'].replace('Z', '-05:00')
+        if i % 17 == 0:
+            del job['created']
+        rows.append({
+            'job_id': job['id'],
+            'payload': job,
+            'first_seen': today - timedelta(days=rng.randrange(0, 30)),
+            'last_seen': today - timedelta(days=rng.randrange(0, 2)),
+            'times_seen': rng.randrange(1, 10),
+        })
+    return pd.DataFrame(rows)
+
+def enrich_per_row(df_raw):
+    return pd.DataFrame([enrich_adzuna_job_v2(row.to_dict()) for _, row in df_raw.iterrows()])
+
+def normalized(df):
+    """Records with NaN -> None so per-row and batch output compare equal"""
+    return df.astype(object).where(pd.notnull(df), None).to_dict('records')
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-row vs columnar enrichment")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=100000, help='Skip the per-row path above this size')
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'per-row (s)':>12} {'batch (s)':>10} {'batch rows/s':>13} {'speedup':>8}  output")
+    for n in args.sizes:
+        df_raw = make_raw_rows(n)
+
+        started = time.perf_counter()
+        batch = enrich_adzuna_batch(df_raw)
+        batch_seconds = time.perf_counter() - started
+
+        if n <= args.legacy_max:
+            started = time.perf_counter()
+            legacy = enrich_per_row(df_raw)
+            legacy_seconds = time.perf_counter() - started
+            match = "identical" if normalized(legacy) == normalized(batch) else "MISMATCH"
+            print(f"{n:>9} {legacy_seconds:>12.2f} {batch_seconds:>10.2f} {n / batch_seconds:>13,.0f} "
+                  f"{legacy_seconds / batch_seconds:>7.1f}x  {match}")
+        else:
+            print(f"{n:>9} {'-':>12} {batch_seconds:>10.2f} {n / batch_seconds:>13,.0f} {'-':>8}  -")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark coordinate -> metro resolution: grid-index assign_places vs a brute-force nearest-place scan
+Points are scattered around the gazetteer places (plus some far from any metro) so both hits and misses are timed
+Checks that both give the same place for every point
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from transform.geo import assign_places, load_places, haversine_miles, grid_index, METRO_RADIUS_MILES
+
+def make_points(n, seed=42):
+    """n points: 80% within ~40 miles of a random place, 20% anywhere in the lower 48"""
+    rng = np.random.default_rng(seed)
+    places = load_places()
+    near = int(n * 0.8)
+    picks = rng.integers(0, len(places), near)
+    latitudes = np.concatenate([places['latitude'].to_numpy()[picks] + rng.normal(0, 0.3, near),
+                                rng.uniform(25, 49, n - near)])
+    longitudes = np.concatenate([places['longitude'].to_numpy()[picks] + rng.normal(0, 0.3, near),
+                                 rng.uniform(-124, -67, n - near)])
+    return latitudes, longitudes
+
+def brute_force(latitudes, longitudes, radius_miles=METRO_RADIUS_MILES):
+    """Nearest place for every point by scanning every place (place indexes, -1 where none is in range)"""
+    places = load_places()
+    place_lat, place_lon = places['latitude'].to_numpy(), places['longitude'].to_numpy()
+    nearest = np.full(len(latitudes), -1)
+    for i, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+        distances = haversine_miles(latitude, longitude, place_lat, place_lon)
+        best = distances.argmin()
+        if distances[best] <= radius_miles:
+            nearest[i] = best
+    return nearest
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark grid-index metro resolution')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--check', type=int, default=5000, help='Points compared against the brute-force scan')
+    args = parser.parse_args()
+
+    places = load_places()
+    started = time.perf_counter()
+    cells = grid_index()
+    print(f"{len(places)} places, grid of {len(cells)} (cell, place) entries built in {time.perf_counter() - started:.2f}s\n")
+
+    latitudes, longitudes = make_points(args.check)
+    started = time.perf_counter()
+    expected = brute_force(latitudes, longitudes)
+    brute_seconds = time.perf_counter() - started
+    result = assign_places(latitudes, longitudes)
+    key = list(zip(places['city'], places['state_code']))
+    got = [key.index((city, state)) if city is not None else -1 for city, state in zip(result['city'], result['state_code'])]
+    mismatches = int((np.array(got) != expected).sum())
+    print(f"check: {args.check} points, {(expected >= 0).sum()} in a metro, {mismatches} mismatches vs brute force "
+          f"({args.check / brute_seconds:,.0f} points/s brute force)\n")
+
+    print(f"{'points':>9} {'grid (s)':>10} {'points/s':>12}")
+    for size in args.sizes:
+        latitudes, longitudes = make_points(size)
+        started = time.perf_counter()
+        assign_places(latitudes, longitudes)
+        elapsed = time.perf_counter() - started
+        print(f"{size:>9} {elapsed:>10.2f} {size / elapsed:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
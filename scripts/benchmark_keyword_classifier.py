@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for the compiled keyword matcher
+
+The old three-function substring checks vs classify_texts (one regex pass
+per column), per text, on synthetic titles/descriptions. Accuracy cases
+live in tests/test_keywords.py.
+
+Usage:
+    python scripts/benchmark_keyword_classifier.py
+    python scripts/benchmark_keyword_classifier.py --texts 200000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transform.keywords import classify_texts
+from synthetic_jobs import TITLES, SENTENCES
+
+def legacy_labels(title, description):
+    """The substring checks match_labels replaced (check_title_keywords, get_is_remote, get_job_type)"""
+    role = title.lower()
+    if any(tag in role for tag in ('sr', 'senior', 'iv', 'lead', 'principal', 'director', 'head', 'vp', 'executive', 'president')):
+        seniority = 'sr'
+    elif any(tag in role for tag in ('ii', 'experienced', 'manager', 'iii')):
+        seniority = 'mid'
+    else:
+        seniority = 'jr'
+    txt = " ".join([title or "", description or ""]).lower()
+    is_remote = any(kw in txt for kw in ['remote', 'work from home', 'wfh'])
+    if 'intern' in title.lower() or 'internship' in title.lower():
+        job_type = 'intern'
+    elif 'part time' in description.lower():
+        job_type = 'part-time'
+    elif 'full time' in description.lower():
+        job_type = 'full-time'
+    elif 'contract' in description.lower():
+        job_type = 'contract'
+    else:
+        job_type = 'full-time'
+    return {'seniority': seniority, 'is_remote': is_remote, 'job_type': job_type}
+
+def benchmark(n):
+    rng = random.Random(7)
+    titles = [rng.choice(TITLES) for _ in range(n)]
+    descriptions = [" ".join(rng.sample(SENTENCES, 4)) for _ in range(n)]
+
+    started = time.perf_counter()
+    for title, description in zip(titles, descriptions):
+        legacy_labels(title, description)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    classify_texts(titles, descriptions)
+    compiled_seconds = time.perf_counter() - started
+
+    print(f"{n:,} texts: substring checks {legacy_seconds:.2f}s ({n / legacy_seconds:,.0f}/s), "
+          f"compiled matcher {compiled_seconds:.2f}s ({n / compiled_seconds:,.0f}/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword matcher speed")
+    parser.add_argument('--texts', type=int, default=100000)
+    args = parser.parse_args()
+
+    benchmark(args.texts)
+
+if __name__ == "__main__":
+    main()
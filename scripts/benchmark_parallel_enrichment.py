@@ -0,0 +1,55 @@
+"""
+Scaling benchmark for process-pool enrichment
+
+Splits synthetic bronze.raw_jobs rows into chunks and enriches them with
+transform.parallel.map_chunks at increasing worker counts, printing
+throughput, speedup over one worker and parallel efficiency. This is the
+CPU side of run_parallel_enrichment (no database needed); chunks are sent
+to workers as DataFrames, which stands in for each worker's own read.
+
+Usage:
+    python scripts/benchmark_parallel_enrichment.py
+    python scripts/benchmark_parallel_enrichment.py --rows 400000 --chunk-size 5000 --workers 1 2 4 8 16
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transform.enrich_batch import enrich_adzuna_batch
+from transform.parallel import map_chunks
+from benchmark_enrichment import make_raw_rows
+
+def enrich_chunk(df_raw):
+    return len(enrich_adzuna_batch(df_raw))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process-pool enrichment scaling")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    df_raw = make_raw_rows(args.rows)
+    chunks = [(df_raw.iloc[start:start + args.chunk_size],) for start in range(0, len(df_raw), args.chunk_size)]
+    print(f"{args.rows:,} rows in {len(chunks)} chunks of {args.chunk_size}, {os.cpu_count()} CPUs\n")
+
+    print(f"{'workers':>7} {'seconds':>8} {'rows/s':>10} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for workers in args.workers:
+        started = time.perf_counter()
+        rows = 0
+        for chunk, result, error in map_chunks(enrich_chunk, chunks, workers):
+            if error is not None:
+                raise error
+            rows += result
+        seconds = time.perf_counter() - started
+        baseline = baseline or seconds
+        speedup = baseline / seconds
+        print(f"{workers:>7} {seconds:>8.2f} {rows / seconds:>10,.0f} {speedup:>7.1f}x {speedup / workers:>9.0%}")
+
+if __name__ == "__main__":
+    main()
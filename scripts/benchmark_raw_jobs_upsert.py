@@ -0,0 +1,113 @@
+"""
+Benchmark per-job vs set-based upserts into bronze.raw_jobs
+
+Times the per-job path upsert_raw_jobs_bulk replaced (SELECT + UPDATE/INSERT
+per job, kept here as per_job_upsert) against upsert_raw_jobs_bulk (COPY into a temp table + one INSERT ... ON CONFLICT)
+on synthetic payloads, for both the insert path (day 1) and the
+"seen again on a new day" update path (day 2).
+
+Rows are written with job ids prefixed 'bench-' and deleted afterwards.
+
+Usage:
+    python scripts/benchmark_raw_jobs_upsert.py
+    python scripts/benchmark_raw_jobs_upsert.py --sizes 1000 10000 100000 --legacy-max 10000
+"""
+import sys
+import os
+import time
+import json
+import argparse
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import get_engine
+from sqlalchemy import text
+from ingest.ingest_adzuna_v2 import upsert_raw_jobs_bulk
+from synthetic_jobs import make_adzuna_jobs
+
+BENCH_PREFIX = 'bench-'
+
+def cleanup():
+    """Delete benchmark rows from bronze.raw_jobs"""
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM bronze.raw_jobs WHERE source = 'adzuna' AND job_id LIKE :prefix"),
+                     {'prefix': f'{BENCH_PREFIX}%'})
+
+def per_job_upsert(jobs, run_date):
+    """The per-job path upsert_raw_jobs_bulk replaced: one SELECT, then an UPDATE or INSERT, per job"""
+    new_jobs = 0
+    with get_engine().begin() as conn:
+        seen_today = set(conn.execute(text("""
+            SELECT job_id FROM bronze.raw_jobs WHERE source = 'adzuna' AND last_seen = :run_date
+        """), {'run_date': run_date}).scalars())
+        for job in jobs:
+            job_id = str(job['id'])
+            if job_id in seen_today:
+                continue
+            existing = conn.execute(text("""
+                SELECT last_seen FROM bronze.raw_jobs WHERE source = 'adzuna' AND job_id = :job_id
+            """), {'job_id': job_id}).fetchone()
+            params = {'job_id': job_id, 'run_date': run_date, 'payload': json.dumps(job)}
+            if existing is None:
+                conn.execute(text("""
+                    INSERT INTO bronze.raw_jobs (job_id, source, first_seen, last_seen, times_seen, payload, payload_hash)
+                    VALUES (:job_id, 'adzuna', :run_date, :run_date, 1, :payload, md5(CAST(:payload AS jsonb)::text))
+                """), params)
+            elif existing.last_seen < run_date:
+                conn.execute(text("""
+                    UPDATE bronze.raw_jobs
+                    SET last_seen = :run_date, times_seen = times_seen + 1, payload = :payload,
+                        payload_hash = md5(CAST(:payload AS jsonb)::text), updated_at = CURRENT_TIMESTAMP
+                    WHERE source = 'adzuna' AND job_id = :job_id
+                """), params)
+            else:
+                continue
+            new_jobs += 1
+    return new_jobs
+
+def time_path(upsert_fn, jobs, run_date):
+    """Run one upsert and return (seconds, new job count)"""
+    started = time.perf_counter()
+    count = upsert_fn(jobs, run_date)
+    return time.perf_counter() - started, count
+
+def run_benchmark(sizes, legacy_max):
+    day1 = date.today() - timedelta(days=2)
+    day2 = day1 + timedelta(days=1)
+    results = []
+
+    for size in sizes:
+        jobs = make_adzuna_jobs(size, prefix=BENCH_PREFIX)
+        paths = [('bulk', upsert_raw_jobs_bulk)]
+        if size <= legacy_max:
+            paths.insert(0, ('per-job', per_job_upsert))
+
+        for name, upsert_fn in paths:
+            cleanup()
+            insert_s, insert_count = time_path(upsert_fn, jobs, day1)
+            update_s, update_count = time_path(upsert_fn, jobs, day2)
+            results.append((size, name, insert_s, insert_count, update_s, update_count))
+            print(f"  {size:>7} jobs  {name:<8} insert {insert_s:8.2f}s  update {update_s:8.2f}s")
+
+    cleanup()
+
+    print("\n📊 RESULTS")
+    print(f"{'Jobs':>8} {'Path':<8} {'Insert s':>9} {'Insert/s':>10} {'Update s':>9} {'Update/s':>10} {'New':>8}")
+    print("-" * 70)
+    for size, name, insert_s, insert_count, update_s, update_count in results:
+        print(f"{size:>8} {name:<8} {insert_s:>9.2f} {size / insert_s:>10.0f} "
+              f"{update_s:>9.2f} {size / update_s:>10.0f} {insert_count:>8}")
+        # both paths must agree on the count record_api_call_if_new_jobs uses
+        if insert_count != size or update_count != size:
+            print(f"  ⚠️  unexpected new-job counts: insert={insert_count}, update={update_count}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bronze.raw_jobs upsert paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=100000,
+                        help='Skip the per-job path above this many jobs (it needs ~2 round trips per job)')
+    args = parser.parse_args()
+
+    print("🔄 Benchmarking bronze.raw_jobs upserts...")
+    run_benchmark(args.sizes, args.legacy_max)
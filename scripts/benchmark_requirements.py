@@ -0,0 +1,68 @@
+"""
+Throughput of years-of-experience / education extraction
+
+Runs extract_yoe + extract_education per description (the per-row
+enrichment path) against extract_requirements over the whole column on
+synthetic descriptions and checks both give the same yoe_min / education
+(accuracy cases live in tests/test_requirements.py). No database needed.
+
+Usage:
+    python scripts/benchmark_requirements.py
+    python scripts/benchmark_requirements.py --texts 100000 250000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from transform.requirements import extract_yoe, extract_education, extract_requirements
+from synthetic_jobs import SENTENCES
+
+EXTRA_SENTENCES = [
+    "3-5 years experience; BS required, MS preferred.",
+    "Master's or PhD preferred, seven to ten years of analytics work.",
+    "Must be 18 years of age. Proficient in MS Excel.",
+    "For over 30 years, our firm has served the region. 10+ yrs of SQL.",
+    "This is a 2 year contract. High school diploma or GED required.",
+    "BA/BS in Statistics, Economics or a related field.",
+]
+
+def make_descriptions(n, seed=7):
+    rng = random.Random(seed)
+    sentences = SENTENCES + EXTRA_SENTENCES
+    return [" ".join(rng.sample(sentences, 4)) + f" Req {i}." for i in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YOE/education extraction")
+    parser.add_argument('--texts', type=int, nargs='+', default=[100000])
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'texts':>9} {'per-row (s)':>12} {'batch (s)':>10} {'batch texts/s':>14}  output")
+    for n in args.texts:
+        descriptions = make_descriptions(n)
+
+        started = time.perf_counter()
+        per_row = pd.DataFrame({
+            'yoe_min': [extract_yoe(description) for description in descriptions],
+            'education': [extract_education(description) for description in descriptions],
+        }, dtype=object)
+        per_row_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = extract_requirements(descriptions)
+        batch_seconds = time.perf_counter() - started
+
+        match = "identical" if per_row.to_dict('records') == batch.to_dict('records') else "MISMATCH"
+        ok = ok and match == "identical"
+        print(f"{n:>9} {per_row_seconds:>12.2f} {batch_seconds:>10.2f} {n / batch_seconds:>14,.0f}  {match}")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
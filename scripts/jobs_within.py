@@ -0,0 +1,35 @@
+"""
+List jobs in silver.jobs_v2 within N miles of a place or a point
+
+Usage:
+    python scripts/jobs_within.py "Detroit, MI"                    # 25 miles, active jobs
+    python scripts/jobs_within.py "Ann Arbor, MI" --miles 10 --all
+    python scripts/jobs_within.py --lat 42.28 --lon -83.74 --miles 15
+"""
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.geo import jobs_within
+
+def main():
+    parser = argparse.ArgumentParser(description="Jobs within N miles of a place")
+    parser.add_argument('place', nargs='?', help='"City, ST" from data/geo/places.csv')
+    parser.add_argument('--lat', type=float, help='Latitude (instead of a place)')
+    parser.add_argument('--lon', type=float, help='Longitude (instead of a place)')
+    parser.add_argument('--miles', type=float, default=25)
+    parser.add_argument('--all', action='store_true', help='Include inactive jobs')
+    parser.add_argument('--limit', type=int, default=20, help='Rows to print')
+    args = parser.parse_args()
+    if args.place is None and (args.lat is None or args.lon is None):
+        parser.error('give a place or both --lat and --lon')
+
+    jobs = jobs_within(args.place, args.miles, latitude=args.lat, longitude=args.lon, active_only=not args.all)
+    print(f"📍 {len(jobs)} jobs within {args.miles:g} miles of {args.place or (args.lat, args.lon)}")
+    if not jobs.empty:
+        print(jobs[['distance_miles', 'title', 'company', 'city', 'state_code']].head(args.limit).round(1).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+End-to-end ingest load test against the local mock API
+
+Starts scripts/mock_job_api.py in-process, points the Adzuna fetcher at it,
+then runs the real pipeline (ingest_all_jobs -> enrich_all_jobs) over a
+synthetic grid of (city, role) pairs far larger than the production grid.
+Reports requests/s, jobs/s and DB pool stats for each simulated day.
+
+Writes to the configured database. All rows use 'mock-' job ids and
+'Mock City' cities and are deleted afterwards unless --keep is passed.
+
+Usage:
+    python scripts/load_test_ingest.py --cities 50 --roles 20 --concurrency 16 --requests-per-second 50
+    python scripts/load_test_ingest.py --days 3 --throttle-rate 0.05 --error-rate 0.01
+
+Simulated days churn the mock's jobs but run_date is still today, so every
+day is a full ingest (incremental runs skip pairs already ingested today).
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_job_api import start_server, add_config_arguments, config_from_args
+
+ROLES = [
+    "data analyst", "data scientist", "business analyst", "data engineer", "ml engineer",
+    "quantitative analyst", "analytics engineer", "bi developer", "statistician", "research analyst",
+]
+
+def make_grid(n_cities, n_roles):
+    """Synthetic (cities, roles) - roles beyond the built-in list get a numeric suffix"""
+    cities = [f"Mock City {i:04d}, ZZ" for i in range(n_cities)]
+    roles = [ROLES[i % len(ROLES)] + (f" {i // len(ROLES)}" if i >= len(ROLES) else "") for i in range(n_roles)]
+    return cities, roles
+
+def cleanup():
+    """Delete every row the load test wrote"""
+    from database.db import get_engine, text
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM silver.jobs_v2 WHERE job_id LIKE 'mock-%'"))
+        conn.execute(text("DELETE FROM bronze.pair_jobs WHERE job_id LIKE 'mock-%'"))
+        conn.execute(text("DELETE FROM bronze.raw_jobs WHERE job_id LIKE 'mock-%'"))
+        conn.execute(text("DELETE FROM bronze.job_calls WHERE city LIKE 'Mock City %'"))
+    print("🧹 Removed load-test rows")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest load test against the mock job API")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cities', type=int, default=20, help='Synthetic cities in the grid')
+    parser.add_argument('--roles', type=int, default=10, help='Roles per city')
+    parser.add_argument('--concurrency', type=int, default=8, help='(city, role) pairs ingested at once')
+    parser.add_argument('--requests-per-second', type=float, default=50, help='Client-side rate limit')
+    parser.add_argument('--days', type=int, default=1, help='Simulated days to ingest (jobs churn between days)')
+    parser.add_argument('--skip-enrich', action='store_true', help='Only time the ingest stage')
+    parser.add_argument('--archive', action='store_true', help='Also archive raw responses (off by default)')
+    parser.add_argument('--keep', action='store_true', help='Keep load-test rows in the database')
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    # the fetchers read these at import time
+    os.environ["ADZUNA_BASE_URL"] = f"http://127.0.0.1:{args.port}/adzuna"
+    os.environ["JSEARCH_BASE_URL"] = f"http://127.0.0.1:{args.port}/jsearch"
+    if not args.archive:
+        os.environ["RAW_ARCHIVE_ENABLED"] = "false"
+
+    from main import ingest_all_jobs, enrich_all_jobs
+    from ingest.ingest_adzuna_v2 import ADZUNA_RATE_LIMITER
+
+    config = config_from_args(args)
+    server = start_server(config, port=args.port)
+    ADZUNA_RATE_LIMITER.set_rate(args.requests_per_second)
+
+    cities, roles = make_grid(args.cities, args.roles)
+    print(f"🧪 Load test: {len(cities) * len(roles)} pairs, concurrency {args.concurrency}, "
+          f"{args.requests_per_second} req/s, {args.days} day(s)")
+
+    try:
+        for day in range(args.days):
+            config.day = day
+            print(f"\n=== Day {day} ===")
+
+            result = ingest_all_jobs(cities, roles, concurrency=args.concurrency)
+            print(f"Ingest: {result['new_jobs']} new jobs in {result['elapsed_seconds']:.1f}s "
+                  f"({result['new_jobs'] / result['elapsed_seconds'] if result['elapsed_seconds'] else 0:.0f} jobs/s), "
+                  f"{len(result['failed_pairs'])} failed pairs, mock served {config.requests} requests")
+
+            if not args.skip_enrich:
+                started = time.monotonic()
+                enrich_all_jobs(cities[:3], roles[:3])
+                print(f"Enrich: {time.monotonic() - started:.1f}s")
+    finally:
+        server.shutdown()
+        if not args.keep:
+            cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Local stand-in for the Adzuna and JSearch search APIs
+
+Serves synthetic but schema-faithful payloads so ingest throughput, retries
+and rate limiting can be load-tested without spending real API quota.
+
+Endpoints:
+    GET /adzuna/{page}?what=&where=&results_per_page=&sort_by=&max_days_old=
+    GET /jsearch/search?query=&page=
+    GET /_admin/day            current simulated day
+    POST /_admin/advance-day   move to the next day (job churn)
+
+Point the ingest modules at it with:
+    ADZUNA_BASE_URL=http://localhost:8765/adzuna
+    JSEARCH_BASE_URL=http://localhost:8765/jsearch
+
+Each (city, role) pair has `count` active jobs. Every simulated day the
+oldest `churn` fraction of them expire and the same number of new jobs are
+posted, so repeated ingests see realistic new/expired jobs. Job ids are
+prefixed 'mock-' so load-test rows are easy to find and delete.
+
+Usage:
+    python scripts/mock_job_api.py --port 8765 --latency-ms 80 --error-rate 0.02 --throttle-rate 0.05
+"""
+import sys
+import os
+import json
+import time
+import random
+import zlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_jobs import make_adzuna_job, make_jsearch_job, CITIES
+
+class MockConfig:
+    """Knobs for the simulated API (shared by every request thread)"""
+
+    def __init__(self, latency_ms=50, jitter_ms=25, count=500, count_spread=0.5, max_page_size=50,
+                 jsearch_page_size=10, error_rate=0.0, throttle_rate=0.0, retry_after=1, churn=0.1, seed=7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.count = count
+        self.count_spread = count_spread
+        self.max_page_size = max_page_size
+        self.jsearch_page_size = jsearch_page_size
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.churn = churn
+        self.seed = seed
+        self.day = 0
+        self.start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+def pair_key(city, role):
+    """Stable numeric key for a (city, role) pair"""
+    return zlib.crc32(f"{city.lower()}|{role.lower()}".encode("utf-8"))
+
+def pair_count(config, key):
+    """Active jobs for a pair - varies per pair around config.count"""
+    spread = int(config.count * config.count_spread)
+    return max(0, config.count + (key % (2 * spread + 1)) - spread if spread else config.count)
+
+def active_jobs(config, city, role, max_days_old=None):
+    """
+    Job sequence numbers active today, newest first
+    Jobs are numbered in posting order; each day `churn * count` new ones are posted
+    """
+    key = pair_key(city, role)
+    count = pair_count(config, key)
+    per_day = max(1, int(count * config.churn))
+    newest = count + config.day * per_day
+    oldest = newest - count
+    if max_days_old:
+        oldest = max(oldest, newest - per_day * int(max_days_old))
+    return key, per_day, range(newest - 1, oldest - 1, -1)
+
+def job_created(config, seq, per_day, count):
+    """Posting time of job `seq`: jobs 0..count-1 were posted over the days before day 0"""
+    days_ago = (count - seq) / per_day
+    return config.start - timedelta(days=days_ago)
+
+def pick_location(city):
+    """Use a known metro when the search city matches one, otherwise make one up from the name"""
+    name = city.split(',')[0].strip().lower()
+    for location in CITIES:
+        if location[2].lower() == name:
+            return location
+    rng = random.Random(zlib.crc32(city.encode("utf-8")))
+    return ("Illinois", f"{city.split(',')[0]} County", city.split(',')[0], rng.uniform(30, 47), rng.uniform(-122, -75))
+
+class MockHandler(BaseHTTPRequestHandler):
+    config = None
+
+    def log_message(self, format, *args):
+        pass  # keep load tests quiet
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _simulate_network(self):
+        """Latency plus injected 429/5xx; returns True if the request was answered with an error"""
+        config = self.config
+        with config.lock:
+            config.requests += 1
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        roll = random.random()
+        if roll < config.throttle_rate:
+            self._send_json(429, {"error": "Too Many Requests"}, {"Retry-After": str(config.retry_after)})
+            return True
+        if roll < config.throttle_rate + config.error_rate:
+            self._send_json(random.choice([500, 502, 503]), {"error": "Server Error"})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+
+        if parts == ['_admin', 'day']:
+            return self._send_json(200, {"day": self.config.day, "requests": self.config.requests})
+        if self._simulate_network():
+            return
+        if len(parts) == 2 and parts[0] == 'adzuna' and parts[1].isdigit():
+            return self._adzuna(int(parts[1]), params)
+        if parts == ['jsearch', 'search']:
+            return self._jsearch(params)
+        self._send_json(404, {"error": "Not Found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') == '/_admin/advance-day':
+            with self.config.lock:
+                self.config.day += 1
+            return self._send_json(200, {"day": self.config.day})
+        self._send_json(404, {"error": "Not Found"})
+
+    def _adzuna(self, page, params):
+        config = self.config
+        city, role = params.get('where', ''), params.get('what', '')
+        per_page = min(int(params.get('results_per_page', 10)), config.max_page_size)
+        key, per_day, seqs = active_jobs(config, city, role, params.get('max_days_old'))
+        count = pair_count(config, key)
+        location = pick_location(city)
+
+        # sort_by=date is newest first; the default "relevance" order is a stable shuffle
+        seqs = list(seqs)
+        if params.get('sort_by') != 'date':
+            random.Random(key + config.day).shuffle(seqs)
+
+        results = []
+        for seq in seqs[(page - 1) * per_page: page * per_page]:
+            rng = random.Random(key * 1_000_003 + seq)
+            results.append(make_adzuna_job(f"mock-{key}-{seq}", rng, job_created(config, seq, per_day, count), location))
+
+        salaries = [(job['salary_min'] + job['salary_max']) / 2 for job in results]
+        self._send_json(200, {
+            "__CLASS__": "Adzuna::API::Response::JobSearchResults",
+            "count": len(seqs),
+            "mean": sum(salaries) / len(salaries) if salaries else None,
+            "results": results,
+        })
+
+    def _jsearch(self, params):
+        config = self.config
+        query = params.get('query', '')
+        role, _, city = query.partition(' jobs in ')
+        page = int(params.get('page', 1))
+        key, per_day, seqs = active_jobs(config, city, role)
+        count = pair_count(config, key)
+        location = pick_location(city)
+
+        data = []
+        for seq in list(seqs)[(page - 1) * config.jsearch_page_size: page * config.jsearch_page_size]:
+            rng = random.Random(key * 1_000_033 + seq)
+            data.append(make_jsearch_job(f"mock-js-{key}-{seq}", rng, job_created(config, seq, per_day, count), location))
+
+        self._send_json(200, {"status": "OK", "parameters": params, "data": data})
+
+def start_server(config, host="127.0.0.1", port=8765):
+    """Start the mock API in a background thread; returns the server (call .shutdown() to stop)"""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-job-api", daemon=True).start()
+    return server
+
+def add_config_arguments(parser):
+    """CLI flags shared with the load-test harness"""
+    parser.add_argument('--latency-ms', type=float, default=50, help='Mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=25, help='Latency standard deviation')
+    parser.add_argument('--count', type=int, default=500, help='Average active jobs per (city, role) pair')
+    parser.add_argument('--max-page-size', type=int, default=50, help='Cap on results_per_page')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 5xx')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--churn', type=float, default=0.1, help='Fraction of jobs replaced per simulated day')
+
+def config_from_args(args):
+    return MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, count=args.count,
+                      max_page_size=args.max_page_size, error_rate=args.error_rate,
+                      throttle_rate=args.throttle_rate, retry_after=args.retry_after, churn=args.churn)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Adzuna/JSearch API for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(config_from_args(args), args.host, args.port)
+    print(f"🧪 Mock job API on http://{args.host}:{args.port}  (Ctrl+C to stop)")
+    print(f"   ADZUNA_BASE_URL=http://{args.host}:{args.port}/adzuna")
+    print(f"   JSEARCH_BASE_URL=http://{args.host}:{args.port}/jsearch")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,97 @@
+"""
+Synthetic Adzuna and JSearch job payloads for benchmarks and the mock API
+Payloads have the same shape as real search results so every
+ingest/enrichment code path can run on them unchanged
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+CITIES = [
+    ("Illinois", "Cook County", "Chicago", 41.8781, -87.6298),
+    ("Michigan", "Wayne County", "Detroit", 42.3314, -83.0458),
+    ("New York", "New York County", "New York City", 40.7128, -74.0060),
+    ("Texas", "Travis County", "Austin", 30.2672, -97.7431),
+    ("Washington", "King County", "Seattle", 47.6062, -122.3321),
+]
+TITLES = [
+    "Data Analyst", "Senior Data Analyst", "Data Analyst II", "Business Analyst",
+    "Data Scientist", "Sr. Data Scientist", "Lead Data Engineer", "Junior Data Analyst",
+    "Data Analyst Intern", "Associate Director, Analytics",
+]
+COMPANIES = ["Acme Corp", "Globex LLC", "Initech Inc.", "Umbrella Health", "Stark Industries"]
+CATEGORIES = [("it-jobs", "IT Jobs"), ("consultancy-jobs", "Consultancy Jobs"), ("healthcare-nursing-jobs", "Healthcare & Nursing Jobs")]
+SENTENCES = [
+    "You will partner with business units to answer critical questions.",
+    "Requires 3+ years of experience with SQL and Python.",
+    "Bachelor's degree in a quantitative field or equivalent experience.",
+    "This is a full time position with hybrid or remote options.",
+    "Our company has over 20 years in business serving our customers.",
+    "Minimum of 5 years building dashboards in Tableau or Power BI.",
+    "Contract role, 6 months with possibility of extension.",
+]
+
+
+def make_adzuna_job(job_id, rng=random, created=None, location=None):
+    """
+    Build one Adzuna-shaped job payload
+    location: optional (state, county, city, lat, lon), random from CITIES otherwise
+    """
+    state, county, city, lat, lon = location or rng.choice(CITIES)
+    category_tag, category_label = rng.choice(CATEGORIES)
+    salary_min = rng.randrange(50000, 140000, 1000)
+    created = created or datetime.now(timezone.utc) - timedelta(days=rng.randrange(0, 30))
+    return {
+        "__CLASS__": "Adzuna::API::Response::Job",
+        "id": str(job_id),
+        "title": rng.choice(TITLES),
+        "description": " ".join(rng.sample(SENTENCES, 3)),
+        "company": {"__CLASS__": "Adzuna::API::Response::Company", "display_name": rng.choice(COMPANIES)},
+        "location": {
+            "__CLASS__": "Adzuna::API::Response::Location",
+            "display_name": f"{city}, {county}",
+            "area": ["US", state, county, city],
+        },
+        "latitude": lat + rng.uniform(-0.2, 0.2),
+        "longitude": lon + rng.uniform(-0.2, 0.2),
+        "category": {"__CLASS__": "Adzuna::API::Response::Category", "tag": category_tag, "label": category_label},
+        "salary_min": salary_min,
+        "salary_max": salary_min + rng.randrange(0, 40000, 1000),
+        "salary_is_predicted": "0",
+        "created": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "redirect_url": f"https://www.adzuna.com/details/{job_id}",
+        "contract_time": "full_time",
+    }
+
+
+def make_adzuna_jobs(n, prefix="bench-", seed=42):
+    """Build `n` payloads with ids `{prefix}0 .. {prefix}{n-1}`"""
+    rng = random.Random(seed)
+    return [make_adzuna_job(f"{prefix}{i}", rng) for i in range(n)]
+
+
+def make_jsearch_job(job_id, rng=random, created=None, location=None):
+    """Build one JSearch-shaped job payload"""
+    state, county, city, lat, lon = location or rng.choice(CITIES)
+    salary_min = rng.randrange(50000, 140000, 1000)
+    created = created or datetime.now(timezone.utc) - timedelta(days=rng.randrange(0, 30))
+    return {
+        "job_id": str(job_id),
+        "employer_name": rng.choice(COMPANIES),
+        "employer_company_type": rng.choice(["Information", "Finance", "Health Care", None]),
+        "job_publisher": "LinkedIn",
+        "job_employment_type": rng.choice(["Full-time", "Full-time", "Contract", "Part-time"]),
+        "job_title": rng.choice(TITLES),
+        "job_apply_link": f"https://example.com/jobs/{job_id}",
+        "job_description": " ".join(rng.sample(SENTENCES, 3)),
+        "job_is_remote": rng.random() < 0.2,
+        "job_posted_at_datetime_utc": created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "job_city": city,
+        "job_state": state,
+        "job_country": "US",
+        "job_location": f"{city}, {state}",
+        "job_latitude": lat + rng.uniform(-0.2, 0.2),
+        "job_longitude": lon + rng.uniform(-0.2, 0.2),
+        "job_min_salary": salary_min,
+        "job_max_salary": salary_min + rng.randrange(0, 40000, 1000),
+        "job_salary_period": "YEAR",
+    }
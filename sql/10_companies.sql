@@ -0,0 +1,57 @@
+-- Company entities: a stable company_id per employer and per-company gold aggregates
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- 1) One row per resolved employer (transform/companies.py)
+create table if not exists silver.companies (
+    company_id      serial primary key,
+    name            text not null,                    -- First spelling seen ("JPMorgan Chase & Co.")
+    name_key        text not null,                    -- Normalized name the entity was founded on
+    created_at      timestamptz default current_timestamp
+);
+
+-- 2) Normalized company name -> entity; a name is resolved once, ever
+create table if not exists silver.company_aliases (
+    name_key        text primary key,                 -- normalize_company() of a raw name ("jpmorgan chase")
+    block           text not null,                    -- Blocking key: candidates are only scored within a block
+    company_id      int not null references silver.companies(company_id),
+    similarity      numeric not null default 1,       -- Score against the alias it matched (1: founded the entity)
+    created_at      timestamptz default current_timestamp
+);
+
+create index if not exists idx_company_aliases_block on silver.company_aliases(block);
+create index if not exists idx_company_aliases_company on silver.company_aliases(company_id);
+
+-- 3) Jobs carry their entity; the stage only reads jobs updated since its watermark
+alter table silver.jobs_v2 add column if not exists company_id int;
+create index if not exists idx_jobs_v2_company_id on silver.jobs_v2(company_id);
+create index if not exists idx_jobs_v2_updated_at on silver.jobs_v2(updated_at);
+create index if not exists idx_jobs_v2_first_seen on silver.jobs_v2(first_seen);   -- new_jobs_7d/30d recount
+
+-- 4) Incremental stages: silver.jobs_v2.updated_at up to which a stage has processed
+create table if not exists silver.stage_watermarks (
+    stage           text primary key,                 -- "companies", ...
+    watermark       timestamptz not null,
+    updated_at      timestamptz default current_timestamp
+);
+
+-- 5) Per-company aggregates, rewritten only for companies whose jobs changed
+create table if not exists gold.companies (
+    company_id      int primary key,
+    name            text,                             -- Most common spelling among its jobs
+    spellings       int,                              -- Distinct raw names resolved to this company
+    total_jobs      int,
+    active_jobs     int,
+    salary_min      numeric,                          -- Salary range over active jobs
+    salary_max      numeric,
+    avg_salary      numeric,                          -- Mean salary midpoint over active jobs
+    cities          text[],                           -- "City, ST" of active jobs
+    city_count      int,
+    new_jobs_7d     int,                              -- Hiring velocity: jobs first seen in the last 7/30 days
+    new_jobs_30d    int,
+    first_seen      date,
+    last_seen       date,
+    updated_at      timestamptz default current_timestamp
+);
+
+create index if not exists idx_companies_active_jobs on gold.companies(active_jobs desc);
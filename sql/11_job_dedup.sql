@@ -0,0 +1,30 @@
+-- Near-duplicate jobs: MinHash signatures, LSH buckets and job clusters
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- 1) One MinHash signature per job (transform/dedup.py), recomputed only when its text changes
+create table if not exists silver.job_minhash (
+    source          text not null,
+    job_id          text not null,
+    text_hash       text not null,                    -- md5 of title|company|description|city|state_code|cbsa_code
+    signature       bytea not null,                   -- NUM_PERM little-endian uint32 minimums
+    updated_at      timestamptz default current_timestamp,
+    primary key (source, job_id)
+);
+
+-- 2) LSH index: one row per (band, bucket) a job hashes to; candidates are jobs sharing any bucket
+create table if not exists silver.job_lsh_buckets (
+    band            smallint not null,
+    bucket          bigint not null,                  -- Hash of the job's place and the band's slice of the signature
+    source          text not null,
+    job_id          text not null,
+    primary key (band, bucket, source, job_id)
+);
+
+create index if not exists idx_job_lsh_buckets_job on silver.job_lsh_buckets(source, job_id);
+
+-- 3) Jobs carry their cluster; all but one canonical member are duplicates
+create sequence if not exists silver.job_cluster_seq;
+alter table silver.jobs_v2 add column if not exists cluster_id bigint;
+alter table silver.jobs_v2 add column if not exists is_duplicate boolean not null default false;
+create index if not exists idx_jobs_v2_cluster on silver.jobs_v2(cluster_id);
@@ -0,0 +1,13 @@
+-- Registry versions recorded by the last stale-field pass
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- field -> DERIVED_FIELDS[field]['version'] when recompute_stale_fields last finished
+-- (transform/derived_fields.py). A field whose registry version differs from this (or has
+-- no row yet) is checked on every row; the others only on rows updated since the
+-- 'derived_fields' watermark in silver.stage_watermarks.
+create table if not exists silver.derived_field_versions (
+    field           text primary key,
+    version         int not null,
+    updated_at      timestamptz default current_timestamp
+);
@@ -0,0 +1,10 @@
+-- Bound how long incremental ingest carries a job forward
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- Latest run the API actually returned the job to this pair (last_seen also moves when the job
+-- is only carried forward). carry_forward_pair_jobs stops carrying a job CARRY_FORWARD_MAX_DAYS
+-- after this date (ingest/watermarks.py). Existing rows start from first_seen, the one date known
+-- to be a real return; the next run that returns them moves it up.
+alter table bronze.pair_jobs add column if not exists last_returned date;
+update bronze.pair_jobs set last_returned = first_seen where last_returned is null;
@@ -189,16 +189,5 @@ create table if not exists gold.latest_city_snapshot (
 create index if not exists idx_latest_snapshot_jobs on gold.latest_city_snapshot(active_jobs DESC);
 create index if not exists idx_latest_snapshot_salary on gold.latest_city_snapshot(avg_salary DESC);
 
--- View to help with city name standardization between jobs and housing data
-create or replace view gold.city_mapping as
-select distinct
-    j.city,
-    j.state,
-    j.state_code,
-    h.region_name,
-    h.cbsa_code
-from silver.jobs_v2 j
-left join silver.housing_metrics h 
-    on lower(j.city) = lower(h.region_name) 
-    and j.state_code = h.state_code
-where j.is_active = TRUE; 
\ No newline at end of file
+-- City name standardization between jobs and housing data: gold.city_mapping is a table,
+-- created by sql/8_city_mapping.sql and rebuilt by transform/geo.py refresh_city_mapping()
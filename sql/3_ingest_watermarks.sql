@@ -0,0 +1,22 @@
+-- Incremental ingest: per-(city, role) watermarks
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- 1) Watermark columns on bronze.job_calls
+alter table bronze.job_calls add column if not exists newest_created timestamptz;     -- Newest Adzuna `created` seen for the pair
+alter table bronze.job_calls add column if not exists fetch_mode text default 'full'; -- 'full' or 'incremental'
+
+-- 2) Job ids seen per (city, role) pair - lets the fetcher recognise pages of jobs we already hold
+create table if not exists bronze.pair_jobs (
+    source          text not null default 'adzuna',
+    city            text not null,                    -- City of the search ("Detroit, MI")
+    role            text not null,                    -- Search term used ("data analyst")
+    job_id          text not null,
+    created         timestamptz,                      -- Adzuna `created` (posting date)
+    first_seen      date not null,                    -- First run this pair returned the job
+    last_seen       date not null,                    -- Latest run this pair returned (or carried forward) the job
+    
+    primary key (source, city, role, job_id)
+);
+
+create index if not exists idx_pair_jobs_last_seen on bronze.pair_jobs(source, city, role, last_seen);
@@ -0,0 +1,17 @@
+-- Daily API call budget ledger for the refresh scheduler
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- One row per source per day: what the plan allowed, what it planned and what was actually spent
+create table if not exists bronze.api_budget (
+    run_date        date not null,                    -- The DAY of the run
+    source          text not null default 'adzuna',
+    calls_allowed   int not null,                     -- Daily call limit the plan was made under
+    calls_planned   int not null default 0,           -- Pages the scheduler allocated (summed over runs that day)
+    calls_spent     int not null default 0,           -- Requests actually made, retries included
+    pairs_planned   int not null default 0,           -- (city, role) pairs refreshed
+    pairs_skipped   int not null default 0,           -- (city, role) pairs left for a later day
+    updated_at      timestamptz default current_timestamp,
+
+    primary key (run_date, source)
+);
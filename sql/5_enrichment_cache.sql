@@ -0,0 +1,14 @@
+-- Enrichment cache: payload hash + enrichment version
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- 1) Content hash of each raw payload (md5 of the jsonb text, so key order doesn't matter)
+alter table bronze.raw_jobs add column if not exists payload_hash text;
+
+update bronze.raw_jobs
+set payload_hash = md5(payload::text)
+where payload_hash is null;
+
+-- 2) Which payload and which classifier version each silver row was enriched from
+alter table silver.jobs_v2 add column if not exists payload_hash text;         -- bronze.raw_jobs.payload_hash at enrichment time
+alter table silver.jobs_v2 add column if not exists enrichment_version int;    -- ENRICHMENT_VERSION at enrichment time (NULL: re-enrich)
@@ -0,0 +1,17 @@
+-- Resumable backfills of derived columns in silver.jobs_v2
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- One row per backfill: keyset position of the last committed chunk plus running totals
+create table if not exists silver.backfill_checkpoints (
+    name            text primary key,                 -- Backfill name ("seniority", "description", ...)
+    column_name     text not null,                    -- silver.jobs_v2 column being rewritten
+    last_source     text,                             -- (source, job_id) of the last row processed
+    last_job_id     text,
+    rows_scanned    int not null default 0,
+    rows_changed    int not null default 0,
+    histogram       jsonb not null default '{}',      -- "old → new" (or changed / no_change) -> count
+    started_at      timestamptz default current_timestamp,
+    updated_at      timestamptz default current_timestamp,
+    completed_at    timestamptz                       -- NULL while the backfill is unfinished
+);
@@ -0,0 +1,9 @@
+-- Per-field state of the derived columns in silver.jobs_v2
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- field -> "<version>:<md5 of its input values>" when the field was last computed
+-- (see DERIVED_FIELDS in transform/derived_fields.py); a missing or mismatched stamp
+-- means the field is stale. Existing rows start empty and are stamped by the first
+-- python main.py --recompute-fields run.
+alter table silver.jobs_v2 add column if not exists derived_state jsonb not null default '{}';
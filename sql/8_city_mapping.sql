@@ -0,0 +1,30 @@
+-- Materialized city -> CBSA -> Zillow mapping (replaces the gold.city_mapping view)
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- 1) The old view matched jobs to Zillow rows by name and rescanned both tables on every query
+do $$
+begin
+    if exists (select 1 from pg_views where schemaname = 'gold' and viewname = 'city_mapping') then
+        drop view gold.city_mapping;
+    end if;
+end $$;
+
+-- 2) Rebuilt by transform/geo.py refresh_city_mapping() from the offline CBSA gazetteer
+create table if not exists gold.city_mapping (
+    city            text not null,
+    state           text,
+    state_code      text not null,
+    county          text,
+    cbsa_code       text,                             -- NULL: outside the gazetteer
+    cbsa_title      text,                             -- "Detroit-Warren-Dearborn, MI"
+    region_id       int,                              -- Zillow RegionID of the same CBSA
+    region_name     text,                             -- Zillow RegionName ("Detroit, MI")
+    updated_at      timestamptz default current_timestamp,
+    primary key (city, state_code)
+);
+
+-- 3) Gold joins are equality joins on cbsa_code
+create index if not exists idx_city_mapping_cbsa on gold.city_mapping(cbsa_code);
+create index if not exists idx_jobs_v2_cbsa on silver.jobs_v2(cbsa_code);
+create index if not exists idx_housing_metrics_cbsa on silver.housing_metrics(cbsa_code, metric_type);
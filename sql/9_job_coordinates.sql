@@ -0,0 +1,7 @@
+-- Coordinate lookups on silver.jobs_v2 ("jobs within N miles of X")
+-- Date: 2026-10-17
+-- Safe to re-run (python main.py --migrate)
+
+-- transform/geo.py jobs_within() narrows with a lat/lon bounding box before the exact distance
+create index if not exists idx_jobs_v2_coordinates on silver.jobs_v2(latitude, longitude)
+    where latitude is not null and longitude is not null;
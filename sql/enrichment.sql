@@ -18,7 +18,7 @@
 --     AND LOWER(TRIM(jobs_clean.city)) = LOWER(TRIM(cbsa_lookup.primary_city));
 
 
--- Industry classification
+-- Industry classification (superseded by transform/industry.py, which resolves each distinct company once)
 -- UPDATE jobs_clean 
 -- SET industry = CASE
 --     WHEN company ~* '\b(google|microsoft|amazon|apple|meta|netflix|tesla|uber|airbnb)\b' THEN 'big_tech'
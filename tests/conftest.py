@@ -0,0 +1,11 @@
+"""
+Shared pytest setup
+
+The tests cover the pure functions (classifiers, hashing, planning); none of
+them need Postgres or network access. The repository root goes on sys.path
+the same way scripts/ does it, so `pytest` works from any directory.
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+"""
+transform/companies.py: Adzuna display names and JSearch employer names of one employer
+resolve to one company entity; different employers sharing a first word stay apart
+"""
+from transform.industry import normalize_company
+from transform.companies import cluster_names, block_key, name_similarity, PREFIX_SCORE
+
+def test_jsearch_name_joins_the_adzuna_entity():
+    # the Adzuna run already created the alias
+    adzuna_key = normalize_company("JPMORGAN CHASE BANK, N.A.")
+    candidates = {block_key(adzuna_key): [(adzuna_key, 5)]}
+    jsearch_keys = [normalize_company("JPMorgan Chase & Co."), normalize_company("JP Morgan Chase")]
+    resolved = cluster_names(jsearch_keys, candidates)
+    assert [company_id for _, company_id, _ in resolved] == [5, 5]
+
+def test_new_names_share_a_provisional_entity():
+    keys = list(dict.fromkeys(normalize_company(name) for name in ["Deloitte", "Deloitte Consulting LLP", "ACME CORP.", "Acme Corp"]))
+    resolved = {key: company_id for key, company_id, _ in cluster_names(keys, {})}
+    assert resolved[normalize_company("Deloitte")] == resolved[normalize_company("Deloitte Consulting LLP")] < 0
+    assert resolved[normalize_company("Acme Corp")] != resolved[normalize_company("Deloitte")]
+
+def test_generic_tail_only():
+    assert name_similarity("deloitte", "deloitte consulting") >= PREFIX_SCORE
+    assert name_similarity("united", "united airlines") < PREFIX_SCORE
+    resolved = cluster_names(["united", "united airlines"], {})
+    assert resolved[0][1] != resolved[1][1]
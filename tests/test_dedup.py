@@ -0,0 +1,130 @@
+"""
+transform/dedup.py: MinHash estimates, LSH banding by place, and an Adzuna posting
+clustering with its JSearch copy once both are enriched into silver.jobs_v2 rows
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+from transform.dedup import (shingles, minhash_signatures, band_buckets, place_key, link_pairs, similarity,
+                             assign_clusters, BANDS, NUM_PERM)
+from transform.enrich_batch import enrich_adzuna_batch
+from transform.enrich_jsearch import enrich_jsearch_batch
+
+DESCRIPTION = (
+    "Acme is hiring a Data Analyst to join the revenue analytics team in Chicago. You will partner with sales, "
+    "finance and product leaders to answer critical questions, build and maintain Tableau dashboards, write SQL "
+    "against our warehouse and present findings to executives every quarter. Requires 3+ years of experience "
+    "with SQL and Python and a bachelor's degree in a quantitative field. We offer hybrid work, a 401k match and "
+    "tuition reimbursement for continued education in statistics or computer science."
+)
+TODAY = date(2026, 10, 17)
+
+def adzuna_payload(job_id, city='Chicago', state='Illinois', county='Cook County', lat=41.88, lon=-87.63):
+    # Adzuna only returns the start of a description
+    return {
+        'id': job_id,
+        'title': 'Data Analyst',
+        'description': ' '.join(DESCRIPTION.split()[:60]) + '…',
+        'company': {'display_name': 'ACME CORP.'},
+        'location': {'display_name': f'{city}, {county}', 'area': ['US', state, county, city]},
+        'latitude': lat,
+        'longitude': lon,
+        'category': {'tag': 'it-jobs', 'label': 'IT Jobs'},
+        'salary_min': 70000,
+        'salary_max': 90000,
+        'created': '2026-10-15T08:00:00Z',
+        'redirect_url': f'https://www.adzuna.com/details/{job_id}',
+    }
+
+def jsearch_payload(job_id, city='Chicago', state='IL', lat=41.88, lon=-87.63):
+    return {
+        'job_id': job_id,
+        'job_title': 'Data Analyst',
+        'job_description': DESCRIPTION,
+        'employer_name': 'Acme Corp',
+        'employer_company_type': 'Information',
+        'job_employment_type': 'Full-time',
+        'job_city': city,
+        'job_state': state,
+        'job_location': f'{city}, {state}',
+        'job_latitude': lat,
+        'job_longitude': lon,
+        'job_min_salary': 70000,
+        'job_max_salary': 90000,
+        'job_posted_at_datetime_utc': '2026-10-15T08:00:00.000Z',
+        'job_apply_link': f'https://example.com/jobs/{job_id}',
+    }
+
+def bronze(rows):
+    return pd.DataFrame([{'job_id': job_id, 'payload': payload, 'first_seen': TODAY, 'last_seen': TODAY,
+                          'times_seen': 1} for job_id, payload in rows])
+
+def signatures_of(df):
+    return minhash_signatures([shingles(title, company, description) for title, company, description
+                               in zip(df['title'], df['company'], df['description'])])
+
+def buckets_of(df, signatures):
+    return band_buckets(signatures, [place_key(city, state_code, cbsa_code) for city, state_code, cbsa_code
+                                     in zip(df['city'], df['state_code'], df['cbsa_code'])])
+
+def test_minhash_estimates_jaccard():
+    words = [f"w{i}" for i in range(400)]
+    a = shingles(' '.join(words[:200]), '', '')
+    b = shingles(' '.join(words[100:300]), '', '')
+    true_jaccard = len(a & b) / len(a | b)
+    signatures = minhash_signatures([a, b, a])
+    assert signatures.shape == (3, NUM_PERM)
+    assert similarity(signatures[0], signatures[2]) == 1.0
+    assert abs(similarity(signatures[0], signatures[1]) - true_jaccard) < 0.15
+
+def test_empty_texts_never_link():
+    signatures = minhash_signatures([set(), set()])
+    assert link_pairs([(0, 1)], dict(enumerate(signatures)), threshold=0.5) == []
+
+def test_bands_share_buckets_only_within_a_place():
+    signatures = minhash_signatures([shingles('Data Analyst', 'Acme', DESCRIPTION)] * 2)
+    same = band_buckets(signatures, ['16980', '16980'])
+    apart = band_buckets(signatures, ['16980', '19820'])
+    assert same.shape == (2, BANDS)
+    assert (same[0] == same[1]).all()
+    assert not (apart[0] == apart[1]).any()
+
+def test_place_key_prefers_cbsa():
+    assert place_key('Chicago', 'IL', '16980') == '16980'
+    assert place_key(' Chicago ', 'il', None) == 'chicago|IL'
+    assert place_key('', '', '') == ''
+
+def test_adzuna_posting_and_its_jsearch_copy_cluster_together():
+    adzuna = enrich_adzuna_batch(bronze([('a1', adzuna_payload('a1'))]), today=TODAY)
+    jsearch = enrich_jsearch_batch(bronze([('j1', jsearch_payload('j1')),
+                                           ('j2', jsearch_payload('j2', 'Detroit', 'Michigan', 42.33, -83.05))]),
+                                   today=TODAY)
+    jobs = pd.concat([adzuna, jsearch], ignore_index=True)
+    assert list(jobs['source']) == ['adzuna', 'jsearch', 'jsearch']
+    assert jobs.loc[0, 'cbsa_code'] == jobs.loc[1, 'cbsa_code'] != jobs.loc[2, 'cbsa_code']
+
+    signatures = signatures_of(jobs)
+    buckets = buckets_of(jobs, signatures)
+    # the Chicago copy shares a band with the Adzuna posting; the Detroit repost shares none
+    assert (buckets[0] == buckets[1]).any()
+    assert not (buckets[0] == buckets[2]).any()
+
+    keys = list(zip(jobs['source'], jobs['job_id']))
+    pairs = [(keys[i], keys[j]) for i in range(len(keys)) for j in range(i + 1, len(keys))
+             if (buckets[i] == buckets[j]).any()]
+    links = link_pairs(pairs, dict(zip(keys, signatures)))
+    assert [(a, b) for a, b, _ in links] == [(('adzuna', 'a1'), ('jsearch', 'j1'))]
+
+    assignment, merges, singles = assign_clusters(keys, links, {})
+    assert assignment == {} and merges == {}
+    assert sorted(map(sorted, singles)) == [[('adzuna', 'a1'), ('jsearch', 'j1')], [('jsearch', 'j2')]]
+
+def test_new_copy_joins_the_existing_cluster():
+    a, b, c = ('adzuna', 'a1'), ('jsearch', 'j1'), ('jsearch', 'j9')
+    assignment, merges, singles = assign_clusters([c], [(c, a, 0.9), (c, b, 0.85)], {a: 7, b: 7})
+    assert assignment == {c: 7} and merges == {} and singles == []
+
+def test_copy_linking_two_clusters_merges_them():
+    a, b, c = ('adzuna', 'a1'), ('jsearch', 'j1'), ('jsearch', 'j9')
+    assignment, merges, singles = assign_clusters([c], [(c, a, 0.9), (c, b, 0.85)], {a: 3, b: 8})
+    assert assignment == {c: 3} and merges == {8: 3} and singles == []
@@ -0,0 +1,33 @@
+"""
+transform/derived_fields.py: a stale-field pass only reads rows updated since its watermark,
+unless a field's version changed (that field is checked on every row); stamps can take the
+values an UPDATE writes from its stage
+"""
+from datetime import datetime, timezone
+from transform.derived_fields import scope_sql, scoped_stale_sql, stale_sql, field_stamp_sql, DERIVED_FIELDS
+
+SINCE = datetime(2026, 10, 16, tzinfo=timezone.utc)
+
+def test_first_pass_checks_every_row():
+    fields = list(DERIVED_FIELDS)
+    assert scope_sql(fields, None, set()) == "TRUE"
+    assert scoped_stale_sql('seniority', None, set()) == stale_sql('seniority')
+
+def test_unchanged_versions_read_only_updated_rows():
+    assert scope_sql(['seniority', 'industry'], SINCE, set()) == "s.updated_at > :since"
+    assert scoped_stale_sql('industry', SINCE, set()).startswith("(s.updated_at > :since AND ")
+
+def test_version_bump_rescans_only_that_field():
+    fields = ['seniority', 'industry']
+    assert scope_sql(fields, SINCE, {'industry'}) == "TRUE"
+    assert scoped_stale_sql('industry', SINCE, {'industry'}) == stale_sql('industry')
+    assert "updated_at > :since" in scoped_stale_sql('seniority', SINCE, {'industry'})
+    # a bumped field outside this pass doesn't widen it
+    assert scope_sql(['seniority'], SINCE, {'industry'}) == "s.updated_at > :since"
+
+def test_stamp_reads_overridden_columns_from_the_stage():
+    # classify_pending rewrites the place columns: their stamp inputs must be the new values
+    from transform.enrich_sql import PLACE_COLUMNS
+    stamp = field_stamp_sql('cbsa_code', 's', dict.fromkeys(PLACE_COLUMNS, 'stage'))
+    assert "jsonb_build_array(stage.city, s.county, stage.state_code, s.latitude, s.longitude)" in stamp
+    assert field_stamp_sql('cbsa_code', 's') == field_stamp_sql('cbsa_code', 's', {})
@@ -0,0 +1,52 @@
+"""
+transform/industry.py: company names normalized and resolved through the compiled dictionary,
+one-word names never matching as prefixes, then keywords, title hints and category labels
+"""
+import pytest
+from transform.industry import normalize_company, company_industry, resolve_industry, classify_industries
+
+@pytest.mark.parametrize("name, normalized", [
+    ("The Goldman Sachs Group, Inc.", "goldman sachs"),
+    ("JPMORGAN CHASE BANK, N.A.", "jpmorgan chase bank"),
+    ("Johnson & Johnson", "johnson and johnson"),
+    ("Nestlé USA", "nestle"),
+    ("Inc.", "inc"),
+    (None, ""),
+])
+def test_normalize_company(name, normalized):
+    assert normalize_company(name) == normalized
+
+@pytest.mark.parametrize("company, industry", [
+    ("JPMorgan Chase Bank, N.A.", "finance"),
+    ("Google LLC", "big_tech"),
+    ("Meta", "big_tech"),
+    ("Deloitte Consulting LLP", "consulting"),
+    ("Blue Cross Blue Shield of Michigan", "insurance"),
+    ("Ernst & Young", "consulting"),
+    # one-word names are not prefixes of other employers
+    ("Target Health Partners", "healthcare"),
+    ("Meta Staffing", "staffing"),
+    ("Ford Field", None),
+    ("Ally Bank", "finance"),
+    # keywords anywhere in the name
+    ("Henry Ford Health System", "healthcare"),
+    ("County of Wayne", "government"),
+    ("Acme Widgets", None),
+    ("", None),
+])
+def test_company_industry(company, industry):
+    assert company_industry(company) == industry
+
+def test_resolve_industry_falls_back_in_order():
+    assert resolve_industry("Data Analyst", "Google", "Healthcare & Nursing Jobs") == "big_tech"
+    assert resolve_industry("Fintech Data Analyst", "Acme Widgets", "IT Jobs") == "fintech"
+    assert resolve_industry("Data Analyst", "Acme Widgets", "IT Jobs") == "tech"
+    assert resolve_industry("Data Analyst", None, None) == "other"
+
+def test_classify_industries_matches_per_row():
+    titles = ["Data Analyst", "Clinical Data Analyst", "Analyst", "Analyst"]
+    companies = ["Capital One", "Acme Widgets", None, "Capital One"]
+    labels = ["IT Jobs", None, "Teaching Jobs", None]
+    assert classify_industries(titles, companies, labels) == [
+        resolve_industry(title, company, label) for title, company, label in zip(titles, companies, labels)
+    ] == ["finance", "healthcare", "education", "finance"]
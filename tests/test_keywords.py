@@ -0,0 +1,94 @@
+"""
+transform/keywords.py: whole-word labels, roman numerals in title position, and the
+single-pass column scan agreeing with the per-text matcher
+"""
+import pytest
+from transform.keywords import match_labels, classify_texts, scan_column, find_labels, TEXT_MATCHER
+from transform.utils import categorize_role
+
+# Job descriptions from test.py
+DESC1 = ("Job Summary: The Data Analyst I will deliver insights, support business leaders, and assist in procuring data "
+         "for functional analytics. The role will partner with business units to help ask critical questions and drive success.")
+DESC2 = ("R1 is the leading provider of technology-driven solutions that transform the patient experience and financial "
+         "performance of hospitals, health systems and medical groups. As our Data Operations Analyst II, you will be "
+         "responsible for managi…")
+DESC3 = ("Administrative Assistant (4875) Location Detroit, MI Job Code 4875 of Openings Apply Now Job Brief Bennett "
+         "Aerospace, Inc. has an opening for a highly motivated Data Analyst IV in Cincinatti, Ohio")
+
+# (title, description, expected seniority from the title alone, is_remote, job_type)
+CASES = [
+    ("Data Analyst I", DESC1, 'jr', False, 'full-time'),
+    ("Data Operations Analyst II", DESC2, 'mid', False, 'full-time'),
+    ("Data Analyst IV", DESC3, 'sr', False, 'full-time'),
+    ("Sr. Analyst", "", 'sr', False, 'full-time'),
+    ("Senior Analyst", "", 'sr', False, 'full-time'),
+    ("data lead", "", 'sr', False, 'full-time'),
+    ("associate director", "", 'sr', False, 'full-time'),
+    ("Data Analyst III", "", 'mid', False, 'full-time'),
+    ("Junior Data Analyst", "", 'jr', False, 'full-time'),
+    ("Entry-Level Business Analyst", "", 'jr', False, 'full-time'),
+    ("Head of Analytics", "", 'sr', False, 'full-time'),
+    ("Analytics Manager", "", 'mid', False, 'full-time'),
+    # substring false positives in the old checks
+    ("Classroom Data Assistant", "", None, False, 'full-time'),
+    ("Leadership Development Analyst", "", None, False, 'full-time'),
+    ("Internal Audit Analyst", "Support internal controls testing.", None, False, 'full-time'),
+    ("Data Analyst", "Work with the Division's headcount planning team.", None, False, 'full-time'),
+    ("Data Analyst", "Uses first-class tools; remoteness of sites varies.", None, False, 'full-time'),
+    # roman numerals only in title position; bare 'head' is senior
+    ("I.T. Support Analyst", "", None, False, 'full-time'),
+    ("Data Analyst I - Remote", "", 'jr', True, 'full-time'),
+    ("Data Analyst II (Hybrid)", "", 'mid', False, 'full-time'),
+    ("Head Data Scientist", "", 'sr', False, 'full-time'),
+    # remote / job type
+    ("Remote Data Analyst", "", None, True, 'full-time'),
+    ("Data Analyst", "This role can work from home three days a week.", None, True, 'full-time'),
+    ("Data Analyst", "You may work remotely.", None, True, 'full-time'),
+    ("Data Analyst Intern", "Summer internship program.", 'jr', False, 'intern'),
+    ("Data Analyst", "Part-time, 20 hours per week.", None, False, 'part-time'),
+    ("Data Analyst", "This is a part time position.", None, False, 'part-time'),
+    ("Data Analyst", "Contract-to-hire, 6 months.", None, False, 'contract'),
+    ("Data Analyst", "This is a full time position.", None, False, 'full-time'),
+]
+
+# (title, description, salary_min, salary_max, expected seniority after the title -> salary -> description -> 'mid' fallbacks)
+ROLE_CASES = [
+    ("data lead", DESC2, 100000, 120000, 'sr'),
+    ("Data Analyst", "", 60000, 70000, 'jr'),
+    ("Data Analyst", "", 120000, 140000, 'sr'),
+    ("Data Analyst", "Requires 8+ years of experience.", None, None, 'sr'),
+    ("Data Analyst", "Requires 2 years of experience.", None, None, 'jr'),
+    ("Data Analyst", "Great team.", None, None, 'mid'),
+]
+
+
+@pytest.mark.parametrize("title, description, seniority, is_remote, job_type", CASES)
+def test_match_labels(title, description, seniority, is_remote, job_type):
+    assert match_labels(title, description) == {'seniority': seniority, 'is_remote': is_remote, 'job_type': job_type}
+
+@pytest.mark.parametrize("title, description, salary_min, salary_max, expected", ROLE_CASES)
+def test_categorize_role(title, description, salary_min, salary_max, expected):
+    assert categorize_role(title, description, salary_min, salary_max, '') == expected
+
+def test_classify_texts_matches_per_text_labels():
+    titles = [title for title, *_ in CASES] + [None, "Data Analyst I"]
+    descriptions = [description for _, description, *_ in CASES] + ["Remote.", None]
+    labels = classify_texts(titles, descriptions)
+    for row, (title, description) in enumerate(zip(titles, descriptions)):
+        expected = match_labels(title, description)
+        assert {key: values[row] for key, values in labels.items()} == expected
+
+def test_scan_column_keeps_matches_in_their_row():
+    # a keyword at the very end of one text or the start of the next must not spill across the separator
+    texts = ["work from", "home office", "Fully remote", "", "part-time", "contract"]
+    assert scan_column(texts, TEXT_MATCHER) == [set(), set(), {'remote'}, set(), {'part_time'}, {'contract'}]
+    assert [find_labels(text.lower(), TEXT_MATCHER) for text in texts] == scan_column(texts, TEXT_MATCHER)
+
+@pytest.mark.parametrize("title, seniority", [
+    ("Analyst, Level I", 'jr'),
+    ("I Love Data Analyst", None),
+    ("Analyst I/II", 'jr'),
+    ("Business Analyst IV, Finance", 'sr'),
+])
+def test_roman_numerals_and_head(title, seniority):
+    assert match_labels(title)['seniority'] == seniority
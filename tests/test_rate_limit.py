@@ -0,0 +1,72 @@
+"""
+ingest/rate_limit.py: TokenBucket bursts up to capacity, then paces callers at `rate`
+(on a fake clock, so nothing actually sleeps)
+"""
+import threading
+import pytest
+from ingest import rate_limit
+from ingest.rate_limit import TokenBucket
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; time.sleep advances it instead of blocking"""
+    now = [1000.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limit.time, 'sleep', sleep)
+    return now, sleeps
+
+def test_burst_then_paced(clock):
+    now, sleeps = clock
+    bucket = TokenBucket(rate=2, capacity=4)
+    for _ in range(4):
+        bucket.acquire()
+    assert sleeps == []
+    bucket.acquire()
+    assert sleeps == [pytest.approx(0.5)]
+    assert bucket.requests_made == 5
+
+def test_refill_is_capped_at_capacity(clock):
+    now, sleeps = clock
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.acquire(2)
+    now[0] += 60
+    for _ in range(2):
+        bucket.acquire()
+    assert sleeps == []
+    bucket.acquire()
+    assert len(sleeps) == 1
+
+def test_default_capacity_is_one_second_of_tokens():
+    assert TokenBucket(rate=5).capacity == 5
+    assert TokenBucket(rate=0.5).capacity == 1
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1).set_rate(-1)
+
+def test_set_rate_keeps_the_shared_bucket(clock):
+    now, sleeps = clock
+    bucket = TokenBucket(rate=10, capacity=10)
+    bucket.set_rate(1)
+    assert bucket.capacity == 1
+    bucket.acquire()
+    bucket.acquire()
+    assert sleeps == [pytest.approx(1.0)]
+
+def test_threads_never_exceed_the_rate():
+    # real clock: 20 requests at 200/s with a burst of 5 take at least (20 - 5) / 200 s
+    bucket = TokenBucket(rate=200, capacity=5)
+    started = rate_limit.time.monotonic()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert bucket.requests_made == 20
+    assert rate_limit.time.monotonic() - started >= (20 - 5) / 200 * 0.95
@@ -0,0 +1,61 @@
+"""
+transform/requirements.py: years of experience, education levels, "ms" only as a degree,
+and "or equivalent" only next to the degree it qualifies
+"""
+import pytest
+from transform.requirements import extract_yoe, extract_education, extract_requirements
+
+# (description, expected yoe_min, expected education)
+EXAMPLES = [
+    ("Requires 3+ years of experience with SQL and Python.", 3, None),
+    ("3-5 years experience; BS required, MS preferred.", 3, "bachelor's"),
+    ("Minimum of five years in analytics. Master's or PhD preferred.", 5, "master's"),
+    ("Our company has over 20 years in business serving our customers. At least 2 yrs SQL.", 2, None),
+    ("Must be 18 years of age. Bachelor's degree or equivalent experience.", None, "bachelor's or equivalent"),
+    ("This is a 2 year contract. Proficient in MS Excel and MS Office.", None, None),
+    ("Experience with Master Data Management.", None, None),
+]
+
+@pytest.mark.parametrize("description, yoe, education", EXAMPLES)
+def test_examples(description, yoe, education):
+    assert extract_yoe(description) == yoe
+    assert extract_education(description) == education
+
+@pytest.mark.parametrize("description, years", [
+    ("3-5 years of experience", 3),
+    ("4+ yrs in a similar role", 4),
+    ("minimum of five years", 5),
+    ("seven to ten years of analytics work", 7),
+    ("For over 30 years, our firm has served the region. 10+ yrs of SQL.", 10),
+    ("celebrating 25 years of excellence", None),
+    ("", None),
+])
+def test_extract_yoe(description, years):
+    assert extract_yoe(description) == years
+
+@pytest.mark.parametrize("description, education", [
+    ("Contact Ms. Jones to apply.", None),
+    ("Send your resume to Ms Smith.", None),
+    ("MS in Statistics or a related field.", "master's"),
+    ("BS/MS in Computer Science.", "bachelor's"),
+    ("MS or PhD in Economics.", "master's"),
+    ("High school diploma or GED required.", "high school"),
+])
+def test_ms_needs_a_degree_context(description, education):
+    assert extract_education(description) == education
+
+@pytest.mark.parametrize("description, education", [
+    ("We offer competitive pay or equivalent PTO. Bachelor's degree in Statistics required.", "bachelor's"),
+    ("Bachelor's degree required. " + "You will build dashboards for the sales team. " * 3 + "Or equivalent tools.",
+     "bachelor's"),
+    ("B.S. or equivalent experience.", "bachelor's or equivalent"),
+    ("Equivalent experience may substitute for a Bachelor's degree.", "bachelor's or equivalent"),
+])
+def test_or_equivalent_only_near_the_degree(description, education):
+    assert extract_education(description) == education
+
+def test_batch_matches_per_text():
+    descriptions = [description for description, _, _ in EXAMPLES] + [None, EXAMPLES[0][0]]
+    batch = extract_requirements(descriptions)
+    assert list(batch['yoe_min']) == [extract_yoe(description) for description in descriptions]
+    assert list(batch['education']) == [extract_education(description) for description in descriptions]
@@ -0,0 +1,67 @@
+"""
+ingest/scheduler.py: expected new jobs per page, and the greedy allocation of a call budget
+to the pages with the most expected new jobs
+"""
+from datetime import date, timedelta
+import pytest
+from ingest import scheduler
+from ingest.scheduler import _page_gains, plan_refresh
+
+RUN_DATE = date(2026, 10, 17)
+
+def test_page_gains_new_pair_fills_every_page():
+    assert _page_gains('new', 500.0, 500, 3, 50) == [50, 50, 50]
+
+def test_page_gains_full_refresh_spreads_new_jobs_evenly():
+    # 100 new out of 1000: every page of a full pass holds 10% new jobs
+    assert _page_gains('full', 100, 1000, 4, 50) == pytest.approx([5.0] * 4)
+    assert _page_gains('full', 10, 0, 2, 50) == [0.0, 0.0]
+
+def test_page_gains_incremental_front_loads_new_jobs():
+    # date-sorted: 120 new jobs fill two pages and part of a third
+    assert _page_gains('incremental', 120, 2000, 4, 50) == [50, 50, 20, 0.0]
+
+def history(last_run_days, new_jobs, observed_days, api_count, last_full_days=1):
+    return {
+        'last_run': RUN_DATE - timedelta(days=last_run_days),
+        'last_full_run': RUN_DATE - timedelta(days=last_full_days),
+        'api_count': api_count, 'new_jobs': new_jobs, 'observed_days': observed_days,
+    }
+
+@pytest.fixture
+def pairs(monkeypatch):
+    def set_history(rows):
+        monkeypatch.setattr(scheduler, 'load_pair_history', lambda *args, **kwargs: rows)
+    return set_history
+
+def test_budget_goes_to_the_pages_with_the_most_new_jobs(pairs):
+    pairs({
+        # ~100 new jobs a day, 2 days stale: ~200 new -> 4 full pages then a partial one
+        ('Chicago, IL', 'data analyst'): history(2, new_jobs=699, observed_days=6, api_count=2000),
+        # ~5 new jobs a day, 1 day stale: one partial page
+        ('Detroit, MI', 'data analyst'): history(1, new_jobs=34, observed_days=6, api_count=300),
+    })
+    plan, skipped = plan_refresh(['Chicago, IL', 'Detroit, MI'], ['data analyst'], budget=5, run_date=RUN_DATE)
+    pages = {c['city']: c['max_pages'] for c in plan}
+    assert pages == {'Chicago, IL': 4, 'Detroit, MI': 1}
+    assert skipped == []
+    assert [c['city'] for c in plan] == ['Chicago, IL', 'Detroit, MI']
+    assert sum(pages.values()) == 5
+
+def test_budget_never_buys_pages_with_nothing_new(pairs):
+    pairs({('Detroit, MI', 'data analyst'): history(1, new_jobs=34, observed_days=6, api_count=300)})
+    plan, _ = plan_refresh(['Detroit, MI'], ['data analyst'], budget=10, run_date=RUN_DATE)
+    assert plan[0]['mode'] == 'incremental'
+    assert plan[0]['max_pages'] == 1
+
+def test_new_pairs_first_and_unfunded_pairs_skipped(pairs):
+    pairs({('Detroit, MI', 'data analyst'): history(1, new_jobs=34, observed_days=6, api_count=300)})
+    plan, skipped = plan_refresh(['Detroit, MI', 'Austin, TX'], ['data analyst'], budget=1, run_date=RUN_DATE)
+    assert [(c['city'], c['mode'], c['max_pages']) for c in plan] == [('Austin, TX', 'new', 1)]
+    assert [(c['city'], c['max_pages']) for c in skipped] == [('Detroit, MI', 0)]
+
+def test_full_refresh_due(pairs):
+    pairs({('Detroit, MI', 'data analyst'): history(1, new_jobs=34, observed_days=6, api_count=300, last_full_days=30)})
+    plan, _ = plan_refresh(['Detroit, MI'], ['data analyst'], budget=20, run_date=RUN_DATE)
+    assert plan[0]['mode'] == 'full'
+    assert plan[0]['max_pages'] == 6   # every page of a 300-job market
@@ -0,0 +1,335 @@
+"""
+Resumable, chunked backfills of derived columns in silver.jobs_v2
+
+run_backfill() walks silver.jobs_v2 in (source, job_id) keyset chunks,
+recomputes one column with any derived-column function (categorize_role,
+get_job_type, ... from transform/utils.py) once per distinct input in the
+chunk, and writes only the rows that changed with one
+UPDATE ... FROM (VALUES ...) per chunk. The chunk's UPDATE and its
+checkpoint row (silver.backfill_checkpoints, sql/6_backfill_checkpoints.sql)
+commit together in one READ COMMITTED transaction, so an interrupted run resumes after the last committed
+chunk. The change histogram is accumulated as chunks go and kept on the
+checkpoint, so the final report never recomputes anything.
+
+With workers > 1 the rows are split into (source, job_id) keyset ranges
+instead and the ranges run across the enrichment process pool
+(keyset_ranges / map_chunks, transform/parallel.py). Each range commits its
+own UPDATE; ranges finish out of order, so a parallel run keeps no resume
+point and writes its checkpoint only once every range has succeeded. A rerun
+after a failed range is still cheap: only rows whose value still differs are
+written.
+
+BACKFILLS holds ready-made definitions for the derived columns enrichment writes.
+"""
+import json
+from collections import Counter
+from sqlalchemy import text
+from database.db import get_engine, get_stream_chunk_size
+from transform.parallel import keyset_ranges, map_chunks
+from transform.utils import categorize_role, get_is_remote, get_industry, get_job_type, get_yoe, get_education
+
+# name -> column, function, input expressions (in argument order), categorical (histogram of old → new)
+BACKFILLS = {
+    'seniority': {
+        'column': 'seniority', 'fn': categorize_role, 'categorical': True,
+        'inputs': ['s.title', 's.description', 's.salary_min', 's.salary_max', 's.city'],
+    },
+    'is_remote': {
+        'column': 'is_remote', 'fn': get_is_remote, 'categorical': True,
+        'inputs': ['s.title', 's.description'],
+    },
+    'job_type': {
+        'column': 'job_type', 'fn': get_job_type, 'categorical': True,
+        'inputs': ['s.title', 's.description'],
+    },
+    'industry': {
+        'column': 'industry', 'fn': get_industry, 'categorical': True,
+        'inputs': ['s.title', 's.company', 's.category_label'],
+    },
+    'yoe_min': {
+        'column': 'yoe_min', 'fn': get_yoe, 'categorical': True,
+        'inputs': ['s.description'],
+    },
+    'education': {
+        'column': 'education', 'fn': get_education, 'categorical': True,
+        'inputs': ['s.description'],
+    },
+    # descriptions missing from older silver rows, pulled from the bronze payload
+    'description': {
+        'column': 'description', 'fn': lambda description: description or '', 'categorical': False,
+        'inputs': ["r.payload->>'description'"],
+        'join': "JOIN bronze.raw_jobs r ON r.source = s.source AND r.job_id = s.job_id",
+        'where': "s.source = 'adzuna' AND (s.description IS NULL OR s.description = '')",
+    },
+}
+
+def _column_type(conn, column):
+    """Postgres type of a silver.jobs_v2 column, for casting the VALUES list"""
+    return conn.execute(text("""
+        SELECT format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = 'silver.jobs_v2'::regclass AND a.attname = :column AND NOT a.attisdropped
+    """), {'column': column}).scalar_one()
+
+def load_checkpoint(name):
+    """Checkpoint row for a backfill (a mapping), or None if it never ran"""
+    with get_engine().connect() as conn:
+        return conn.execute(text("""
+            SELECT name, column_name, last_source, last_job_id, rows_scanned, rows_changed,
+                   histogram, started_at, updated_at, completed_at
+            FROM silver.backfill_checkpoints
+            WHERE name = :name
+        """), {'name': name}).mappings().first()
+
+def _save_checkpoint(conn, name, column, last_key, scanned, changed, histogram, completed=False):
+    conn.execute(text("""
+        INSERT INTO silver.backfill_checkpoints (name, column_name, last_source, last_job_id,
+                                                 rows_scanned, rows_changed, histogram, completed_at)
+        VALUES (:name, :column, :last_source, :last_job_id, :scanned, :changed, CAST(:histogram AS jsonb),
+                CASE WHEN :completed THEN CURRENT_TIMESTAMP END)
+        ON CONFLICT (name) DO UPDATE SET
+            last_source = EXCLUDED.last_source,
+            last_job_id = EXCLUDED.last_job_id,
+            rows_scanned = EXCLUDED.rows_scanned,
+            rows_changed = EXCLUDED.rows_changed,
+            histogram = EXCLUDED.histogram,
+            completed_at = EXCLUDED.completed_at,
+            updated_at = CURRENT_TIMESTAMP
+    """), {
+        'name': name, 'column': column,
+        'last_source': last_key[0] if last_key else None,
+        'last_job_id': last_key[1] if last_key else None,
+        'scanned': scanned, 'changed': changed,
+        'histogram': json.dumps(histogram), 'completed': completed,
+    })
+
+def apply_changes(conn, column, changes, column_type):
+    """
+    Write [(source, job_id, new_value), ...] into silver.jobs_v2.<column> with one UPDATE ... FROM (VALUES ...)
+    Returns the number of rows updated
+    """
+    if not changes:
+        return 0
+    values = ', '.join(f"(:s{i}, :j{i}, CAST(:v{i} AS {column_type}))" for i in range(len(changes)))
+    params = {}
+    for i, (source, job_id, value) in enumerate(changes):
+        params.update({f"s{i}": source, f"j{i}": job_id, f"v{i}": value})
+    result = conn.execute(text(f"""
+        UPDATE silver.jobs_v2 s
+        SET {column} = v.new_value,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (VALUES {values}) AS v(source, job_id, new_value)
+        WHERE s.source = v.source AND s.job_id = v.job_id
+    """), params)
+    return result.rowcount
+
+def _change_key(old, new, categorical):
+    if old == new:
+        return 'no_change'
+    if not categorical:
+        return 'changed'
+    return f"{'NULL' if old is None else old} → {'NULL' if new is None else new}"
+
+def _compute_changes(rows, fn, categorical, histogram, samples):
+    """
+    New values for query rows (source, job_id, current_value, *inputs), each distinct input tuple computed once
+    Counts every row into `histogram`, keeps up to 10 samples; returns [(source, job_id, new_value), ...] that changed
+    """
+    results = {}
+    changes = []
+    for row in rows:
+        args = tuple(row[3:])
+        if args not in results:
+            results[args] = fn(*args)
+        new_value = results[args]
+        histogram[_change_key(row.current_value, new_value, categorical)] += 1
+        if row.current_value != new_value:
+            changes.append((row.source, row.job_id, new_value))
+            if len(samples) < 10:
+                samples.append((row.source, row.job_id, row.current_value, new_value))
+    return changes
+
+def backfill_range(name, lower, upper, dry_run=True):
+    """
+    Run the BACKFILLS[name] backfill over the rows with lower <= (source, job_id) < upper (upper=None: no bound)
+    Runs inside a worker process; the range's UPDATE is one transaction
+    Returns (scanned, changed, histogram, samples)
+    """
+    definition = BACKFILLS[name]
+    column, inputs = definition['column'], definition['inputs']
+    conditions = [definition.get('where') or "TRUE", "(s.source, s.job_id) >= (:lower_source, :lower_job_id)"]
+    if upper is not None:
+        conditions.append("(s.source, s.job_id) < (:upper_source, :upper_job_id)")
+    query = text(f"""
+        SELECT s.source, s.job_id, s.{column} AS current_value, {', '.join(inputs)}
+        FROM silver.jobs_v2 s
+        {definition.get('join') or ''}
+        WHERE {' AND '.join(f'({condition})' for condition in conditions)}
+    """)
+    engine = get_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(query, {
+            'lower_source': lower[0], 'lower_job_id': lower[1],
+            'upper_source': upper[0] if upper else None, 'upper_job_id': upper[1] if upper else None,
+        }).all()
+
+    histogram, samples = Counter(), []
+    changes = _compute_changes(rows, definition['fn'], definition.get('categorical', True), histogram, samples)
+    if not dry_run and changes:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="READ COMMITTED")
+            with conn.begin():
+                apply_changes(conn, column, changes, _column_type(conn, column))
+    return len(rows), len(changes), dict(histogram), samples
+
+def _run_backfill_parallel(name, definition, dry_run, chunk_size, workers):
+    """run_backfill across a process pool: one keyset range of about chunk_size rows per task"""
+    column = definition['column']
+    engine = get_engine()
+    ranges = keyset_ranges(engine, ['s.source', 's.job_id'], f"""
+        FROM silver.jobs_v2 s
+        {definition.get('join') or ''}
+        WHERE {definition.get('where') or 'TRUE'}
+    """, chunk_size)
+
+    print(f"🔄 Backfilling silver.jobs_v2.{column} ({name}) in {len(ranges)} chunks of up to {chunk_size} "
+          f"across {workers} worker(s){' - DRY RUN' if dry_run else ''}")
+
+    scanned, changed, histogram, samples, failed = 0, 0, Counter(), [], []
+    chunks = [(name, lower, upper, dry_run) for lower, upper in ranges]
+    for chunk, result, error in map_chunks(backfill_range, chunks, workers):
+        if error is not None:
+            failed.append(chunk[1:3])
+            print(f"  ❌ chunk {chunk[1]}..{chunk[2] or 'end'} failed: {error}")
+            continue
+        chunk_scanned, chunk_changed, chunk_histogram, chunk_samples = result
+        scanned += chunk_scanned
+        changed += chunk_changed
+        histogram.update(chunk_histogram)
+        samples.extend(chunk_samples[:10 - len(samples)])
+        print(f"  Scanned {scanned} rows, {changed} changed...")
+
+    if not dry_run and not failed:
+        with engine.begin() as conn:
+            _save_checkpoint(conn, name, column, None, scanned, changed, histogram, completed=True)
+
+    print_report(name, histogram, scanned, changed, samples)
+    if dry_run:
+        print(f"\n🚫 DRY RUN MODE - No changes made to database")
+    elif failed:
+        print(f"\n⚠️  {len(failed)} chunk(s) failed - rerun to finish backfill {name!r}")
+    else:
+        print(f"\n✅ Backfill {name!r} complete")
+    return {'scanned': scanned, 'changed': changed, 'histogram': dict(histogram)}
+
+def print_report(name, histogram, scanned, changed, samples=()):
+    print(f"\n📊 {name}: {scanned} rows scanned, {changed} changed")
+    print(f"{'Change':<30} {'Count':>8}")
+    print("-" * 39)
+    for key, count in sorted(histogram.items(), key=lambda item: -item[1]):
+        print(f"{key:<30} {count:>8}")
+    if samples:
+        print(f"\n🔍 SAMPLE CHANGES (first {len(samples)}):")
+        for source, job_id, old, new in samples:
+            print(f"  {source}/{job_id}: {str(old)[:40]!r} → {str(new)[:40]!r}")
+
+def run_backfill(name, column=None, fn=None, inputs=None, join=None, where=None, categorical=True,
+                 dry_run=True, chunk_size=None, restart=False, workers=1):
+    """
+    Recompute silver.jobs_v2.<column> = fn(*inputs) for every row (matching `where`)
+
+    Args:
+        name: backfill name (checkpoint key); a BACKFILLS entry fills in the other definition arguments
+        column / fn / inputs / join / where / categorical: the definition (see BACKFILLS)
+        dry_run: compute and report without writing or checkpointing
+        chunk_size: rows per keyset chunk (default: STREAM_CHUNK_SIZE)
+        restart: ignore an existing checkpoint and start from the beginning
+        workers: > 1 runs keyset ranges across a process pool (BACKFILLS entries only, no resume point)
+    Returns {'scanned', 'changed', 'histogram'} (cumulative across resumed runs)
+    """
+    definition = {**BACKFILLS.get(name, {})}
+    for key, value in (('column', column), ('fn', fn), ('inputs', inputs), ('join', join), ('where', where)):
+        if value is not None:
+            definition[key] = value
+    if not {'column', 'fn', 'inputs'} <= definition.keys():
+        raise ValueError(f"Unknown backfill {name!r}: pass column, fn and inputs")
+    column, fn, inputs = definition['column'], definition['fn'], definition['inputs']
+    categorical = definition.get('categorical', categorical)
+    chunk_size = chunk_size or get_stream_chunk_size()
+
+    if workers > 1:
+        # workers look the definition up by name, so it must be a BACKFILLS entry as-is
+        if name not in BACKFILLS or definition != BACKFILLS[name]:
+            raise ValueError(f"Parallel backfills need an unmodified BACKFILLS entry, got {name!r}")
+        return _run_backfill_parallel(name, definition, dry_run, chunk_size, workers)
+
+    # Resume from the checkpoint (dry runs always scan from the start and never write one)
+    last_key, scanned, changed, histogram = None, 0, 0, Counter()
+    checkpoint = None if dry_run else load_checkpoint(name)
+    if checkpoint and not restart:
+        if checkpoint['completed_at']:
+            print(f"✅ Backfill {name!r} already completed at {checkpoint['completed_at']} - pass restart=True to run it again")
+            print_report(name, checkpoint['histogram'], checkpoint['rows_scanned'], checkpoint['rows_changed'])
+            return {'scanned': checkpoint['rows_scanned'], 'changed': checkpoint['rows_changed'],
+                    'histogram': dict(checkpoint['histogram'])}
+        if checkpoint['last_job_id'] is not None:
+            last_key = (checkpoint['last_source'], checkpoint['last_job_id'])
+        scanned, changed = checkpoint['rows_scanned'], checkpoint['rows_changed']
+        histogram = Counter(checkpoint['histogram'])
+        print(f"↩️  Resuming backfill {name!r} after {last_key} ({scanned} rows already scanned)")
+
+    conditions = [definition.get('where') or "TRUE", "(s.source, s.job_id) > (:last_source, :last_job_id)"]
+    query = text(f"""
+        SELECT s.source, s.job_id, s.{column} AS current_value, {', '.join(inputs)}
+        FROM silver.jobs_v2 s
+        {definition.get('join') or ''}
+        WHERE {' AND '.join(f'({condition})' for condition in conditions)}
+        ORDER BY s.source, s.job_id
+        LIMIT :chunk_size
+    """)
+
+    print(f"🔄 Backfilling silver.jobs_v2.{column} ({name}) in chunks of {chunk_size}"
+          f"{' - DRY RUN' if dry_run else ''}")
+
+    engine = get_engine()
+    samples = []
+    column_type = None
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(query, {
+                'last_source': last_key[0] if last_key else '',
+                'last_job_id': last_key[1] if last_key else '',
+                'chunk_size': chunk_size,
+            }).all()
+        if not rows:
+            break
+
+        chunk_changes = _compute_changes(rows, fn, categorical, histogram, samples)
+
+        last_key = (rows[-1].source, rows[-1].job_id)
+        scanned += len(rows)
+        changed += len(chunk_changes)
+
+        if not dry_run:
+            # a real transaction (the engine autocommits), so a crash never applies a chunk without its checkpoint
+            with engine.connect() as conn:
+                conn = conn.execution_options(isolation_level="READ COMMITTED")
+                with conn.begin():
+                    column_type = column_type or _column_type(conn, column)
+                    apply_changes(conn, column, chunk_changes, column_type)
+                    _save_checkpoint(conn, name, column, last_key, scanned, changed, histogram)
+
+        print(f"  Scanned {scanned} rows, {changed} changed...")
+        if len(rows) < chunk_size:
+            break
+
+    if not dry_run:
+        with engine.begin() as conn:
+            _save_checkpoint(conn, name, column, last_key, scanned, changed, histogram, completed=True)
+
+    print_report(name, histogram, scanned, changed, samples)
+    if dry_run:
+        print(f"\n🚫 DRY RUN MODE - No changes made to database")
+    else:
+        print(f"\n✅ Backfill {name!r} complete")
+    return {'scanned': scanned, 'changed': changed, 'histogram': dict(histogram)}
@@ -0,0 +1,295 @@
+"""
+Company entity resolution and gold.companies
+
+The same employer shows up as "JPMorgan Chase & Co.", "JPMORGAN CHASE BANK,
+N.A." and "JP Morgan Chase" across Adzuna company.display_name and JSearch
+employer_name (both sources are enriched into silver.jobs_v2, JSearch by
+transform/enrich_jsearch.py). Each raw name is normalized (normalize_company in
+transform/industry.py) and the normalized name is resolved to a stable
+company_id exactly once, in silver.company_aliases (sql/10_companies.sql):
+
+    1. an alias that already exists keeps its company_id
+    2. a new name is scored only against aliases in its block (the first
+       BLOCK_CHARS letters of the name with spaces removed), by character
+       trigram Jaccard similarity, or PREFIX_SCORE when one name is the
+       other plus a generic tail ("deloitte" / "deloitte consulting", see
+       GENERIC_TAILS; "united" / "united airlines" is not); it joins the
+       best entity scoring at least COMPANY_MATCH_THRESHOLD
+    3. otherwise it founds a new entity
+
+Entities are never merged or renumbered afterwards, so company_id is
+stable across runs.
+
+refresh_companies() is incremental: it only reads jobs whose updated_at is
+past the stage's watermark (silver.stage_watermarks), sets their
+company_id, and rewrites gold.companies for just the companies those jobs
+belong to (before or after the change). Jobs that expire count as changed:
+prepare_enrichment_run bumps updated_at when it clears is_active. The
+new_jobs_7d/30d windows depend on the date rather than on job changes, so
+they are recounted for every company from the last 30 days of jobs. A run
+costs O(changed jobs + jobs of the companies they touch + jobs first seen in
+the last 30 days), not O(silver.jobs_v2).
+
+    COMPANY_MATCH_THRESHOLD   min similarity to join an existing entity (default: 0.7)
+"""
+import os
+import pandas as pd
+from sqlalchemy import text
+from database.db import get_engine, copy_dataframe
+from transform.industry import normalize_company
+
+COMPANY_MATCH_THRESHOLD = float(os.getenv('COMPANY_MATCH_THRESHOLD', '0.7'))
+BLOCK_CHARS = 4
+# names shorter than this (spaces removed) only ever match exactly: too few trigrams to score
+MIN_FUZZY_CHARS = 5
+# score of a name that is the other plus a generic tail ("jpmorgan chase" / "jpmorgan chase bank")
+PREFIX_SCORE = 0.9
+# trailing words that name a division or form of the same employer, not a different one
+# ("health" alone is not: "united" / "united health"; nor "software": "rocket" / "rocket software")
+GENERIC_TAILS = frozenset({
+    'bank', 'bank na', 'financial', 'financial services', 'consulting', 'consulting services', 'services',
+    'solutions', 'health system', 'health systems', 'healthcare system', 'medical center', 'medical group',
+    'international', 'global', 'north america', 'americas', 'enterprises', 'partners',
+})
+STAGE = 'companies'
+
+def block_key(name_key):
+    """Blocking key of a normalized name: "jp morgan chase" -> "jpmo" """
+    return name_key.replace(' ', '')[:BLOCK_CHARS]
+
+def trigrams(name_key):
+    """Character trigrams of a normalized name with spaces removed (padded, so short names still have some)"""
+    padded = f"  {name_key.replace(' ', '')} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _score(a, b, grams_a, grams_b):
+    score = len(grams_a & grams_b) / len(grams_a | grams_b)
+    if score < PREFIX_SCORE:
+        short, long = (a, b) if len(a) <= len(b) else (b, a)
+        if (len(short.replace(' ', '')) >= MIN_FUZZY_CHARS and long.startswith(short + ' ')
+                and long[len(short) + 1:] in GENERIC_TAILS):
+            return PREFIX_SCORE
+    return score
+
+def name_similarity(a, b):
+    """Similarity of two normalized names: trigram Jaccard, at least PREFIX_SCORE if one is the other plus a generic tail"""
+    return _score(a, b, trigrams(a), trigrams(b))
+
+def cluster_names(new_keys, candidates, threshold=None):
+    """
+    Resolve normalized names that have no alias yet
+
+    Args:
+        new_keys: normalized names, in the order they should be resolved
+        candidates: block -> [(name_key, company_id)] of existing aliases in the new names' blocks
+        threshold: min similarity to join an entity (default: COMPANY_MATCH_THRESHOLD)
+
+    Returns a list of (name_key, company_id, similarity). Names that found a new entity get a
+    provisional negative company_id (shared by later names that match them) and similarity 1
+    """
+    threshold = COMPANY_MATCH_THRESHOLD if threshold is None else threshold
+    candidates = {block: [(key, company_id, trigrams(key)) for key, company_id in aliases]
+                  for block, aliases in candidates.items()}
+    resolved = []
+    next_id = -1
+    for key in new_keys:
+        block = block_key(key)
+        grams = trigrams(key)
+        best_id, best_score = None, 0.0
+        if len(key.replace(' ', '')) >= MIN_FUZZY_CHARS:
+            for other, company_id, other_grams in candidates.get(block, []):
+                score = _score(key, other, grams, other_grams)
+                if score > best_score:
+                    best_id, best_score = company_id, score
+        if best_id is None or best_score < threshold:
+            best_id, best_score = next_id, 1.0
+            next_id -= 1
+        resolved.append((key, best_id, round(best_score, 4)))
+        candidates.setdefault(block, []).append((key, best_id, grams))
+    return resolved
+
+def resolve_company_ids(conn, names):
+    """
+    company_id for each distinct raw company name, creating aliases/entities for unseen names
+    names: raw company names (non-empty). Returns {raw name: company_id}
+    """
+    keys = {name: normalize_company(name) for name in names}
+    keys = {name: key for name, key in keys.items() if key}
+    distinct_keys = list(dict.fromkeys(keys.values()))
+    if not distinct_keys:
+        return {}
+
+    known = dict(conn.execute(text("""
+        SELECT name_key, company_id FROM silver.company_aliases WHERE name_key = ANY(:keys)
+    """), {'keys': distinct_keys}).all())
+    new_keys = [key for key in distinct_keys if key not in known]
+
+    if new_keys:
+        blocks = sorted({block_key(key) for key in new_keys})
+        candidates = {}
+        for key, block, company_id in conn.execute(text("""
+            SELECT name_key, block, company_id FROM silver.company_aliases WHERE block = ANY(:blocks)
+        """), {'blocks': blocks}):
+            candidates.setdefault(block, []).append((key, company_id))
+        resolved = cluster_names(new_keys, candidates)
+
+        # New entities, named after the first raw spelling of their founding name
+        spelling = {}
+        for name, key in keys.items():
+            spelling.setdefault(key, name)
+        founders = {}
+        for key, company_id, _ in resolved:
+            if company_id < 0:
+                founders.setdefault(company_id, key)
+        provisional = {}
+        if founders:
+            created = conn.execute(text("""
+                INSERT INTO silver.companies (name, name_key)
+                SELECT * FROM unnest(CAST(:names AS text[]), CAST(:keys AS text[]))
+                RETURNING company_id, name_key
+            """), {'names': [spelling[key] for key in founders.values()], 'keys': list(founders.values())}).all()
+            created = {key: company_id for company_id, key in created}
+            provisional = {company_id: created[key] for company_id, key in founders.items()}
+
+        aliases = pd.DataFrame(
+            [(key, block_key(key), provisional.get(company_id, company_id), similarity)
+             for key, company_id, similarity in resolved],
+            columns=['name_key', 'block', 'company_id', 'similarity'])
+        conn.execute(text("DROP TABLE IF EXISTS company_aliases_stage"))
+        conn.execute(text("CREATE TEMP TABLE company_aliases_stage (LIKE silver.company_aliases INCLUDING DEFAULTS)"))
+        copy_dataframe(conn, 'company_aliases_stage', aliases, int_columns=['company_id'])
+        conn.execute(text("""
+            INSERT INTO silver.company_aliases (name_key, block, company_id, similarity)
+            SELECT name_key, block, company_id, similarity FROM company_aliases_stage
+            ON CONFLICT (name_key) DO NOTHING
+        """))
+        conn.execute(text("DROP TABLE company_aliases_stage"))
+        known.update(zip(aliases['name_key'], aliases['company_id'].astype(int)))
+        print(f"🏢 Resolved {len(new_keys)} new company names: "
+              f"{len(founders)} new companies, {len(new_keys) - len(founders)} matched existing ones")
+
+    return {name: int(known[key]) for name, key in keys.items()}
+
+def refresh_companies(full=False):
+    """
+    Set silver.jobs_v2.company_id and update gold.companies from the jobs changed since the last refresh
+    full: process every job and rebuild gold.companies from scratch
+    Returns the number of companies rewritten in gold.companies
+    """
+    engine = get_engine()
+    # One real transaction (the engine autocommits): a failed run leaves jobs, aliases, gold and the watermark as they were
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="READ COMMITTED")
+        with conn.begin():
+            # CURRENT_TIMESTAMP is the transaction start: the company_id updates below get exactly this
+            # updated_at, so they aren't re-read next run, while anything written after it is
+            run_started = conn.execute(text("SELECT CURRENT_TIMESTAMP")).scalar()
+            since = None if full else conn.execute(text("""
+                SELECT watermark FROM silver.stage_watermarks WHERE stage = :stage
+            """), {'stage': STAGE}).scalar()
+            changed = 'TRUE' if since is None else 'j.updated_at > :since'
+            params = {'since': since}
+
+            names = conn.execute(text(f"""
+                SELECT DISTINCT j.company
+                FROM silver.jobs_v2 j
+                WHERE {changed} AND COALESCE(j.company, '') <> ''
+            """), params).scalars().all()
+            company_ids = resolve_company_ids(conn, names)
+
+            # Companies whose aggregates move: the changed jobs' companies before and after this run
+            conn.execute(text("DROP TABLE IF EXISTS affected_companies"))
+            conn.execute(text(f"""
+                CREATE TEMP TABLE affected_companies AS
+                SELECT DISTINCT j.company_id FROM silver.jobs_v2 j WHERE {changed} AND j.company_id IS NOT NULL
+            """), params)
+
+            stage = pd.DataFrame(list(company_ids.items()), columns=['company', 'company_id'])
+            conn.execute(text("DROP TABLE IF EXISTS job_companies_stage"))
+            conn.execute(text("CREATE TEMP TABLE job_companies_stage (company text primary key, company_id int)"))
+            copy_dataframe(conn, 'job_companies_stage', stage, int_columns=['company_id'])
+            assigned = conn.execute(text(f"""
+                UPDATE silver.jobs_v2 j
+                SET company_id = stage.company_id
+                FROM job_companies_stage stage
+                WHERE {changed} AND j.company = stage.company AND j.company_id IS DISTINCT FROM stage.company_id
+            """), params).rowcount
+            conn.execute(text(f"""
+                UPDATE silver.jobs_v2 j
+                SET company_id = NULL
+                WHERE {changed} AND j.company_id IS NOT NULL
+                    AND NOT EXISTS (SELECT 1 FROM job_companies_stage stage WHERE stage.company = j.company)
+            """), params)
+            conn.execute(text("""
+                INSERT INTO affected_companies
+                SELECT DISTINCT company_id FROM job_companies_stage
+            """))
+            conn.execute(text("DROP TABLE job_companies_stage"))
+
+            if full:
+                conn.execute(text("DELETE FROM gold.companies"))
+            else:
+                conn.execute(text("""
+                    DELETE FROM gold.companies WHERE company_id IN (SELECT company_id FROM affected_companies)
+                """))
+            rewritten = conn.execute(text("""
+                INSERT INTO gold.companies (
+                    company_id, name, spellings, total_jobs, active_jobs, salary_min, salary_max,
+                    avg_salary, cities, city_count, new_jobs_7d, new_jobs_30d, first_seen, last_seen
+                )
+                SELECT
+                    j.company_id,
+                    MODE() WITHIN GROUP (ORDER BY j.company) as name,
+                    COUNT(DISTINCT j.company) as spellings,
+                    COUNT(*) as total_jobs,
+                    COUNT(*) FILTER (WHERE j.is_active = true) as active_jobs,
+                    MIN(j.salary_min) FILTER (WHERE j.is_active = true) as salary_min,
+                    MAX(j.salary_max) FILTER (WHERE j.is_active = true) as salary_max,
+                    AVG((j.salary_min + j.salary_max) / 2) FILTER (WHERE j.is_active = true) as avg_salary,
+                    COALESCE(ARRAY_AGG(DISTINCT j.city || ', ' || j.state_code) FILTER (
+                        WHERE j.is_active = true AND COALESCE(j.city, '') <> '' AND COALESCE(j.state_code, '') <> ''
+                    ), '{}') as cities,
+                    COUNT(DISTINCT j.city || ', ' || j.state_code) FILTER (
+                        WHERE j.is_active = true AND COALESCE(j.city, '') <> '' AND COALESCE(j.state_code, '') <> ''
+                    ) as city_count,
+                    COUNT(*) FILTER (WHERE j.first_seen >= CURRENT_DATE - INTERVAL '7 days') as new_jobs_7d,
+                    COUNT(*) FILTER (WHERE j.first_seen >= CURRENT_DATE - INTERVAL '30 days') as new_jobs_30d,
+                    MIN(j.first_seen) as first_seen,
+                    MAX(j.last_seen) as last_seen
+                FROM silver.jobs_v2 j
+                WHERE j.company_id IN (SELECT company_id FROM affected_companies) AND j.is_duplicate = false
+                GROUP BY j.company_id
+            """)).rowcount
+            conn.execute(text("DROP TABLE affected_companies"))
+
+            # The hiring windows move with the calendar, not with job changes: recount them for every
+            # company (only jobs first seen in the last 30 days are read) and zero the ones that fell out
+            conn.execute(text("""
+                UPDATE gold.companies c
+                SET new_jobs_7d = COALESCE(recent.new_jobs_7d, 0),
+                    new_jobs_30d = COALESCE(recent.new_jobs_30d, 0),
+                    updated_at = CURRENT_TIMESTAMP
+                FROM gold.companies base
+                LEFT JOIN (
+                    SELECT company_id,
+                           COUNT(*) FILTER (WHERE first_seen >= CURRENT_DATE - INTERVAL '7 days') as new_jobs_7d,
+                           COUNT(*) as new_jobs_30d
+                    FROM silver.jobs_v2
+                    WHERE first_seen >= CURRENT_DATE - INTERVAL '30 days'
+                        AND company_id IS NOT NULL AND is_duplicate = false
+                    GROUP BY company_id
+                ) recent ON recent.company_id = base.company_id
+                WHERE c.company_id = base.company_id
+                    AND (c.new_jobs_7d, c.new_jobs_30d)
+                        IS DISTINCT FROM (COALESCE(recent.new_jobs_7d, 0), COALESCE(recent.new_jobs_30d, 0))
+            """))
+
+            conn.execute(text("""
+                INSERT INTO silver.stage_watermarks (stage, watermark)
+                VALUES (:stage, :watermark)
+                ON CONFLICT (stage) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = CURRENT_TIMESTAMP
+            """), {'stage': STAGE, 'watermark': run_started})
+
+    print(f"✅ Assigned company_id to {assigned} jobs, rewrote {rewritten} rows of gold.companies"
+          f"{' (full rebuild)' if full else ''}")
+    return rewritten
@@ -0,0 +1,367 @@
+"""
+Near-duplicate job detection (MinHash + LSH)
+
+The same posting reaches silver.jobs_v2 from Adzuna and JSearch under
+different job_ids, and boards repost it under new ids. Each job's text
+(title, normalized company, and the first DESCRIPTION_WORDS words of the
+description; Adzuna only returns the start of a description, so comparing
+full texts would understate its overlap with JSearch's) is cut into word
+SHINGLE_WORDS-grams, and a NUM_PERM-value MinHash signature estimates the
+Jaccard similarity of two jobs' shingle sets.
+
+Signatures are split into BANDS bands; a band's hash, seeded with the
+job's place (its CBSA, else city and state), is a bucket in
+silver.job_lsh_buckets (sql/11_job_dedup.sql). Only jobs in the same place
+sharing a bucket are compared, so one employer's identical postings in
+Detroit and Chicago stay separate jobs, and a new job costs one indexed
+lookup per band plus a handful of signature comparisons, however much
+history is stored. With 16 bands of 8 rows, pairs at Jaccard 0.8 share a
+bucket ~95% of the time and pairs at 0.4 about 1%
+(scripts/benchmark_dedup.py).
+
+Pairs whose estimated similarity reaches DEDUP_THRESHOLD are linked into
+clusters (silver.jobs_v2.cluster_id). One member per cluster is canonical:
+an Adzuna job if there is one (the gold tables count Adzuna rows), then
+the earliest seen; the rest get is_duplicate = TRUE, which gold counts skip.
+
+dedup_jobs() is incremental: it reads jobs updated since its watermark
+and recomputes signatures only where the text or place hash changed.
+
+    DEDUP_THRESHOLD    min estimated Jaccard similarity to link two jobs (default: 0.8)
+"""
+import os
+import re
+import time
+import zlib
+from itertools import chain
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database.db import get_engine, copy_dataframe, read_sql_chunks
+from transform.industry import normalize_company
+
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DESCRIPTION_WORDS = 50
+STAGE = 'dedup'
+
+# Multiply-shift hash family: h(x) = ((a * x + b) mod 2^64) >> 32, a odd; fixed seed so signatures are stable
+_rng = np.random.default_rng(20261017)
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# shingles hashed per (permutation x shingle) block; bounds memory at NUM_PERM * this * 8 bytes
+_BLOCK_SHINGLES = 50000
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+def _text(value):
+    return value if isinstance(value, str) else ''
+
+def shingles(title, company, description):
+    """crc32 hashes of the word SHINGLE_WORDS-grams of a job's text (set; short texts give their words)"""
+    words = (_WORD.findall(_text(title).lower())
+             + normalize_company(_text(company)).split()
+             + _WORD.findall(_text(description).lower())[:DESCRIPTION_WORDS])
+    if len(words) < SHINGLE_WORDS:
+        grams = words
+    else:
+        grams = (' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1))
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+def minhash_signatures(shingle_sets):
+    """
+    MinHash signatures of a batch of shingle sets, shape (len(shingle_sets), NUM_PERM), dtype uint32
+    Jobs with no shingles get all-max signatures (and are never linked, see link_pairs)
+    """
+    lengths = np.array([len(shingle_set) for shingle_set in shingle_sets], dtype=np.int64)
+    hashes = np.fromiter(chain.from_iterable(shingle_sets), dtype=np.uint64, count=int(lengths.sum()))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    signatures = np.full((len(shingle_sets), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+    jobs = np.flatnonzero(lengths)
+    group_start = 0
+    while group_start < len(jobs):
+        # as many consecutive jobs as fit in one block (at least one)
+        group_end = group_start + 1
+        while group_end < len(jobs) and starts[jobs[group_end]] + lengths[jobs[group_end]] - starts[jobs[group_start]] <= _BLOCK_SHINGLES:
+            group_end += 1
+        group = jobs[group_start:group_end]
+        low, high = starts[group[0]], starts[group[-1]] + lengths[group[-1]]
+        permuted = ((_A[:, None] * hashes[None, low:high] + _B[:, None]) >> np.uint64(32)).astype(np.uint32)
+        signatures[group] = np.minimum.reduceat(permuted, starts[group] - low, axis=1).T
+        group_start = group_end
+    return signatures
+
+def place_key(city, state_code, cbsa_code):
+    """Where a job is, for bucketing: its CBSA code, else "city|state_code" ('' when unknown)"""
+    if _text(cbsa_code):
+        return cbsa_code
+    return f"{_text(city).strip().lower()}|{_text(state_code).upper()}" if _text(city) or _text(state_code) else ''
+
+def band_buckets(signatures, places=None):
+    """
+    LSH bucket of every band of every signature, shape (n, BANDS), dtype int64 (Postgres bigint)
+    places: place_key per signature; jobs in different places never share a bucket
+    """
+    bands = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND).astype(np.uint64)
+    seeds = np.zeros(len(signatures), dtype=np.uint64) if places is None else \
+        np.array([zlib.crc32(place.encode()) for place in places], dtype=np.uint64)
+    buckets = np.repeat(seeds[:, None], BANDS, axis=1)
+    for row in range(ROWS_PER_BAND):
+        buckets = buckets * _BAND_MULTIPLIER + bands[:, :, row] + np.uint64(1)
+    return buckets.view(np.int64)
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity: the share of permutations whose minimums agree"""
+    return float(np.mean(signature_a == signature_b))
+
+def link_pairs(pairs, signatures, threshold=None):
+    """
+    Candidate pairs whose estimated similarity reaches the threshold
+    pairs: iterable of (key_a, key_b); signatures: key -> signature. Returns [(key_a, key_b, similarity)]
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    empty = np.iinfo(np.uint32).max
+    links = []
+    for a, b in pairs:
+        signature_a, signature_b = signatures[a], signatures[b]
+        if signature_a[0] == empty and (signature_a == empty).all():
+            continue
+        score = similarity(signature_a, signature_b)
+        if score >= threshold:
+            links.append((a, b, score))
+    return links
+
+def _find(parent, node):
+    while parent.setdefault(node, node) != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+def _union(parent, a, b):
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a != root_b:
+        parent[root_b] = root_a
+
+def assign_clusters(jobs, links, clusters):
+    """
+    Cluster a chunk of (re-)signatured jobs with the jobs they link to
+
+    Args:
+        jobs: keys of the chunk's jobs (their previous clusters are dropped)
+        links: (key_a, key_b, similarity); at least one side is in jobs
+        clusters: key -> cluster_id of every linked job outside the chunk
+
+    Returns (assignment, merges, singles):
+        assignment: chunk job -> the existing cluster_id it joins
+        merges: absorbed cluster_id -> surviving cluster_id, for clusters this chunk links together
+        singles: groups of chunk jobs linked to no existing cluster (each needs a new cluster_id)
+    """
+    parent = {}
+    for job in jobs:
+        _find(parent, ('job', job))
+    for a, b, _ in links:
+        node_a = ('cluster', clusters[a]) if a in clusters else ('job', a)
+        node_b = ('cluster', clusters[b]) if b in clusters else ('job', b)
+        _union(parent, node_a, node_b)
+
+    components = {}
+    for node in list(parent):
+        components.setdefault(_find(parent, node), []).append(node)
+
+    assignment, merges, singles = {}, {}, []
+    for members in components.values():
+        existing = sorted(cluster for kind, cluster in members if kind == 'cluster')
+        chunk_jobs = [job for kind, job in members if kind == 'job']
+        if existing:
+            for cluster in existing[1:]:
+                merges[cluster] = existing[0]
+            for job in chunk_jobs:
+                assignment[job] = existing[0]
+        elif chunk_jobs:
+            singles.append(chunk_jobs)
+    return assignment, merges, singles
+
+def _dedup_chunk(conn, df):
+    """Signature, index, link and cluster one chunk of new/changed jobs. Returns (links, merged clusters)"""
+    keys = list(zip(df['source'], df['job_id']))
+    signatures = minhash_signatures([shingles(title, company, description) for title, company, description
+                                     in zip(df['title'], df['company'], df['description'])])
+    buckets = band_buckets(signatures, [place_key(city, state_code, cbsa_code) for city, state_code, cbsa_code
+                                        in zip(df['city'], df['state_code'], df['cbsa_code'])])
+
+    # Replace the chunk's signatures and buckets
+    conn.execute(text("DROP TABLE IF EXISTS dedup_jobs_stage"))
+    conn.execute(text("CREATE TEMP TABLE dedup_jobs_stage (source text, job_id text, text_hash text, signature text)"))
+    copy_dataframe(conn, 'dedup_jobs_stage', pd.DataFrame({
+        'source': df['source'], 'job_id': df['job_id'], 'text_hash': df['text_hash'],
+        'signature': [signature.astype('<u4').tobytes().hex() for signature in signatures],
+    }))
+    conn.execute(text("""
+        DELETE FROM silver.job_lsh_buckets b
+        USING dedup_jobs_stage stage
+        WHERE b.source = stage.source AND b.job_id = stage.job_id
+    """))
+    conn.execute(text("""
+        INSERT INTO silver.job_minhash (source, job_id, text_hash, signature)
+        SELECT source, job_id, text_hash, decode(signature, 'hex') FROM dedup_jobs_stage
+        ON CONFLICT (source, job_id) DO UPDATE SET
+            text_hash = EXCLUDED.text_hash,
+            signature = EXCLUDED.signature,
+            updated_at = CURRENT_TIMESTAMP
+    """))
+    conn.execute(text("DROP TABLE IF EXISTS dedup_buckets_stage"))
+    conn.execute(text("CREATE TEMP TABLE dedup_buckets_stage (band smallint, bucket bigint, source text, job_id text)"))
+    copy_dataframe(conn, 'dedup_buckets_stage', pd.DataFrame({
+        'band': np.tile(np.arange(BANDS), len(keys)),
+        'bucket': buckets.ravel(),
+        'source': np.repeat(df['source'].to_numpy(), BANDS),
+        'job_id': np.repeat(df['job_id'].to_numpy(), BANDS),
+    }))
+    conn.execute(text("""
+        INSERT INTO silver.job_lsh_buckets (band, bucket, source, job_id)
+        SELECT band, bucket, source, job_id FROM dedup_buckets_stage
+        ON CONFLICT DO NOTHING
+    """))
+
+    # Candidates: any job sharing a bucket (within the chunk too), with its signature and cluster
+    candidates = conn.execute(text("""
+        SELECT DISTINCT ON (stage.source, stage.job_id, b.source, b.job_id)
+            stage.source, stage.job_id, b.source AS other_source, b.job_id AS other_job_id,
+            m.signature, j.cluster_id
+        FROM dedup_buckets_stage stage
+        JOIN silver.job_lsh_buckets b ON b.band = stage.band AND b.bucket = stage.bucket
+        JOIN silver.job_minhash m ON m.source = b.source AND m.job_id = b.job_id
+        JOIN silver.jobs_v2 j ON j.source = b.source AND j.job_id = b.job_id
+        WHERE (b.source, b.job_id) <> (stage.source, stage.job_id)
+    """)).all()
+    conn.execute(text("DROP TABLE dedup_buckets_stage"))
+    conn.execute(text("DROP TABLE dedup_jobs_stage"))
+
+    chunk = set(keys)
+    signature_of = dict(zip(keys, signatures))
+    clusters = {}
+    pairs = set()
+    for source, job_id, other_source, other_job_id, signature, cluster_id in candidates:
+        key, other = (source, job_id), (other_source, other_job_id)
+        if other in chunk:
+            if key < other:
+                pairs.add((key, other))
+            continue
+        signature_of[other] = np.frombuffer(bytes(signature), dtype='<u4')
+        if cluster_id is not None:
+            clusters[other] = cluster_id
+        pairs.add((key, other))
+    # a linked job outside the chunk that has no cluster yet is clustered along with the chunk
+    links = link_pairs(pairs, signature_of)
+    jobs = keys + sorted({b for _, b, _ in links if b not in chunk and b not in clusters})
+    assignment, merges, singles = assign_clusters(jobs, links, clusters)
+
+    if singles:
+        new_ids = conn.execute(text("""
+            SELECT nextval('silver.job_cluster_seq') FROM generate_series(1, :n)
+        """), {'n': len(singles)}).scalars().all()
+        for component, cluster_id in zip(singles, new_ids):
+            for job in component:
+                assignment[job] = cluster_id
+
+    # Write clusters: the chunk's jobs, then clusters this chunk merged
+    old_clusters = [int(cluster) for cluster in df['cluster_id'].dropna()]
+    conn.execute(text("DROP TABLE IF EXISTS dedup_clusters_stage"))
+    conn.execute(text("CREATE TEMP TABLE dedup_clusters_stage (source text, job_id text, cluster_id bigint)"))
+    copy_dataframe(conn, 'dedup_clusters_stage', pd.DataFrame(
+        [(source, job_id, cluster_id) for (source, job_id), cluster_id in assignment.items()],
+        columns=['source', 'job_id', 'cluster_id']), int_columns=['cluster_id'])
+    conn.execute(text("""
+        UPDATE silver.jobs_v2 j
+        SET cluster_id = stage.cluster_id
+        FROM dedup_clusters_stage stage
+        WHERE j.source = stage.source AND j.job_id = stage.job_id AND j.cluster_id IS DISTINCT FROM stage.cluster_id
+    """))
+    conn.execute(text("DROP TABLE dedup_clusters_stage"))
+    for absorbed, survivor in merges.items():
+        conn.execute(text("UPDATE silver.jobs_v2 SET cluster_id = :survivor WHERE cluster_id = :absorbed"),
+                     {'survivor': survivor, 'absorbed': absorbed})
+
+    # Canonical member of every cluster this chunk touched: an Adzuna job if any (gold counts Adzuna rows),
+    # then earliest first_seen, then source/job_id
+    touched = sorted(set(assignment.values()) | set(old_clusters))
+    conn.execute(text("""
+        UPDATE silver.jobs_v2 j
+        SET is_duplicate = ranked.position > 1
+        FROM (
+            SELECT source, job_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY cluster_id ORDER BY source <> 'adzuna', first_seen, source, job_id
+                ) AS position
+            FROM silver.jobs_v2
+            WHERE cluster_id = ANY(:clusters)
+        ) ranked
+        WHERE j.source = ranked.source AND j.job_id = ranked.job_id
+            AND j.is_duplicate IS DISTINCT FROM (ranked.position > 1)
+    """), {'clusters': touched})
+    return len(links), len(merges)
+
+def dedup_jobs(full=False, chunk_size=None):
+    """
+    Link near-duplicate jobs in silver.jobs_v2 into clusters and flag all but one member as is_duplicate
+    Only jobs updated since the last run whose title/company/description or place changed are (re-)signatured
+    full: drop every signature, bucket and cluster and rebuild from scratch
+    Returns the number of jobs signatured
+    """
+    engine = get_engine()
+    with engine.connect() as conn:
+        run_started = conn.execute(text("SELECT CURRENT_TIMESTAMP")).scalar()
+        since = None if full else conn.execute(text("""
+            SELECT watermark FROM silver.stage_watermarks WHERE stage = :stage
+        """), {'stage': STAGE}).scalar()
+
+    if full:
+        with engine.begin() as conn:
+            conn.execute(text("TRUNCATE silver.job_lsh_buckets, silver.job_minhash"))
+            conn.execute(text("""
+                UPDATE silver.jobs_v2 SET cluster_id = NULL, is_duplicate = FALSE
+                WHERE cluster_id IS NOT NULL OR is_duplicate
+            """))
+
+    query = f"""
+        SELECT j.source, j.job_id, j.title, j.company, j.description, j.city, j.state_code, j.cbsa_code,
+               j.cluster_id, t.text_hash
+        FROM silver.jobs_v2 j
+        CROSS JOIN LATERAL (
+            SELECT md5(concat_ws('|', j.title, j.company, j.description, j.city, j.state_code, j.cbsa_code)) AS text_hash
+        ) t
+        LEFT JOIN silver.job_minhash m ON m.source = j.source AND m.job_id = j.job_id
+        WHERE {'TRUE' if since is None else 'j.updated_at > :since'}
+            AND (m.job_id IS NULL OR m.text_hash <> t.text_hash)
+        ORDER BY j.first_seen, j.source, j.job_id
+    """
+
+    processed = links = merged = 0
+    started = time.perf_counter()
+    for df in read_sql_chunks(query, {'since': since}, chunk_size=chunk_size, engine=engine):
+        # One transaction per chunk (the engine autocommits), so a chunk's index and clusters land together
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="READ COMMITTED")
+            with conn.begin():
+                chunk_links, chunk_merges = _dedup_chunk(conn, df)
+        processed += len(df)
+        links += chunk_links
+        merged += chunk_merges
+        print(f"  Signatured {processed} jobs...")
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO silver.stage_watermarks (stage, watermark)
+            VALUES (:stage, :watermark)
+            ON CONFLICT (stage) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = CURRENT_TIMESTAMP
+        """), {'stage': STAGE, 'watermark': run_started})
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Dedup: signatured {processed} new/changed jobs, {links} duplicate links, {merged} clusters merged "
+          f"({processed / elapsed if elapsed else 0:,.0f} jobs/s){' (full rebuild)' if full else ''}")
+    return processed
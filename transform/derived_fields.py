@@ -0,0 +1,308 @@
+"""
+Registry of the derived columns of silver.jobs_v2
+
+Each derived field declares the silver columns it is computed from, a
+version, and a batch function. Every write stamps the row's
+derived_state (sql/7_derived_field_state.sql) with, per field,
+"<version>:<md5 of its input values>". A field is stale for a row when its
+stamp doesn't match, which happens when:
+
+    - its version was bumped (classifier rules changed), or
+    - one of its inputs changed in place (e.g. descriptions were backfilled)
+
+recompute_stale_fields() finds the stale (row, field) pairs in SQL and
+recomputes only those fields, in batch, for only those rows. Finding them
+doesn't hash the whole table: every write bumps updated_at, so only rows
+updated since the last pass (its watermark in silver.stage_watermarks) can
+have new inputs, and only a field whose version differs from the one the
+last pass recorded (silver.derived_field_versions, sql/12_*.sql) is checked
+on every row. Every enrichment run calls it before the gold aggregations
+(update_gold_aggregations), so a version bump takes effect on the next
+--enrich-jobs; --recompute-fields runs it on its own (--reenrich: check
+every row). Bump a field's version when its classifier changes. Bump ENRICHMENT_VERSION
+(transform/enrich_batch.py) only when payload parsing changes.
+"""
+import json
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database.db import get_engine, get_stream_chunk_size, copy_dataframe
+from transform.utils import yoe_seniority
+from transform.geo import resolve_cbsa_codes, assign_places
+from transform.industry import classify_industries
+from transform.keywords import classify_texts
+from transform.requirements import extract_requirements
+
+# silver.stage_watermarks row of the stale-field pass
+STAGE = 'derived_fields'
+
+def classify_seniority(title_seniority, salary_min, salary_max, yoe_min):
+    """
+    Vectorized categorize_role: title tag, else salary band, else description YOE, else 'mid'
+    title_seniority: per-row title labels from classify_texts (None where the title has no tag)
+    yoe_min: per-row years of experience from extract_requirements (None where not stated)
+    """
+    seniority = pd.Series(title_seniority, dtype=object)
+    salary_min = pd.to_numeric(salary_min).fillna(0).to_numpy()
+    salary_max = pd.to_numeric(salary_max).fillna(0).to_numpy()
+
+    has_salary = seniority.isna().to_numpy() & (salary_min != 0) & (salary_max != 0)
+    salary_band = np.select([salary_min < 74000, salary_min > 100000], ['jr', 'sr'], default='mid')
+    seniority[has_salary] = salary_band[has_salary]
+
+    needs_yoe = seniority.isna().to_numpy()
+    seniority[needs_yoe] = [yoe_seniority(years) for years in np.asarray(yoe_min, dtype=object)[needs_yoe]]
+    return seniority.where(seniority.notna(), 'mid').to_numpy()
+
+# Intermediates shared by several fields, computed at most once per batch
+def _labels(df, cache):
+    if 'labels' not in cache:
+        cache['labels'] = classify_texts(df['title'].fillna('').astype(str), df['description'].fillna('').astype(str))
+    return cache['labels']
+
+def _requirements(df, cache):
+    if 'requirements' not in cache:
+        cache['requirements'] = extract_requirements(df['description'].fillna('').astype(str))
+    return cache['requirements']
+
+def _seniority(df, cache):
+    return classify_seniority(_labels(df, cache)['seniority'], df['salary_min'], df['salary_max'],
+                              _requirements(df, cache)['yoe_min'])
+
+def _cbsa_code(df, cache):
+    codes = pd.Series(resolve_cbsa_codes(df['city'], df['state_code'], df['county']), index=df.index, dtype=object)
+    # outside the name gazetteer: nearest place to the coordinates
+    unresolved = codes.isna().to_numpy()
+    if unresolved.any():
+        places = assign_places(df['latitude'].to_numpy()[unresolved], df['longitude'].to_numpy()[unresolved])
+        codes[unresolved] = places['cbsa_code'].to_numpy()
+    return codes.to_numpy()
+
+# field -> silver input columns (in hashing order), version, batch function (df, cache) -> one value per row
+DERIVED_FIELDS = {
+    'seniority': {
+        'inputs': ['title', 'description', 'salary_min', 'salary_max'], 'version': 2, 'compute': _seniority,
+    },
+    'is_remote': {
+        'inputs': ['title', 'description'], 'version': 1,
+        'compute': lambda df, cache: np.array(_labels(df, cache)['is_remote'], dtype=bool),
+    },
+    'industry': {
+        'inputs': ['title', 'company', 'category_label'], 'version': 3,
+        'compute': lambda df, cache: classify_industries(df['title'], df['company'], df['category_label']),
+    },
+    'job_type': {
+        'inputs': ['title', 'description'], 'version': 1,
+        'compute': lambda df, cache: _labels(df, cache)['job_type'],
+    },
+    'yoe_min': {
+        'inputs': ['description'], 'version': 1,
+        'compute': lambda df, cache: _requirements(df, cache)['yoe_min'].to_numpy(),
+    },
+    'education': {
+        'inputs': ['description'], 'version': 2,
+        'compute': lambda df, cache: _requirements(df, cache)['education'].to_numpy(),
+    },
+    'cbsa_code': {
+        'inputs': ['city', 'county', 'state_code', 'latitude', 'longitude'], 'version': 3, 'compute': _cbsa_code,
+    },
+}
+
+def compute_fields(df, fields):
+    """
+    Compute the given derived fields for a batch; df needs the union of their input columns
+    Returns a DataFrame with one column per field on df's index
+    """
+    cache = {}
+    return pd.DataFrame({field: DERIVED_FIELDS[field]['compute'](df, cache) for field in fields}, index=df.index)
+
+def field_stamp_sql(field, alias, column_aliases=None):
+    """
+    SQL for a field's stamp computed from the input columns of `alias`: '<version>:<md5 of inputs>'
+    column_aliases: {column: alias} for inputs read from another relation (e.g. the new values in an UPDATE's stage)
+    """
+    definition = DERIVED_FIELDS[field]
+    column_aliases = column_aliases or {}
+    inputs = ', '.join(f"{column_aliases.get(column, alias)}.{column}" for column in definition['inputs'])
+    return f"'{definition['version']}:' || md5(jsonb_build_array({inputs})::text)"
+
+def derived_state_sql(alias, fields=None, column_aliases=None):
+    """SQL for a derived_state object stamping `fields` (default: all) from the columns of `alias` (see field_stamp_sql)"""
+    pairs = ', '.join(f"'{field}', {field_stamp_sql(field, alias, column_aliases)}" for field in fields or DERIVED_FIELDS)
+    return f"jsonb_build_object({pairs})"
+
+def stale_sql(field, alias='s'):
+    """SQL condition: the row's value of `field` is out of date"""
+    return f"({alias}.derived_state->>'{field}' IS DISTINCT FROM {field_stamp_sql(field, alias)})"
+
+def stale_scope(fields, full=False):
+    """
+    Which rows a stale-field pass has to hash, (since, rescan):
+        since: the 'derived_fields' watermark; rows not updated after it were stamped by an earlier pass
+               or write and can only have gone stale through a version bump (None: first pass, or full)
+        rescan: fields whose registry version differs from the one the last pass recorded in
+                silver.derived_field_versions; only these are checked on every row
+    """
+    with get_engine().connect() as conn:
+        since = None if full else conn.execute(text("""
+            SELECT watermark FROM silver.stage_watermarks WHERE stage = :stage
+        """), {'stage': STAGE}).scalar()
+        recorded = dict(conn.execute(text("SELECT field, version FROM silver.derived_field_versions")).all())
+    rescan = {field for field in fields if recorded.get(field) != DERIVED_FIELDS[field]['version']}
+    return since, rescan
+
+def scoped_stale_sql(field, since, rescan, alias='s'):
+    """stale_sql, limited to rows updated after :since unless the field is rescanned (or there is no watermark)"""
+    if since is None or field in rescan:
+        return stale_sql(field, alias)
+    return f"({alias}.updated_at > :since AND {stale_sql(field, alias)})"
+
+def scope_sql(fields, since, rescan, alias='s'):
+    """Row filter of a pass: nothing to rescan reads only the rows updated since the watermark (idx_jobs_v2_updated_at)"""
+    return f"{alias}.updated_at > :since" if since is not None and not rescan & set(fields) else "TRUE"
+
+def count_stale_fields(fields=None, since=None, rescan=None):
+    """
+    Number of rows with each field stale, {field: rows}
+    since/rescan: see stale_scope (default: check every row)
+    """
+    fields = list(fields or DERIVED_FIELDS)
+    rescan = set(fields) if rescan is None else rescan
+    with get_engine().connect() as conn:
+        counts = conn.execute(text(f"""
+            SELECT {', '.join(f'COUNT(*) FILTER (WHERE {scoped_stale_sql(field, since, rescan)}) AS {field}' for field in fields)}
+            FROM silver.jobs_v2 s
+            WHERE {scope_sql(fields, since, rescan)}
+        """), {'since': since}).one()
+    return dict(zip(fields, counts))
+
+def record_stale_pass(fields, run_started):
+    """
+    After a completed pass: record the fields' registry versions, and move the watermark to the
+    pass's start when every registered field was checked (a partial pass leaves it where it was)
+    """
+    with get_engine().begin() as conn:
+        for field in fields:
+            conn.execute(text("""
+                INSERT INTO silver.derived_field_versions (field, version)
+                VALUES (:field, :version)
+                ON CONFLICT (field) DO UPDATE SET version = EXCLUDED.version, updated_at = CURRENT_TIMESTAMP
+            """), {'field': field, 'version': DERIVED_FIELDS[field]['version']})
+        if set(fields) == DERIVED_FIELDS.keys():
+            conn.execute(text("""
+                INSERT INTO silver.stage_watermarks (stage, watermark)
+                VALUES (:stage, :watermark)
+                ON CONFLICT (stage) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = CURRENT_TIMESTAMP
+            """), {'stage': STAGE, 'watermark': run_started})
+
+def recompute_stale_fields(fields=None, chunk_size=None, dry_run=False, full=False):
+    """
+    Recompute only the stale derived fields of silver.jobs_v2, only for the rows where they are stale
+    Only rows updated since the last pass are hashed, plus every row for fields whose version was bumped
+    (see stale_scope)
+
+    Args:
+        fields: fields to consider (default: every registered field)
+        chunk_size: rows per keyset chunk (default: STREAM_CHUNK_SIZE)
+        dry_run: only count the stale rows per field
+        full: check every row for every field
+    Returns {field: rows recomputed} ({field: rows stale} on a dry run)
+    """
+    fields = list(fields or DERIVED_FIELDS)
+    unknown = set(fields) - DERIVED_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown derived field(s): {', '.join(sorted(unknown))}")
+
+    with get_engine().connect() as conn:
+        run_started = conn.execute(text("SELECT CURRENT_TIMESTAMP")).scalar()
+    since, rescan = stale_scope(fields, full=full)
+    stale_counts = count_stale_fields(fields, since, rescan)
+    print(f"🔎 Stale derived fields in silver.jobs_v2 (rows updated since {since or 'ever'}, "
+          f"every row for: {', '.join(sorted(rescan & set(fields))) or 'none'}):")
+    for field, count in stale_counts.items():
+        print(f"  {field:<12} v{DERIVED_FIELDS[field]['version']}  {count} rows")
+    if dry_run:
+        print(f"\n🚫 DRY RUN MODE - No changes made to database")
+        return stale_counts
+    checked = fields
+    fields = [field for field in fields if stale_counts[field]]
+    if not fields:
+        record_stale_pass(checked, run_started)
+        print("✅ All derived fields are up to date")
+        return stale_counts
+
+    chunk_size = chunk_size or get_stream_chunk_size()
+    inputs = list(dict.fromkeys(column for field in fields for column in DERIVED_FIELDS[field]['inputs']))
+    query = text(f"""
+        SELECT s.source, s.job_id,
+               {', '.join(f's.{column}' for column in inputs)},
+               {', '.join(f'{field_stamp_sql(field, "s")} AS {field}__stamp' for field in fields)},
+               {', '.join(f'{scoped_stale_sql(field, since, rescan)} AS {field}__stale' for field in fields)}
+        FROM silver.jobs_v2 s
+        WHERE {scope_sql(fields, since, rescan)}
+            AND ({' OR '.join(scoped_stale_sql(field, since, rescan) for field in fields)})
+            AND (s.source, s.job_id) > (:last_source, :last_job_id)
+        ORDER BY s.source, s.job_id
+        LIMIT :chunk_size
+    """)
+    updates = ',\n                '.join(f"{field} = CASE WHEN stage.stamps ? '{field}' THEN stage.{field} ELSE s.{field} END"
+                                        for field in fields)
+
+    engine = get_engine()
+    recomputed = dict.fromkeys(fields, 0)
+    last_key = ('', '')
+    while True:
+        with engine.connect() as conn:
+            df = pd.read_sql(query, conn, params={'last_source': last_key[0], 'last_job_id': last_key[1],
+                                                  'chunk_size': chunk_size, 'since': since})
+        if df.empty:
+            break
+        if 'salary_min' in df:
+            df['salary_min'] = pd.to_numeric(df['salary_min'])
+            df['salary_max'] = pd.to_numeric(df['salary_max'])
+
+        # rows needing the same set of fields are computed together, so shared scans run once per group
+        groups = {}
+        for i, row in zip(df.index, df[[f"{field}__stale" for field in fields]].to_numpy(dtype=bool)):
+            groups.setdefault(tuple(field for field, is_stale in zip(fields, row) if is_stale), []).append(i)
+        stage = pd.DataFrame({'source': df['source'], 'job_id': df['job_id'],
+                              **{field: pd.Series(None, index=df.index, dtype=object) for field in fields}})
+        stamps = {i: {} for i in df.index}
+        for group_fields, index in groups.items():
+            values = compute_fields(df.loc[index], group_fields)
+            for field in group_fields:
+                stage.loc[index, field] = pd.Series(list(values[field]), index=index, dtype=object)
+                recomputed[field] += len(index)
+                for i in index:
+                    stamps[i][field] = df.at[i, f"{field}__stamp"]
+        stage['stamps'] = [json.dumps(stamps[i]) for i in df.index]
+
+        # one real transaction (the engine autocommits): values and their stamps land together
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="READ COMMITTED")
+            with conn.begin():
+                conn.execute(text("DROP TABLE IF EXISTS derived_fields_stage"))
+                conn.execute(text(f"""
+                    CREATE TEMP TABLE derived_fields_stage AS
+                    SELECT source, job_id, {', '.join(fields)}, '{{}}'::jsonb AS stamps
+                    FROM silver.jobs_v2 WITH NO DATA
+                """))
+                copy_dataframe(conn, 'derived_fields_stage', stage, int_columns=['yoe_min'] if 'yoe_min' in fields else [])
+                conn.execute(text(f"""
+                    UPDATE silver.jobs_v2 s
+                    SET {updates},
+                        derived_state = s.derived_state || stage.stamps,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM derived_fields_stage stage
+                    WHERE s.source = stage.source AND s.job_id = stage.job_id
+                """))
+                conn.execute(text("DROP TABLE derived_fields_stage"))
+
+        last_key = (df['source'].iat[-1], df['job_id'].iat[-1])
+        print(f"  Recomputed {', '.join(f'{field}={count}' for field, count in recomputed.items())}")
+        if len(df) < chunk_size:
+            break
+
+    record_stale_pass(checked, run_started)
+    print(f"✅ Recomputed stale derived fields: {recomputed}")
+    return recomputed
@@ -3,30 +3,18 @@ V2 Enrichment for Adzuna jobs
 Processes jobs from bronze.raw_jobs to silver.jobs_v2
 Includes gold schema aggregations
 """
-from transform.utils import get_is_remote, get_industry, get_job_type, get_yoe, get_education, categorize_role, get_cbsa_code
-from datetime import datetime, timezone, date
+from transform.utils import get_is_remote, get_industry, get_job_type, get_yoe, get_education, categorize_role, get_cbsa_code, US_STATE_ABBREV
+from transform.enrich_batch import enrich_adzuna_batch, ENRICHED_COLUMNS, ENRICHMENT_VERSION
+from transform.derived_fields import derived_state_sql, recompute_stale_fields
+from transform.geo import refresh_city_mapping, nearest_place, STATE_NAMES
+from transform.companies import refresh_companies
+from transform.dedup import dedup_jobs
+from datetime import datetime, date
 import json
-import pandas as pd
-from database.db import get_engine
+import time
+from database.db import get_engine, copy_dataframe, read_sql_chunks
 from sqlalchemy import text
 
-US_STATE_ABBREV = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR',
-    'California': 'CA', 'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE',
-    'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID',
-    'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS',
-    'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
-    'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
-    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM',
-    'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND',
-    'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
-    'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
-    'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV',
-    'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC',
-}
-
 def enrich_adzuna_job_v2(raw_job_record):
     """Enrich a single Adzuna job for v2 schema"""
     
@@ -44,6 +32,17 @@ def enrich_adzuna_job_v2(raw_job_record):
     state_full = area[1] if len(area) >= 2 else ''
     state_code = US_STATE_ABBREV.get(state_full, '')
     
+    # Coordinates are top-level in Adzuna results (location.* kept as a fallback)
+    latitude = job.get('latitude') if job.get('latitude') is not None else location.get('latitude')
+    longitude = job.get('longitude') if job.get('longitude') is not None else location.get('longitude')
+    
+    # No city in the area array: nearest place to the coordinates (same state only)
+    if not city and latitude is not None and longitude is not None:
+        place = nearest_place(latitude, longitude)
+        if place and state_code in ('', place[1]):
+            city, state_code = place[0], place[1]
+            state_full = state_full or STATE_NAMES.get(state_code, '')
+    
     company = job.get('company', {}).get('display_name', '')
     category = job.get('category', {})
     category_tag = category.get('tag', '')
@@ -61,10 +60,6 @@ def enrich_adzuna_job_v2(raw_job_record):
         except:
             pass
     
-    # Get coordinates
-    latitude = location.get('latitude')
-    longitude = location.get('longitude')
-    
     return {
         'source': 'adzuna',
         'job_id': raw_job_record['job_id'],
@@ -78,7 +73,7 @@ def enrich_adzuna_job_v2(raw_job_record):
         'county': county,
         'state': state_full,
         'state_code': state_code,
-        'cbsa_code': get_cbsa_code(f"{city}, {state_code}") if city and state_code else None,
+        'cbsa_code': get_cbsa_code(f"{city}, {state_code}", county, latitude, longitude),
         
         # Categories
         'category': category_tag,
@@ -108,52 +103,157 @@ def enrich_adzuna_job_v2(raw_job_record):
         'seniority': categorize_role(title, description, salary_min, salary_max, city),
         'is_remote': get_is_remote(title, description),
         'industry': get_industry(title, company, category_label),
-        'job_type': get_job_type(description),
+        'job_type': get_job_type(title, description),
         'yoe_min': get_yoe(description),
         'education': get_education(description),
     }
 
-def run_adzuna_enrichment_v2():
-    """Process new/updated jobs from bronze.raw_jobs to silver.jobs_v2"""
+# Written alongside the enriched fields so unchanged payloads can skip enrichment next time
+CACHE_COLUMNS = ['payload_hash', 'enrichment_version']
+
+# Bronze rows that need a full enrichment (r = bronze.raw_jobs, s = silver.jobs_v2)
+NEEDS_ENRICHMENT = """
+    s.job_id IS NULL  -- New jobs
+    OR s.enrichment_version IS DISTINCT FROM :enrichment_version  -- Enriched by older classifiers
+    OR (r.last_seen > s.last_seen  -- Updated jobs whose payload changed (or has no hash)
+        AND (r.payload_hash IS NULL OR r.payload_hash IS DISTINCT FROM s.payload_hash))
+"""
+
+# Seen again with a byte-identical payload: only the lifecycle fields change
+UNCHANGED = """
+    r.last_seen > s.last_seen
+    AND r.payload_hash = s.payload_hash
+    AND s.enrichment_version = :enrichment_version
+"""
+
+def pending_jobs_condition(full=False):
+    """WHERE clause for the bronze rows to enrich (every Adzuna row with full=True)"""
+    if full:
+        return "r.source = 'adzuna'"
+    return f"r.source = 'adzuna' AND ({NEEDS_ENRICHMENT})"
+
+def upsert_silver_jobs_bulk(df_enriched, payload_hashes=None):
+    """
+    Set-based upsert of an enriched batch into silver.jobs_v2
+    COPYs the batch into a temp table (NaN -> NULL for the whole frame) and merges it
+    with one INSERT ... ON CONFLICT, instead of one statement per row
+    payload_hashes: bronze payload_hash per row (positional), stored with ENRICHMENT_VERSION
+    Returns the number of rows written
+    """
+    if df_enriched.empty:
+        return 0
+    
+    silver_columns = ENRICHED_COLUMNS + CACHE_COLUMNS
+    df_silver = df_enriched[ENRICHED_COLUMNS].assign(
+        payload_hash=list(payload_hashes) if payload_hashes is not None else None,
+        enrichment_version=ENRICHMENT_VERSION
+    )
+    
+    columns = ', '.join(silver_columns)
+    updates = ',\n                '.join(f"{column} = EXCLUDED.{column}"
+                                        for column in silver_columns if column not in ('source', 'job_id', 'first_seen'))
     
     engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS jobs_v2_stage"))
+        conn.execute(text("CREATE TEMP TABLE jobs_v2_stage (LIKE silver.jobs_v2 INCLUDING DEFAULTS)"))
+        copy_dataframe(conn, 'jobs_v2_stage', df_silver, int_columns=['times_seen', 'yoe_min', 'enrichment_version'])
+        
+        # every derived field was just computed from this row's inputs: stamp them all
+        result = conn.execute(text(f"""
+            INSERT INTO silver.jobs_v2 ({columns}, derived_state)
+            SELECT {columns}, {derived_state_sql('jobs_v2_stage')}
+            FROM jobs_v2_stage
+            ON CONFLICT (source, job_id) DO UPDATE SET
+                {updates},
+                derived_state = EXCLUDED.derived_state,
+                updated_at = CURRENT_TIMESTAMP
+        """))
+        
+        conn.execute(text("DROP TABLE jobs_v2_stage"))
     
-    # First, check if there are any jobs to process
-    check_query = """
-    SELECT COUNT(*) as jobs_to_process
-    FROM bronze.raw_jobs r
-    LEFT JOIN silver.jobs_v2 s 
-        ON s.source = r.source AND s.job_id = r.job_id
-    WHERE r.source = 'adzuna'
-        AND (
-            s.job_id IS NULL  -- New jobs
-            OR r.last_seen > s.last_seen  -- Updated jobs
-        )
+    return result.rowcount
+
+def touch_unchanged_jobs(conn, today=None):
+    """
+    Touch path for jobs seen again with an unchanged payload (and current ENRICHMENT_VERSION):
+    copy last_seen/times_seen from bronze and recompute is_active in one UPDATE, no re-enrichment
+    Returns the number of jobs touched
+    """
+    result = conn.execute(text(f"""
+        UPDATE silver.jobs_v2 s
+        SET last_seen = r.last_seen,
+            times_seen = r.times_seen,
+            is_active = (r.last_seen = :today),
+            updated_at = CURRENT_TIMESTAMP
+        FROM bronze.raw_jobs r
+        WHERE r.source = 'adzuna'
+            AND s.source = r.source
+            AND s.job_id = r.job_id
+            AND {UNCHANGED}
+    """), {'today': today or date.today(), 'enrichment_version': ENRICHMENT_VERSION})
+    return result.rowcount
+
+def prepare_enrichment_run(engine, full=False):
+    """
+    Start an enrichment run: count the work, mark jobs inactive, take the touch path for unchanged jobs
+    Returns the number of jobs that need full enrichment, or None if there is nothing to do at all
     """
-    
     with engine.connect() as conn:
-        result = conn.execute(text(check_query))
-        jobs_to_process = result.scalar()
+        counts = conn.execute(text(f"""
+            SELECT
+                COUNT(*) FILTER (WHERE {pending_jobs_condition(full)}) AS to_enrich,
+                COUNT(*) FILTER (WHERE s.job_id IS NOT NULL AND {UNCHANGED}) AS to_touch
+            FROM bronze.raw_jobs r
+            LEFT JOIN silver.jobs_v2 s
+                ON s.source = r.source AND s.job_id = r.job_id
+            WHERE r.source = 'adzuna'
+        """), {'enrichment_version': ENRICHMENT_VERSION}).one()
     
-    if jobs_to_process == 0:
+    to_touch = 0 if full else counts.to_touch
+    if counts.to_enrich == 0 and to_touch == 0:
         print('No new Adzuna jobs to enrich for v2')
-        return
+        return None
     
-    print(f"Found {jobs_to_process} jobs to process for v2")
+    print(f"Found {counts.to_enrich} jobs to enrich and {to_touch} unchanged jobs to touch for v2")
     
     # Only mark jobs inactive if we actually have work to do
+    # (updated_at moves with is_active so incremental stages like refresh_companies see expired jobs)
     with engine.begin() as conn:
         conn.execute(text("""
             UPDATE silver.jobs_v2 
-            SET is_active = FALSE 
+            SET is_active = FALSE,
+                updated_at = CURRENT_TIMESTAMP
             WHERE source = 'adzuna' AND is_active = TRUE
         """))
+        if to_touch:
+            touched = touch_unchanged_jobs(conn)
+            print(f"👆 Touched {touched} unchanged jobs (last_seen/times_seen/is_active only)")
+    
+    return counts.to_enrich
+
+def run_adzuna_enrichment_v2(chunk_size=None):
+    """
+    Process new/updated jobs from bronze.raw_jobs to silver.jobs_v2
+    Pending rows are streamed in chunks of chunk_size (default: STREAM_CHUNK_SIZE),
+    each enriched and written before the next is read, so memory stays flat
+    """
+    
+    engine = get_engine()
+    
+    to_enrich = prepare_enrichment_run(engine)
+    if to_enrich is None:
+        return
+    if to_enrich == 0:
+        update_gold_aggregations()
+        return
     
     # Get jobs that need processing
-    query = """
+    query = text(f"""
     SELECT 
         r.job_id,
         r.payload,
+        r.payload_hash,
         r.first_seen,
         r.last_seen,
         r.times_seen
@@ -161,89 +261,29 @@ def run_adzuna_enrichment_v2():
     LEFT JOIN silver.jobs_v2 s 
         ON s.source = r.source 
         AND s.job_id = r.job_id
-    WHERE r.source = 'adzuna'
-        AND (
-            s.job_id IS NULL  -- New jobs
-            OR r.last_seen > s.last_seen  -- Updated jobs
-        )
-    """
-    
-    df_raw = pd.read_sql(query, engine)
-    
-    if df_raw.empty:
-        print('No new Adzuna jobs to enrich for v2')
-        return
-    
-    print(f"Found {len(df_raw)} jobs to process for v2")
+    WHERE {pending_jobs_condition()}
+    """)
     
-    # Enrich all jobs
-    enriched = []
-    for _, row in df_raw.iterrows():
-        try:
-            enriched_job = enrich_adzuna_job_v2(row.to_dict())
-            enriched.append(enriched_job)
-        except Exception as e:
-            print(f"Error enriching job {row['job_id']}: {e}")
-            continue
-    
-    if not enriched:
-        print("No jobs successfully enriched")
-        return
+    processed = 0
+    enrich_seconds = 0.0
+    write_seconds = 0.0
+    for df_raw in read_sql_chunks(query, {'enrichment_version': ENRICHMENT_VERSION}, chunk_size=chunk_size, engine=engine):
+        # Enrich the whole chunk at once (see transform/enrich_batch.py)
+        started = time.perf_counter()
+        df_enriched = enrich_adzuna_batch(df_raw)
+        enrich_seconds += time.perf_counter() - started
         
-    df_enriched = pd.DataFrame(enriched)
-    
-    # Upsert into silver.jobs_v2
-    with engine.begin() as conn:
-        for _, job in df_enriched.iterrows():
-            # Convert job to dict and remove NaN values
-            job_dict = job.where(pd.notnull(job), None).to_dict()
-            
-            # Build the upsert query
-            conn.execute(text("""
-                INSERT INTO silver.jobs_v2 (
-                    source, job_id, title, description, company, location, city, county, state, 
-                    state_code, cbsa_code, category, category_label, salary_min, 
-                    salary_max, post_date, first_seen, last_seen, times_seen, 
-                    is_active, url, latitude, longitude, seniority, is_remote, 
-                    industry, job_type, yoe_min, education
-                ) VALUES (
-                    :source, :job_id, :title, :description, :company, :location, :city, :county, 
-                    :state, :state_code, :cbsa_code, :category, :category_label, 
-                    :salary_min, :salary_max, :post_date, :first_seen, :last_seen, 
-                    :times_seen, :is_active, :url, :latitude, :longitude, :seniority, 
-                    :is_remote, :industry, :job_type, :yoe_min, :education
-                )
-                ON CONFLICT (source, job_id) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    description = EXCLUDED.description,
-                    company = EXCLUDED.company,
-                    location = EXCLUDED.location,
-                    city = EXCLUDED.city,
-                    county = EXCLUDED.county,
-                    state = EXCLUDED.state,
-                    state_code = EXCLUDED.state_code,
-                    cbsa_code = EXCLUDED.cbsa_code,
-                    category = EXCLUDED.category,
-                    category_label = EXCLUDED.category_label,
-                    salary_min = EXCLUDED.salary_min,
-                    salary_max = EXCLUDED.salary_max,
-                    post_date = EXCLUDED.post_date,
-                    last_seen = EXCLUDED.last_seen,
-                    times_seen = EXCLUDED.times_seen,
-                    is_active = EXCLUDED.is_active,
-                    url = EXCLUDED.url,
-                    latitude = EXCLUDED.latitude,
-                    longitude = EXCLUDED.longitude,
-                    seniority = EXCLUDED.seniority,
-                    is_remote = EXCLUDED.is_remote,
-                    industry = EXCLUDED.industry,
-                    job_type = EXCLUDED.job_type,
-                    yoe_min = EXCLUDED.yoe_min,
-                    education = EXCLUDED.education,
-                    updated_at = CURRENT_TIMESTAMP
-            """), job_dict)
+        # One COPY + one upsert per chunk
+        started = time.perf_counter()
+        upsert_silver_jobs_bulk(df_enriched, df_raw['payload_hash'])
+        write_seconds += time.perf_counter() - started
+        
+        processed += len(df_enriched)
+        print(f"  Processed {processed}/{to_enrich} jobs...")
     
-    print(f'✅ Processed {len(df_enriched)} jobs into silver.jobs_v2')
+    print(f'✅ Processed {processed} jobs into silver.jobs_v2 '
+          f'(enrich {processed / enrich_seconds if enrich_seconds else 0:,.0f} rows/s, '
+          f'write {processed / write_seconds if write_seconds else 0:,.0f} rows/s)')
     
     # Update gold schema aggregations
     update_gold_aggregations()
@@ -251,6 +291,12 @@ def run_adzuna_enrichment_v2():
 def update_gold_aggregations():
     """Update gold schema aggregations after enrichment"""
     
+    # Fields whose classifier version was bumped (or whose inputs changed) before anything reads them
+    recompute_stale_fields()
+    
+    # Link near-duplicate postings first: gold counts skip is_duplicate rows
+    dedup_jobs()
+    
     engine = get_engine()
     run_date = date.today()
     
@@ -282,7 +328,7 @@ def update_gold_aggregations():
                 COUNT(*) FILTER (WHERE seniority = 'mid') as mid_jobs,
                 COUNT(*) FILTER (WHERE seniority = 'sr') as senior_jobs
             FROM silver.jobs_v2
-            WHERE source = 'adzuna'
+            WHERE source = 'adzuna' AND is_duplicate = false
             GROUP BY city, state_code
             ON CONFLICT (city, state, run_date) DO UPDATE SET
                 total_jobs = EXCLUDED.total_jobs,
@@ -335,15 +381,15 @@ def update_gold_aggregations():
                     FROM (
                         SELECT category_label, COUNT(*) as cnt
                         FROM silver.jobs_v2
-                        WHERE city = j.city AND state_code = j.state_code
-                            AND is_active = true AND category_label IS NOT NULL
+                        WHERE source = 'adzuna' AND city = j.city AND state_code = j.state_code
+                            AND is_active = true AND is_duplicate = false AND category_label IS NOT NULL
                         GROUP BY category_label
                         ORDER BY cnt DESC
                         LIMIT 5
                     ) top_cats
                 ) as top_categories
             FROM silver.jobs_v2 j
-            WHERE j.source = 'adzuna'
+            WHERE j.source = 'adzuna' AND j.is_duplicate = false
             GROUP BY j.city, j.state_code
             ON CONFLICT (city, state) DO UPDATE SET
                 active_jobs = EXCLUDED.active_jobs,
@@ -355,6 +401,29 @@ def update_gold_aggregations():
                 top_categories = EXCLUDED.top_categories,
                 last_updated = CURRENT_TIMESTAMP
         """))
+    
+    # Housing side: city -> CBSA -> latest Zillow rent, via the materialized mapping
+    refresh_city_mapping()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE gold.latest_city_snapshot g
+            SET zori_latest = h.metric_value_latest,
+                zori_date = h.date_recorded::date,
+                salary_to_rent_ratio = g.avg_salary / NULLIF(h.metric_value_latest, 0),
+                last_updated = CURRENT_TIMESTAMP
+            FROM gold.city_mapping m
+            JOIN LATERAL (
+                SELECT metric_value_latest, date_recorded
+                FROM silver.housing_metrics
+                WHERE cbsa_code = m.cbsa_code AND metric_type = 'rent_index_latest'
+                ORDER BY processed_at DESC
+                LIMIT 1
+            ) h ON TRUE
+            WHERE m.city = g.city AND m.state_code = g.state
+        """))
+    
+    # Company entities and gold.companies, from only the jobs changed since the last refresh
+    refresh_companies()
         
     print("✅ Updated gold schema aggregations")
 
@@ -0,0 +1,118 @@
+"""
+Columnar enrichment for Adzuna jobs
+
+Same output as enrich_adzuna_job_v2, computed for a whole batch at once:
+payloads are flattened into columns in one pass, then location parsing,
+state codes, post dates and salary bands run as pandas/NumPy operations over
+the batch, and one compiled keyword scan per row (transform/keywords.py)
+gives seniority, remote and job type together. Years of experience and
+education come from one scan per distinct description
+(transform/requirements.py), industry from one lookup per distinct company
+(transform/industry.py). The derived columns are computed through the
+registry in transform/derived_fields.py.
+"""
+from datetime import date
+import pandas as pd
+from transform.utils import US_STATE_ABBREV
+from transform.geo import fill_missing_places
+from transform.derived_fields import compute_fields
+
+# Bump whenever payload parsing or the enrichment output changes: every silver row
+# enriched by an older version is re-enriched on the next run
+# (a single classifier change only needs its version bumped in transform/derived_fields.py)
+ENRICHMENT_VERSION = 2
+
+ENRICHED_COLUMNS = [
+    'source', 'job_id', 'title', 'description', 'company', 'location', 'city', 'county', 'state',
+    'state_code', 'cbsa_code', 'category', 'category_label', 'salary_min', 'salary_max', 'post_date',
+    'first_seen', 'last_seen', 'times_seen', 'is_active', 'url', 'latitude', 'longitude',
+    'seniority', 'is_remote', 'industry', 'job_type', 'yoe_min', 'education',
+]
+
+# Columns computed by the text classifiers (everything else is copied or parsed from the payload)
+DERIVED_COLUMNS = ['seniority', 'is_remote', 'industry', 'job_type', 'yoe_min', 'education']
+
+def _first_present(value, fallback):
+    return value if value is not None else fallback
+
+def flatten_adzuna_payloads(payloads):
+    """
+    Pull the fields enrichment needs out of Adzuna payload dicts in one pass
+    Missing objects/keys give '' for text fields and None otherwise, like the per-row .get() chains
+    """
+    empty = {}
+    locations = [job.get('location') or empty for job in payloads]
+    companies = [job.get('company') or empty for job in payloads]
+    categories = [job.get('category') or empty for job in payloads]
+    areas = [location.get('area') or [] for location in locations]
+
+    return pd.DataFrame({
+        'title': [job.get('title') or '' for job in payloads],
+        'description': [job.get('description') or '' for job in payloads],
+        'company': [company.get('display_name', '') for company in companies],
+        'location': [location.get('display_name', '') for location in locations],
+        'city': [area[-1] if len(area) >= 4 else '' for area in areas],
+        'county': [area[2] if len(area) >= 3 else '' for area in areas],
+        'state': [area[1] if len(area) >= 2 else '' for area in areas],
+        'category': [category.get('tag', '') for category in categories],
+        'category_label': [category.get('label', '') for category in categories],
+        'salary_min': [job.get('salary_min') for job in payloads],
+        'salary_max': [job.get('salary_max') for job in payloads],
+        'created': [job.get('created') for job in payloads],
+        'url': [job.get('redirect_url', '') for job in payloads],
+        # top-level in Adzuna results (location.* kept as a fallback)
+        'latitude': [_first_present(job.get('latitude'), location.get('latitude')) for job, location in zip(payloads, locations)],
+        'longitude': [_first_present(job.get('longitude'), location.get('longitude')) for job, location in zip(payloads, locations)],
+    }, dtype=object)
+
+def parse_post_dates(created):
+    """
+    Calendar date of each ISO-8601 `created` timestamp, in the timestamp's own offset
+    (what datetime.fromisoformat(...).date() gives); None where missing or unparseable
+    """
+    created = pd.Series(created, dtype=object)
+    text = created.where(created.map(lambda value: isinstance(value, str)), None)
+    valid = pd.to_datetime(text.str.replace('Z', '+00:00', regex=False), format='ISO8601', errors='coerce', utc=True).notna()
+    days = pd.to_datetime(text.str.slice(0, 10), format='%Y-%m-%d', errors='coerce')
+    post_dates = pd.Series(days.dt.date, dtype=object)
+    return post_dates.where(valid & days.notna(), None).to_numpy()
+
+def enrich_adzuna_batch(df_raw, today=None):
+    """
+    Enrich a batch of bronze.raw_jobs rows (job_id, payload, first_seen, last_seen, times_seen)
+    Returns one row per input row with the same columns and values as enrich_adzuna_job_v2
+    """
+    today = today or date.today()
+    if df_raw.empty:
+        return pd.DataFrame(columns=ENRICHED_COLUMNS)
+
+    df = flatten_adzuna_payloads(df_raw['payload'].tolist())
+    df.insert(0, 'source', 'adzuna')
+    df.insert(1, 'job_id', df_raw['job_id'].to_numpy())
+
+    # Location
+    df['state_code'] = df['state'].map(US_STATE_ABBREV).fillna('')
+    fill_missing_places(df)
+    df['cbsa_code'] = compute_fields(df, ['cbsa_code'])['cbsa_code'].to_numpy()
+
+    # Dates and status
+    df['post_date'] = parse_post_dates(df['created'])
+    df['first_seen'] = df_raw['first_seen'].to_numpy()
+    df['last_seen'] = df_raw['last_seen'].to_numpy()
+    df['times_seen'] = df_raw['times_seen'].to_numpy()
+    df['is_active'] = (df_raw['last_seen'] == today).to_numpy(dtype=bool)
+
+    # Derived fields
+    derived = derive_fields(df)
+    for column in DERIVED_COLUMNS:
+        df[column] = derived[column].to_numpy()
+
+    return df[ENRICHED_COLUMNS]
+
+def derive_fields(df):
+    """
+    The text-classifier columns (DERIVED_COLUMNS) for a batch, from the derived-field registry
+    df needs title, description, company, category_label, salary_min, salary_max
+    Returns a DataFrame of DERIVED_COLUMNS on df's index
+    """
+    return compute_fields(df, DERIVED_COLUMNS)
@@ -1,5 +1,6 @@
 import pandas as pd
 from database.db import get_engine
+from transform.geo import resolve_region_name
 from pathlib import Path
 
 # def load_zori(csv_path: Path):
@@ -77,6 +78,9 @@ def enrich_zori():
     clean_df['date_recorded'] = latest_date
     clean_df['processed_at'] = pd.Timestamp.now()
     
+    # metro code from the offline gazetteer ("Chicago, IL" -> 16980)
+    clean_df['cbsa_code'] = clean_df['region_name'].map(resolve_region_name)
+    
     # store in silver schema: silver.housing_metrics
     clean_df.to_sql(
         name='housing_metrics',
@@ -1,110 +1,164 @@
-from transform.utils import get_is_remote, get_industry, get_job_type, get_yoe, get_education, categorize_seniority, get_cbsa_code, standardize_job_type
-from datetime import datetime, timezone, date
+"""
+Enrichment for JSearch jobs
+Processes jobs from bronze.jsearch_jobs to silver.jobs_v2, next to the Adzuna rows,
+so dedup (transform/dedup.py) and company resolution (transform/companies.py) see both sources.
+The gold job counts stay Adzuna-only (source = 'adzuna'); a JSearch row only ever
+contributes through its cluster and its company.
+"""
+from datetime import date
 import json
 import pandas as pd
-from database.db import get_engine
-
-def enrich_jsearch(payload, job_id):
-    """Enrich JSearch jobs"""
-    
-    us_state_abbrev = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR',
-    'California': 'CA', 'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE',
-    'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID',
-    'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS',
-    'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
-    'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
-    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM',
-    'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND',
-    'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
-    'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
-    'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV',
-    'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC',
-    }
-    
-    job = json.loads(payload)
-    
-    title = job.get('job_title', '')
-    description = job.get('job_description', '')
-    company = job.get('employer_name', '')
-    
-    location = job.get('job_location', '')
-    city = job.get('job_city', '')
-    state_full = job.get('job_state', '')
-    
-     # Convert full state name to abbreviation
-    state_code = us_state_abbrev.get(state_full, state_full)  # Fallback to original if not found
-    
-    # Handle edge cases
-    if not state_code and location:
-        # Try to extract from job_location as backup
-        # "Chicago, IL" -> extract "IL"
-        location_parts = location.split(', ')
-        if len(location_parts) >= 2:
-            potential_state = location_parts[-1].strip()
-            if len(potential_state) == 2:  # Looks like abbreviation
-                state_code = potential_state
-    
-    category = job.get('employer_company_type', '')
-    url = job.get('job_apply_link', '')
-    salary_min = job.get('job_min_salary', '')
-    salary_max = job.get('job_max_salary', '')
-    post_date = job.get('job_posted_at_datetime_utc', '') or date.today()
-    raw_job_type = job.get('job_employment_type', '')
-    
-    standard_job_type = standardize_job_type(raw_job_type, title, description, 'jsearch')
-    
-    return {
-        'source': 'jsearch',
-        'job_id': job_id,
-        
-        'title': title,
-        'company': company,
-        'location': location,
-        'city': city,
-        'county': '',  # JSearch might not provide county
-        'state': state_code,
-        'cbsa_code': get_cbsa_code(f"{city}, {state_code}"),
-        'category': category,
-        'description': description,
-        'post_date': post_date,
-        'url': url,
-        
-        'salary_min': salary_min,
-        'salary_max': salary_max,
-        
-        'seniority': categorize_seniority(title, description),
-        'is_remote': get_is_remote(title, description),
-        'industry': get_industry(title, company, ''),
-        'job_type': standard_job_type,
-        'yoe_min': get_yoe(description),
-        'education': get_education(description),
-        
-        'processed_at': datetime.now(timezone.utc)
-    }
-
-def run_jsearch_enrichment():
-    """Run enrichment for all JSearch jobs in the database"""
-    query = """
-    SELECT b.job_id, b.payload
-    FROM bronze.jsearch_jobs b
-    LEFT JOIN silver.jobs s ON s.source = 'jsearch' AND s.job_id = b.job_id
-    WHERE s.job_id IS NULL
+from sqlalchemy import text
+from database.db import get_engine, read_sql_chunks
+from transform.utils import US_STATE_ABBREV
+from transform.geo import fill_missing_places, STATE_NAMES
+from transform.derived_fields import compute_fields
+from transform.enrich_batch import parse_post_dates, derive_fields, ENRICHED_COLUMNS, DERIVED_COLUMNS
+from transform.enrich_adzuna_v2 import upsert_silver_jobs_bulk
+from transform.parallel import keyset_ranges, map_chunks, ENRICH_CHUNK_SIZE
+
+def _state_code(state, location):
+    """Two-letter code of JSearch's job_state (a full name or already a code), else the "City, ST" tail of job_location"""
+    state = (state or '').strip()
+    if state in US_STATE_ABBREV:
+        return US_STATE_ABBREV[state]
+    if len(state) == 2 and state.upper() in STATE_NAMES:
+        return state.upper()
+    # "Chicago, IL" -> "IL"
+    tail = (location or '').rpartition(',')[2].strip()
+    return tail.upper() if tail.upper() in STATE_NAMES else ''
+
+def flatten_jsearch_payloads(payloads):
+    """Pull the fields enrichment needs out of JSearch payloads (dicts or JSON text) in one pass"""
+    payloads = [payload if isinstance(payload, dict) else json.loads(payload) for payload in payloads]
+    state_codes = [_state_code(job.get('job_state'), job.get('job_location')) for job in payloads]
+    return pd.DataFrame({
+        'title': [job.get('job_title') or '' for job in payloads],
+        'description': [job.get('job_description') or '' for job in payloads],
+        'company': [job.get('employer_name') or '' for job in payloads],
+        'location': [job.get('job_location') or '' for job in payloads],
+        'city': [job.get('job_city') or '' for job in payloads],
+        'county': '',  # JSearch has no county
+        'state': [STATE_NAMES.get(code, '') for code in state_codes],
+        'state_code': state_codes,
+        'category': [job.get('employer_company_type') or '' for job in payloads],
+        # no Adzuna category: NULL keeps JSearch rows out of category rollups
+        'category_label': None,
+        'salary_min': [job.get('job_min_salary') for job in payloads],
+        'salary_max': [job.get('job_max_salary') for job in payloads],
+        'created': [job.get('job_posted_at_datetime_utc') for job in payloads],
+        'url': [job.get('job_apply_link') or '' for job in payloads],
+        'latitude': [job.get('job_latitude') for job in payloads],
+        'longitude': [job.get('job_longitude') for job in payloads],
+    }, dtype=object)
+
+def enrich_jsearch_batch(df_raw, today=None):
     """
-    
-    df_raw = pd.read_sql(query, get_engine())
-    
+    Enrich a batch of JSearch jobs (job_id, payload, first_seen, last_seen, times_seen)
+    Returns silver.jobs_v2 rows (ENRICHED_COLUMNS); the derived fields come from the same
+    registry as Adzuna's, so their derived_state stamps hold for both sources
+    """
+    today = today or date.today()
     if df_raw.empty:
+        return pd.DataFrame(columns=ENRICHED_COLUMNS)
+
+    df = flatten_jsearch_payloads(df_raw['payload'].tolist())
+    df.insert(0, 'source', 'jsearch')
+    df.insert(1, 'job_id', df_raw['job_id'].to_numpy())
+
+    # Location
+    fill_missing_places(df)
+    df['cbsa_code'] = compute_fields(df, ['cbsa_code'])['cbsa_code'].to_numpy()
+
+    # Dates and status
+    df['post_date'] = parse_post_dates(df['created'])
+    df['first_seen'] = df_raw['first_seen'].to_numpy()
+    df['last_seen'] = df_raw['last_seen'].to_numpy()
+    df['times_seen'] = df_raw['times_seen'].to_numpy()
+    df['is_active'] = (df_raw['last_seen'] == today).to_numpy(dtype=bool)
+
+    # Derived fields
+    derived = derive_fields(df)
+    for column in DERIVED_COLUMNS:
+        df[column] = derived[column].to_numpy()
+
+    return df[ENRICHED_COLUMNS]
+
+# One row per JSearch job (its latest payload, first/last fetch dates, fetch count)
+# that is new to silver.jobs_v2 or was fetched again since it was enriched
+PENDING_JSEARCH_SQL = """
+    FROM (
+        SELECT job_id,
+            (array_agg(payload ORDER BY fetched_at DESC))[1] AS payload,
+            MIN(fetched_at)::date AS first_seen,
+            MAX(fetched_at)::date AS last_seen,
+            COUNT(*) AS times_seen
+        FROM bronze.jsearch_jobs
+        GROUP BY job_id
+    ) b
+    LEFT JOIN silver.jobs_v2 s ON s.source = 'jsearch' AND s.job_id = b.job_id
+    WHERE (s.job_id IS NULL OR b.last_seen > s.last_seen)
+"""
+PENDING_JSEARCH_COLUMNS = "b.job_id, b.payload, b.first_seen, b.last_seen, b.times_seen"
+
+def write_jsearch_jobs(df_raw):
+    """Enrich a batch of pending JSearch jobs and upsert them into silver.jobs_v2; returns the number of rows written"""
+    return upsert_silver_jobs_bulk(enrich_jsearch_batch(df_raw))
+
+def enrich_jsearch_range(lower, upper):
+    """
+    Enrich the pending JSearch jobs with lower <= job_id < upper (upper=None: no upper bound)
+    Runs inside a worker process (transform/parallel.py); returns the number of rows written
+    """
+    query = text(f"""
+        SELECT {PENDING_JSEARCH_COLUMNS}
+        {PENDING_JSEARCH_SQL}
+            AND b.job_id >= :lower
+            AND (CAST(:upper AS text) IS NULL OR b.job_id < :upper)
+    """)
+    with get_engine().connect() as conn:
+        df_raw = pd.read_sql(query, conn, params={'lower': lower, 'upper': upper})
+    return write_jsearch_jobs(df_raw)
+
+def run_jsearch_enrichment(chunk_size=None, workers=1):
+    """
+    Enrich new and re-fetched JSearch jobs into silver.jobs_v2
+    Streams pending jobs in chunks of chunk_size (default: STREAM_CHUNK_SIZE) instead of loading them all
+    workers > 1: split them into job_id keyset ranges of chunk_size and enrich the ranges across a process pool
+    Run it before update_gold_aggregations, so dedup and refresh_companies pick the rows up
+    """
+    engine = get_engine()
+    # not fetched today: expired (updated_at moves with is_active, like the Adzuna rows)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE silver.jobs_v2
+            SET is_active = FALSE,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE source = 'jsearch' AND is_active = TRUE AND last_seen < :today
+        """), {'today': date.today()})
+
+    if workers > 1:
+        ranges = keyset_ranges(engine, ['b.job_id'], PENDING_JSEARCH_SQL, chunk_size or ENRICH_CHUNK_SIZE)
+        written, failed = 0, 0
+        for chunk, rows, error in map_chunks(enrich_jsearch_range, ranges, workers):
+            if error is not None:
+                failed += 1
+                print(f"  ❌ chunk {chunk[0]}..{chunk[1] or 'end'} failed: {error}")
+                continue
+            written += rows
+        if failed:
+            print(f"⚠️  {failed} chunk(s) failed - rerun to pick up their jobs")
+    else:
+        written = 0
+        for df_raw in read_sql_chunks(f"SELECT {PENDING_JSEARCH_COLUMNS} {PENDING_JSEARCH_SQL}",
+                                      chunk_size=chunk_size, engine=engine):
+            written += write_jsearch_jobs(df_raw)
+
+    if written == 0:
         print('No new JSearch jobs to enrich')
         return
-    
-    enriched = [enrich_jsearch(row.payload, row.job_id) for _, row in df_raw.iterrows()]
-    df_enriched = pd.DataFrame(enriched)
-    
-    df_enriched.to_sql('jobs', get_engine(), schema='silver', if_exists='append', index=False)
-    print(f'Inserted {len(df_enriched)} JSearch rows into silver.jobs')
-    
+
+    print(f'✅ Upserted {written} JSearch rows into silver.jobs_v2')
+
 if __name__ == '__main__':
-    run_jsearch_enrichment()
\ No newline at end of file
+    run_jsearch_enrichment()
@@ -0,0 +1,190 @@
+"""
+SQL-pushdown enrichment for Adzuna jobs
+
+The structural columns of silver.jobs_v2 (title, company, location hierarchy,
+state code, category, salary, post date, url, coordinates, lifecycle fields)
+need no Python, so they are extracted from bronze.raw_jobs.payload with
+JSONB operators in one INSERT ... SELECT inside Postgres. Payloads never
+leave the database.
+
+Only the text classifiers run in Python: the rows written above are
+streamed back as (job_id, title, description, company, category_label,
+salary_min, salary_max) - the inputs derive_fields needs - classified in
+batch, and written back with one COPY + UPDATE per chunk. The same pass
+fills empty cities from the coordinates and resolves cbsa_code
+(transform/geo.py).
+
+Rows are marked enrichment_version = NULL by the structural pass and get
+ENRICHMENT_VERSION only with their classifier columns, so an interrupted
+run is simply finished by the next one.
+
+Output matches enrich_adzuna_batch for well-formed payloads.
+"""
+import time
+from datetime import date
+from sqlalchemy import text
+from database.db import get_engine, copy_dataframe, read_sql_chunks
+from transform.utils import US_STATE_ABBREV
+from transform.enrich_batch import derive_fields, DERIVED_COLUMNS, ENRICHMENT_VERSION
+from transform.derived_fields import derived_state_sql, compute_fields
+from transform.geo import fill_missing_places
+from transform.enrich_adzuna_v2 import pending_jobs_condition, prepare_enrichment_run, update_gold_aggregations
+
+STRUCTURAL_COLUMNS = [
+    'source', 'job_id', 'title', 'description', 'company', 'location', 'city', 'county', 'state',
+    'state_code', 'cbsa_code', 'category', 'category_label', 'salary_min', 'salary_max', 'post_date',
+    'first_seen', 'last_seen', 'times_seen', 'is_active', 'url', 'latitude', 'longitude', 'payload_hash',
+]
+
+# Location columns the classifier pass may fill from the coordinates (fill_missing_places)
+PLACE_COLUMNS = ['city', 'state', 'state_code']
+
+# Columns the classifier pass computes: the text classifiers plus the metro code
+CLASSIFIED_COLUMNS = DERIVED_COLUMNS + ['cbsa_code']
+
+# Full state name -> code as an inline table (same mapping as US_STATE_ABBREV)
+STATE_CODES_SQL = "(VALUES " + ", ".join(
+    f"('{name.replace(chr(39), chr(39) * 2)}', '{code}')" for name, code in US_STATE_ABBREV.items()
+) + ") AS state_codes(name, code)"
+
+# created -> calendar date in its own offset; anything that isn't ISO-8601 gives NULL
+POST_DATE_SQL = r"""
+    CASE WHEN r.payload->>'created' ~ '^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:?\d{2})?)?$'
+         THEN LEFT(r.payload->>'created', 10)::date
+    END
+"""
+
+def structural_select(full=False):
+    """SELECT producing STRUCTURAL_COLUMNS for the pending bronze rows (r = bronze.raw_jobs, s = silver.jobs_v2)"""
+    return f"""
+        SELECT
+            r.source,
+            r.job_id,
+            COALESCE(r.payload->>'title', '') AS title,
+            COALESCE(r.payload->>'description', '') AS description,
+            COALESCE(r.payload->'company'->>'display_name', '') AS company,
+            COALESCE(r.payload->'location'->>'display_name', '') AS location,
+            CASE WHEN area.n >= 4 THEN area.arr->>(area.n - 1) ELSE '' END AS city,
+            CASE WHEN area.n >= 3 THEN area.arr->>2 ELSE '' END AS county,
+            CASE WHEN area.n >= 2 THEN area.arr->>1 ELSE '' END AS state,
+            COALESCE(state_codes.code, '') AS state_code,
+            NULL::text AS cbsa_code,  -- filled by classify_pending (needs the gazetteer)
+            COALESCE(r.payload->'category'->>'tag', '') AS category,
+            COALESCE(r.payload->'category'->>'label', '') AS category_label,
+            (r.payload->>'salary_min')::numeric AS salary_min,
+            (r.payload->>'salary_max')::numeric AS salary_max,
+            {POST_DATE_SQL} AS post_date,
+            r.first_seen,
+            r.last_seen,
+            r.times_seen,
+            r.last_seen = :today AS is_active,
+            COALESCE(r.payload->>'redirect_url', '') AS url,
+            COALESCE(r.payload->>'latitude', r.payload->'location'->>'latitude')::numeric AS latitude,
+            COALESCE(r.payload->>'longitude', r.payload->'location'->>'longitude')::numeric AS longitude,
+            r.payload_hash
+        FROM bronze.raw_jobs r
+        LEFT JOIN silver.jobs_v2 s
+            ON s.source = r.source AND s.job_id = r.job_id
+        CROSS JOIN LATERAL (
+            SELECT COALESCE(r.payload->'location'->'area', '[]'::jsonb) AS arr,
+                   jsonb_array_length(COALESCE(r.payload->'location'->'area', '[]'::jsonb)) AS n
+        ) area
+        LEFT JOIN {STATE_CODES_SQL}
+            ON state_codes.name = CASE WHEN area.n >= 2 THEN area.arr->>1 END
+        WHERE {pending_jobs_condition(full)}
+    """
+
+def upsert_structural_fields(conn, full=False, today=None):
+    """
+    Write the structural columns of every pending job with one INSERT ... SELECT over bronze
+    Written rows get enrichment_version = NULL until their classifier columns are filled
+    Returns the number of rows written
+    """
+    columns = ', '.join(STRUCTURAL_COLUMNS)
+    updates = ',\n                '.join(f"{column} = EXCLUDED.{column}"
+                                        for column in STRUCTURAL_COLUMNS if column not in ('source', 'job_id', 'first_seen'))
+    result = conn.execute(text(f"""
+        INSERT INTO silver.jobs_v2 ({columns}, enrichment_version)
+        SELECT {columns}, NULL::int
+        FROM ({structural_select(full)}) structural
+        ON CONFLICT (source, job_id) DO UPDATE SET
+            {updates},
+            enrichment_version = NULL,
+            updated_at = CURRENT_TIMESTAMP
+    """), {'today': today or date.today(), 'enrichment_version': ENRICHMENT_VERSION})
+    return result.rowcount
+
+def classify_pending(chunk_size=None):
+    """
+    Fill the classifier columns of every row the structural pass left at enrichment_version NULL
+    Streams only the classifier and location inputs, one COPY + UPDATE per chunk
+    Returns the number of rows classified
+    """
+    query = """
+        SELECT source, job_id, title, description, company, category_label,
+               salary_min::float8 AS salary_min, salary_max::float8 AS salary_max,
+               city, county, state, state_code, latitude::float8 AS latitude, longitude::float8 AS longitude
+        FROM silver.jobs_v2
+        WHERE source = 'adzuna' AND enrichment_version IS NULL
+    """
+    stage_columns = ['source', 'job_id'] + PLACE_COLUMNS + CLASSIFIED_COLUMNS
+    updates = ',\n                '.join(f"{column} = stage.{column}" for column in PLACE_COLUMNS + CLASSIFIED_COLUMNS)
+    # SET expressions see the pre-update row: stamp from the values being written (the places from stage)
+    stamps = derived_state_sql('s', CLASSIFIED_COLUMNS, column_aliases=dict.fromkeys(PLACE_COLUMNS, 'stage'))
+
+    engine = get_engine()
+    classified = 0
+    for df in read_sql_chunks(query, chunk_size=chunk_size, engine=engine):
+        fill_missing_places(df)
+        derived = derive_fields(df)
+        derived['cbsa_code'] = compute_fields(df, ['cbsa_code'])['cbsa_code'].to_numpy()
+        for position, column in enumerate(['source', 'job_id'] + PLACE_COLUMNS):
+            derived.insert(position, column, df[column])
+
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS jobs_v2_classified"))
+            conn.execute(text(f"""
+                CREATE TEMP TABLE jobs_v2_classified AS
+                SELECT {', '.join(stage_columns)}
+                FROM silver.jobs_v2 WITH NO DATA
+            """))
+            copy_dataframe(conn, 'jobs_v2_classified', derived[stage_columns], int_columns=['yoe_min'])
+            conn.execute(text(f"""
+                UPDATE silver.jobs_v2 s
+                SET {updates},
+                    enrichment_version = :enrichment_version,
+                    derived_state = s.derived_state || {stamps},
+                    updated_at = CURRENT_TIMESTAMP
+                FROM jobs_v2_classified stage
+                WHERE s.source = stage.source AND s.job_id = stage.job_id
+            """), {'enrichment_version': ENRICHMENT_VERSION})
+            conn.execute(text("DROP TABLE jobs_v2_classified"))
+
+        classified += len(df)
+        print(f"  Classified {classified} jobs...")
+    return classified
+
+def run_adzuna_enrichment_sql(full=False, chunk_size=None):
+    """
+    Enrich pending Adzuna jobs (every Adzuna job with full=True) into silver.jobs_v2:
+    structural columns in SQL, text classifiers in Python
+    """
+    engine = get_engine()
+
+    to_enrich = prepare_enrichment_run(engine, full)
+    if to_enrich is None:
+        return
+    if to_enrich:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            written = upsert_structural_fields(conn, full)
+        structural_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        classified = classify_pending(chunk_size)
+        classify_seconds = time.perf_counter() - started
+
+        print(f"✅ Processed {written} jobs into silver.jobs_v2 "
+              f"(structural SQL {structural_seconds:.1f}s, {classified} classified in {classify_seconds:.1f}s)")
+
+    update_gold_aggregations()
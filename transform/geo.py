@@ -0,0 +1,339 @@
+"""
+Offline CBSA (metro area) gazetteer
+
+data/geo/cbsa_gazetteer.csv maps principal cities and member counties
+(with their state) to 2023 Census CBSA codes. It is loaded once per
+process into two dict indexes keyed by normalized (name, state_code),
+so a lookup is one hash probe. lookup_cbsa() is memoized as well, so a
+batch only pays for its distinct places.
+
+Counties are the more reliable key (every county belongs to at most one
+CBSA), so they are tried first and the city is the fallback. Zillow
+RegionNames ("Chicago, IL") are the metro's principal city, so they
+resolve through the city index.
+
+refresh_city_mapping() materializes the jobs <-> housing bridge into
+gold.city_mapping (sql/8_city_mapping.sql), so gold joins are indexed
+equality joins on cbsa_code instead of a name-matching view.
+
+Geocoded jobs are resolved by coordinates too: data/geo/places.csv holds
+the principal (and major) cities of every gazetteer CBSA with their
+coordinates, bucketed into a uniform lat/lon grid. Each cell lists the
+places within METRO_RADIUS_MILES of it, so assign_places() resolves a
+whole batch with one merge against the grid and one vectorized haversine.
+
+    METRO_RADIUS_MILES    max distance to the nearest place (default: 30)
+"""
+import csv
+import math
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database.db import get_engine, copy_dataframe
+
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / 'data' / 'geo' / 'cbsa_gazetteer.csv'
+PLACES_PATH = Path(__file__).resolve().parent.parent / 'data' / 'geo' / 'places.csv'
+
+# Full state name -> USPS code (Adzuna gives full names in location.area)
+US_STATE_ABBREV = {
+    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR',
+    'California': 'CA', 'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE',
+    'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID',
+    'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS',
+    'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
+    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
+    'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
+    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM',
+    'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND',
+    'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
+    'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
+    'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
+    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV',
+    'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC',
+}
+STATE_NAMES = {code: name for name, code in US_STATE_ABBREV.items()}
+
+METRO_RADIUS_MILES = float(os.getenv("METRO_RADIUS_MILES", "30"))
+GRID_DEGREES = 0.5
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = 69.0
+
+# Spelling variants folded together before lookup ("St. Louis" / "Saint Louis", "Ft. Wayne" / "Fort Wayne")
+_ABBREVIATIONS = [(re.compile(r'\bsaint\b'), 'st'), (re.compile(r'\bft\b'), 'fort'), (re.compile(r'\bmt\b'), 'mount')]
+_COUNTY_SUFFIX = re.compile(r'\s+(?:county|parish|borough)$')
+
+def normalize_place(name, county=False):
+    """Lookup key for a place name: lowercase, no accents/punctuation, abbreviations folded ("County" dropped with county=True)"""
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    name = re.sub(r"[.'’]", '', name.lower())
+    name = re.sub(r'[^a-z0-9]+', ' ', name).strip()
+    for pattern, replacement in _ABBREVIATIONS:
+        name = pattern.sub(replacement, name)
+    if county:
+        name = _COUNTY_SUFFIX.sub('', name)
+    return name
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path=GAZETTEER_PATH):
+    """{'city': {(name, state): cbsa}, 'county': {(name, state): cbsa}, 'titles': {cbsa: title}}, loaded once"""
+    index = {'city': {}, 'county': {}, 'titles': {}}
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            key = (normalize_place(row['name'], county=row['kind'] == 'county'), row['state_code'].upper())
+            index[row['kind']][key] = row['cbsa_code']
+            index['titles'][row['cbsa_code']] = row['cbsa_title']
+    return index
+
+@lru_cache(maxsize=None)
+def lookup_cbsa(city='', state_code='', county=''):
+    """CBSA code for a place (county first, then city), or None outside the gazetteer"""
+    if not state_code:
+        return None
+    gazetteer = load_gazetteer()
+    state_code = state_code.upper()
+    if county:
+        code = gazetteer['county'].get((normalize_place(county, county=True), state_code))
+        if code:
+            return code
+    if city:
+        return gazetteer['city'].get((normalize_place(city), state_code))
+    return None
+
+def cbsa_title(cbsa_code):
+    """Census title of a CBSA code ("Detroit-Warren-Dearborn, MI"), or None"""
+    return load_gazetteer()['titles'].get(cbsa_code)
+
+def resolve_region_name(region_name):
+    """
+    CBSA code for a "City, ST" name (Zillow RegionName, "Chicago, IL")
+    Hyphenated/slashed names ("Louisville/Jefferson County, KY") fall back to their first city
+    """
+    if not region_name or ',' not in region_name:
+        return None
+    city, _, state = region_name.rpartition(',')
+    state_code = state.strip()[:2]
+    return lookup_cbsa(city.strip(), state_code) or lookup_cbsa(re.split(r'[-/]', city)[0].strip(), state_code)
+
+def _text(value):
+    return value if isinstance(value, str) else ''
+
+def resolve_cbsa_codes(cities, state_codes, counties=None):
+    """Batch lookup_cbsa over aligned sequences (missing values allowed); each distinct place is resolved once"""
+    counties = counties if counties is not None else [''] * len(cities)
+    return [lookup_cbsa(_text(city), _text(state_code), _text(county))
+            for city, state_code, county in zip(cities, state_codes, counties)]
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles (scalars or NumPy arrays)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=float)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+@lru_cache(maxsize=1)
+def load_places(path=PLACES_PATH):
+    """Principal cities with coordinates (cbsa_code, city, state_code, latitude, longitude), loaded once"""
+    return pd.read_csv(path, dtype={'cbsa_code': str})
+
+def _cell(latitude, longitude):
+    return np.floor(np.asarray(latitude, dtype=float) / GRID_DEGREES), np.floor(np.asarray(longitude, dtype=float) / GRID_DEGREES)
+
+@lru_cache(maxsize=4)
+def grid_index(radius_miles=METRO_RADIUS_MILES):
+    """
+    (cell_lat, cell_lon, place) rows: every place within radius_miles of some point in the cell
+    A place is registered in every cell its radius box touches, so a point only needs its own cell
+    """
+    places = load_places()
+    rows = []
+    for place, (latitude, longitude) in enumerate(zip(places['latitude'], places['longitude'])):
+        lat_span = radius_miles / MILES_PER_DEGREE
+        lon_span = radius_miles / (MILES_PER_DEGREE * max(math.cos(math.radians(abs(latitude) + lat_span)), 0.01))
+        lat_cells = range(math.floor((latitude - lat_span) / GRID_DEGREES), math.floor((latitude + lat_span) / GRID_DEGREES) + 1)
+        lon_cells = range(math.floor((longitude - lon_span) / GRID_DEGREES), math.floor((longitude + lon_span) / GRID_DEGREES) + 1)
+        rows.extend((cell_lat, cell_lon, place) for cell_lat in lat_cells for cell_lon in lon_cells)
+    return pd.DataFrame(rows, columns=['cell_lat', 'cell_lon', 'place']).astype({'cell_lat': float, 'cell_lon': float})
+
+def assign_places(latitudes, longitudes, radius_miles=METRO_RADIUS_MILES):
+    """
+    Nearest gazetteer place within radius_miles of each point, in one vectorized pass
+    Returns a DataFrame aligned with the input (city, state_code, cbsa_code, distance_miles); NaN/None where none
+    """
+    latitudes = pd.to_numeric(pd.Series(latitudes, dtype=object), errors='coerce').to_numpy(dtype=float)
+    longitudes = pd.to_numeric(pd.Series(longitudes, dtype=object), errors='coerce').to_numpy(dtype=float)
+    result = pd.DataFrame({'city': None, 'state_code': None, 'cbsa_code': None, 'distance_miles': np.nan},
+                          index=range(len(latitudes)))
+
+    geocoded = np.flatnonzero(~np.isnan(latitudes) & ~np.isnan(longitudes))
+    if not len(geocoded):
+        return result
+    cell_lat, cell_lon = _cell(latitudes[geocoded], longitudes[geocoded])
+    points = pd.DataFrame({'point': geocoded, 'cell_lat': cell_lat, 'cell_lon': cell_lon})
+
+    places = load_places()
+    candidates = points.merge(grid_index(radius_miles), on=['cell_lat', 'cell_lon'])
+    candidates['distance_miles'] = haversine_miles(
+        latitudes[candidates['point']], longitudes[candidates['point']],
+        places['latitude'].to_numpy()[candidates['place']], places['longitude'].to_numpy()[candidates['place']],
+    )
+    candidates = candidates[candidates['distance_miles'] <= radius_miles]
+    nearest = candidates.loc[candidates.groupby('point')['distance_miles'].idxmin()]
+
+    matched = places.iloc[nearest['place'].to_numpy()]
+    result.loc[nearest['point'].to_numpy(), ['city', 'state_code', 'cbsa_code']] = matched[['city', 'state_code', 'cbsa_code']].to_numpy()
+    result.loc[nearest['point'].to_numpy(), 'distance_miles'] = nearest['distance_miles'].to_numpy()
+    return result
+
+@lru_cache(maxsize=4)
+def _grid_cells(radius_miles=METRO_RADIUS_MILES):
+    """grid_index as {(cell_lat, cell_lon): place indexes} for single-point lookups"""
+    index = grid_index(radius_miles)
+    return {cell: group.to_numpy() for cell, group in index.groupby(['cell_lat', 'cell_lon'])['place']}
+
+def nearest_place(latitude, longitude, radius_miles=METRO_RADIUS_MILES):
+    """Scalar assign_places: (city, state_code, cbsa_code) of the nearest place, or None"""
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(latitude) or math.isnan(longitude):
+        return None
+    cell_lat, cell_lon = _cell(latitude, longitude)
+    candidates = _grid_cells(radius_miles).get((float(cell_lat), float(cell_lon)))
+    if candidates is None:
+        return None
+    places = load_places()
+    distances = haversine_miles(latitude, longitude, places['latitude'].to_numpy()[candidates],
+                                places['longitude'].to_numpy()[candidates])
+    best = distances.argmin()
+    if distances[best] > radius_miles:
+        return None
+    place = places.iloc[candidates[best]]
+    return place['city'], place['state_code'], place['cbsa_code']
+
+def fill_missing_places(df):
+    """
+    Fill empty city (and empty state/state_code) of geocoded rows from the nearest place
+    The area-array heuristic leaves city empty for postings with a short location.area
+    df needs city, state, state_code, latitude, longitude; returns df (modified in place)
+    """
+    missing = (df['city'].fillna('') == '').to_numpy()
+    if not missing.any():
+        return df
+    places = assign_places(df['latitude'].to_numpy()[missing], df['longitude'].to_numpy()[missing])
+    places.index = df.index[missing]
+    state_code = df.loc[places.index, 'state_code'].fillna('')
+    # a place across the state line never overrides a known state
+    fill = places['city'].notna() & ((state_code == '') | (state_code == places['state_code']))
+    rows = places.index[fill]
+    df.loc[rows, 'city'] = places.loc[rows, 'city']
+    df.loc[rows, 'state_code'] = places.loc[rows, 'state_code']
+    df.loc[rows, 'state'] = [state or STATE_NAMES.get(code, '') for state, code in
+                             zip(df.loc[rows, 'state'].fillna(''), places.loc[rows, 'state_code'])]
+    return df
+
+def resolve_place_point(place):
+    """(latitude, longitude) of a "City, ST" place in data/geo/places.csv, or None"""
+    city, _, state_code = (place or '').rpartition(',')
+    places = load_places()
+    key = (normalize_place(city), state_code.strip().upper())
+    match = places[[(normalize_place(name), code) == key for name, code in zip(places['city'], places['state_code'])]]
+    return None if match.empty else (float(match['latitude'].iat[0]), float(match['longitude'].iat[0]))
+
+def jobs_within(place=None, miles=25, latitude=None, longitude=None, active_only=True, columns=None):
+    """
+    Jobs in silver.jobs_v2 within `miles` of a point ("Detroit, MI" or latitude/longitude)
+    A lat/lon bounding box on idx_jobs_v2_coordinates narrows the rows, then the exact distance filters them
+    Returns a DataFrame sorted by distance_miles
+    """
+    if place is not None:
+        point = resolve_place_point(place)
+        if point is None:
+            raise ValueError(f"Unknown place {place!r} (expected \"City, ST\" from data/geo/places.csv)")
+        latitude, longitude = point
+    lat_span = miles / MILES_PER_DEGREE
+    lon_span = miles / (MILES_PER_DEGREE * max(math.cos(math.radians(abs(latitude) + lat_span)), 0.01))
+    columns = columns or ['source', 'job_id', 'title', 'company', 'city', 'state_code', 'cbsa_code',
+                          'salary_min', 'salary_max', 'latitude', 'longitude']
+    query = text(f"""
+        SELECT *
+        FROM (
+            SELECT {', '.join(columns)},
+                   2 * {EARTH_RADIUS_MILES} * ASIN(SQRT(
+                       POWER(SIN(RADIANS(latitude - :latitude) / 2), 2)
+                       + COS(RADIANS(:latitude)) * COS(RADIANS(latitude)) * POWER(SIN(RADIANS(longitude - :longitude) / 2), 2)
+                   )) AS distance_miles
+            FROM silver.jobs_v2
+            WHERE latitude BETWEEN :min_lat AND :max_lat
+                AND longitude BETWEEN :min_lon AND :max_lon
+                {'AND is_active = TRUE' if active_only else ''}
+        ) nearby
+        WHERE distance_miles <= :miles
+        ORDER BY distance_miles
+    """)
+    with get_engine().connect() as conn:
+        return pd.read_sql(query, conn, params={
+            'latitude': latitude, 'longitude': longitude, 'miles': miles,
+            'min_lat': latitude - lat_span, 'max_lat': latitude + lat_span,
+            'min_lon': longitude - lon_span, 'max_lon': longitude + lon_span,
+        })
+
+def refresh_city_mapping():
+    """
+    Rebuild gold.city_mapping: one row per (city, state_code) with active jobs, its CBSA,
+    and the Zillow region for that CBSA. Also fills silver.housing_metrics.cbsa_code where missing
+    Returns the number of mapped cities
+    """
+    engine = get_engine()
+    with engine.connect() as conn:
+        places = pd.read_sql(text("""
+            SELECT city, MAX(state) AS state, state_code, MAX(county) AS county
+            FROM silver.jobs_v2
+            WHERE is_active = TRUE AND COALESCE(city, '') <> '' AND COALESCE(state_code, '') <> ''
+            GROUP BY city, state_code
+        """), conn)
+        regions = pd.read_sql(text("""
+            SELECT DISTINCT region_id, region_name
+            FROM silver.housing_metrics
+            WHERE region_name IS NOT NULL
+        """), conn)
+
+    regions['cbsa_code'] = [resolve_region_name(name) for name in regions['region_name']]
+    places['cbsa_code'] = resolve_cbsa_codes(places['city'], places['state_code'], places['county'])
+    places['cbsa_title'] = places['cbsa_code'].map(cbsa_title)
+
+    zillow = (regions.dropna(subset=['cbsa_code'])
+                     .drop_duplicates('cbsa_code')[['cbsa_code', 'region_id', 'region_name']])
+    mapping = places.merge(zillow, on='cbsa_code', how='left')[
+        ['city', 'state', 'state_code', 'county', 'cbsa_code', 'cbsa_title', 'region_id', 'region_name']
+    ]
+
+    # one real transaction (the engine autocommits): readers see the old mapping or the new one, never an empty table
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="READ COMMITTED")
+        with conn.begin():
+            conn.execute(text("DELETE FROM gold.city_mapping"))
+            copy_dataframe(conn, 'gold.city_mapping', mapping, int_columns=['region_id'])
+
+            housing = regions.dropna(subset=['cbsa_code'])[['region_id', 'cbsa_code']]
+            conn.execute(text("DROP TABLE IF EXISTS housing_cbsa_stage"))
+            conn.execute(text("CREATE TEMP TABLE housing_cbsa_stage (region_id int, cbsa_code text)"))
+            copy_dataframe(conn, 'housing_cbsa_stage', housing, int_columns=['region_id'])
+            conn.execute(text("""
+                UPDATE silver.housing_metrics h
+                SET cbsa_code = stage.cbsa_code
+                FROM housing_cbsa_stage stage
+                WHERE h.region_id = stage.region_id AND h.cbsa_code IS NULL
+            """))
+            conn.execute(text("DROP TABLE housing_cbsa_stage"))
+
+    matched = mapping['region_id'].notna().sum()
+    print(f"🗺️  Mapped {len(mapping)} cities to CBSAs ({mapping['cbsa_code'].notna().sum()} with a CBSA, "
+          f"{matched} with Zillow data); {regions['cbsa_code'].notna().sum()}/{len(regions)} Zillow regions resolved")
+    return len(mapping)
@@ -0,0 +1,185 @@
+"""
+Company -> industry resolution
+
+Company names are normalized (case, accents and punctuation folded, "&" ->
+"and", legal suffixes like Inc/LLC/Corp stripped) and looked up in a
+dictionary compiled once at import:
+
+    1. known companies: the normalized name, or its leading words when
+       those are at least two words ("JPMorgan Chase Bank, N.A." ->
+       "jpmorgan chase") or the rest is only legal suffixes. A one-word
+       name never matches as a prefix: "Target Health Partners" is not
+       Target, "Ford Field" is not Ford, "Meta Staffing" is not Meta
+    2. industry keywords anywhere in the name ("... Health System", "... Bank")
+    3. title hints ("Fintech Data Analyst")
+    4. the Adzuna category label ("Healthcare & Nursing Jobs")
+    5. 'other'
+
+Steps 1-2 depend only on the company, so classify_industries() resolves each
+distinct company once per batch and memoizes it for the process. Across runs,
+rows whose title/company/category haven't changed keep their industry
+(derived_state stamps, transform/derived_fields.py), so tagging costs
+O(distinct companies) rather than O(jobs).
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# industry -> company names (normalized form, see normalize_company)
+INDUSTRY_COMPANIES = {
+    'big_tech': [
+        'google', 'alphabet', 'microsoft', 'amazon', 'amazon web services', 'aws', 'apple', 'meta', 'meta platforms',
+        'facebook', 'netflix', 'tesla', 'uber', 'airbnb', 'oracle', 'ibm', 'salesforce', 'adobe', 'nvidia', 'intel',
+        'cisco', 'linkedin', 'lyft', 'doordash', 'snowflake', 'databricks',
+    ],
+    'finance': [
+        'jpmorgan', 'jpmorgan chase', 'jp morgan', 'chase', 'goldman sachs', 'morgan stanley', 'wells fargo',
+        'bank of america', 'citi', 'citigroup', 'citibank', 'capital one', 'us bank', 'pnc', 'truist', 'fifth third',
+        'ally', 'ally financial', 'comerica', 'huntington', 'northern trust', 'charles schwab', 'fidelity',
+        'fidelity investments', 'vanguard', 'blackrock', 'american express', 'discover', 'synchrony', 'td bank',
+        'rocket', 'rocket mortgage', 'rocket companies', 'united wholesale mortgage', 'flagstar', 'cme',
+    ],
+    'insurance': [
+        'state farm', 'allstate', 'progressive', 'geico', 'liberty mutual', 'nationwide', 'travelers', 'aflac',
+        'blue cross blue shield', 'blue cross', 'bcbs', 'anthem', 'elevance health', 'humana', 'cigna', 'aetna',
+        'unitedhealth', 'unitedhealthcare', 'united health', 'centene', 'molina healthcare', 'kemper', 'aon',
+    ],
+    'consulting': [
+        'mckinsey', 'bain', 'boston consulting', 'bcg', 'deloitte', 'pwc', 'pricewaterhousecoopers', 'accenture',
+        'kpmg', 'ernst and young', 'ey', 'booz allen hamilton', 'capgemini', 'cognizant', 'infosys', 'slalom',
+        'grant thornton', 'rsm', 'plante moran', 'guidehouse', 'huron', 'protiviti',
+    ],
+    'pharma': [
+        'pfizer', 'merck', 'johnson and johnson', 'roche', 'genentech', 'novartis', 'astrazeneca', 'abbvie',
+        'abbott', 'eli lilly', 'lilly', 'bristol myers squibb', 'gsk', 'sanofi', 'amgen', 'gilead', 'takeda',
+        'baxter', 'stryker', 'medtronic',
+    ],
+    'fintech': [
+        'stripe', 'square', 'block', 'robinhood', 'coinbase', 'paypal', 'venmo', 'plaid', 'chime', 'sofi',
+        'affirm', 'brex', 'ramp',
+    ],
+    'healthcare': [
+        'henry ford health', 'corewell health', 'trinity health', 'ascension', 'beaumont', 'michigan medicine',
+        'northwestern medicine', 'advocate health', 'rush university medical center', 'kaiser permanente',
+        'cvs health', 'walgreens', 'mayo clinic', 'cleveland clinic', 'hca healthcare',
+    ],
+    'automotive': [
+        'ford', 'ford motor', 'general motors', 'gm', 'stellantis', 'toyota', 'honda', 'bmw', 'rivian', 'lear',
+        'borgwarner', 'aptiv', 'magna', 'bosch',
+    ],
+    'retail': [
+        'walmart', 'target', 'kroger', 'costco', 'home depot', 'lowes', 'best buy', 'meijer', 'walgreens boots alliance',
+    ],
+}
+
+# keyword (whole word or phrase of the normalized name) -> industry, tried when no company matches
+INDUSTRY_KEYWORDS = {
+    'healthcare': ['health', 'healthcare', 'medical', 'hospital', 'clinic', 'hospice', 'physicians', 'dental', 'pharmacy'],
+    'finance': ['bank', 'bancorp', 'financial', 'capital', 'credit union', 'investments', 'securities', 'mortgage', 'lending'],
+    'insurance': ['insurance', 'assurance', 'mutual'],
+    'consulting': ['consulting', 'consultants', 'advisory'],
+    'education': ['university', 'college', 'school', 'schools', 'academy', 'public schools'],
+    'government': ['county of', 'city of', 'state of', 'department of', 'federal'],
+    'tech': ['software', 'technologies', 'technology', 'systems', 'analytics', 'data', 'labs', 'ai'],
+    'staffing': ['staffing', 'recruiting', 'recruitment', 'talent', 'search group'],
+}
+
+# title patterns -> industry (the company gives no hint)
+TITLE_HINTS = [
+    (re.compile(r'\bfin[\s-]?tech\b', re.IGNORECASE), 'fintech'),
+    (re.compile(r'\b(?:health\s?care|clinical|hospital|nurs(?:e|ing))\b', re.IGNORECASE), 'healthcare'),
+]
+
+# Adzuna category label -> industry
+CATEGORY_INDUSTRIES = {
+    'IT Jobs': 'tech',
+    'Healthcare & Nursing Jobs': 'healthcare',
+    'Accounting & Finance Jobs': 'finance',
+    'Consultancy Jobs': 'consulting',
+    'Teaching Jobs': 'education',
+    'Scientific & QA Jobs': 'pharma',
+    'Engineering Jobs': 'engineering',
+    'Manufacturing Jobs': 'manufacturing',
+    'Retail Jobs': 'retail',
+    'Legal Jobs': 'legal',
+    'Logistics & Warehouse Jobs': 'logistics',
+    'Energy, Oil & Gas Jobs': 'energy',
+    'Social work Jobs': 'nonprofit',
+    'Charity & Voluntary Jobs': 'nonprofit',
+}
+
+# Trailing words that don't identify the company ("and" is what's left of "& Co.")
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'lp', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company', 'plc',
+    'na', 'sa', 'ag', 'gmbh', 'group', 'holdings', 'usa', 'us', 'the', 'and',
+}
+
+def normalize_company(name):
+    """"The Goldman Sachs Group, Inc." -> "goldman sachs"; '' for missing names"""
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode().lower()
+    name = name.replace('&', ' and ')
+    name = re.sub(r"[.'’]", '', name)
+    words = re.sub(r'[^a-z0-9]+', ' ', name).split()
+    if words and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+# normalized company -> industry, and phrase -> industry, compiled once
+COMPANY_INDEX = {normalize_company(company): industry
+                 for industry, companies in INDUSTRY_COMPANIES.items() for company in companies}
+KEYWORD_INDEX = {keyword: industry for industry, keywords in INDUSTRY_KEYWORDS.items() for keyword in keywords}
+MAX_COMPANY_WORDS = max(len(company.split()) for company in COMPANY_INDEX)
+MAX_KEYWORD_WORDS = max(len(keyword.split()) for keyword in KEYWORD_INDEX)
+
+@lru_cache(maxsize=None)
+def company_industry(company):
+    """Industry implied by the company name alone (dictionary, then keywords), or None"""
+    words = normalize_company(company).split()
+    if not words:
+        return None
+    # known company: the whole name or its leading words, longest first;
+    # a one-word prefix only counts when nothing but legal suffixes follows it
+    for size in range(min(len(words), MAX_COMPANY_WORDS), 0, -1):
+        if size == 1 and not all(word in LEGAL_SUFFIXES for word in words[1:]):
+            break
+        industry = COMPANY_INDEX.get(' '.join(words[:size]))
+        if industry:
+            return industry
+    # industry keywords anywhere in the name, longest phrase first
+    for size in range(min(len(words), MAX_KEYWORD_WORDS), 0, -1):
+        for start in range(len(words) - size + 1):
+            industry = KEYWORD_INDEX.get(' '.join(words[start:start + size]))
+            if industry:
+                return industry
+    return None
+
+@lru_cache(maxsize=None)
+def _title_industry(title):
+    for pattern, industry in TITLE_HINTS:
+        if pattern.search(title):
+            return industry
+    return None
+
+def resolve_industry(title, company, category_label):
+    """Industry for one job: company, then title hints, then category label, then 'other'"""
+    return (company_industry(company or '')
+            or _title_industry(title or '')
+            or CATEGORY_INDUSTRIES.get(category_label or '')
+            or 'other')
+
+def classify_industries(titles, companies, category_labels):
+    """
+    resolve_industry over aligned sequences
+    Each distinct company is resolved once; titles are only scanned for rows the company doesn't decide
+    """
+    companies = ['' if not isinstance(company, str) else company for company in companies]
+    by_company = {company: company_industry(company) for company in dict.fromkeys(companies)}
+    return [by_company[company]
+            or _title_industry(title if isinstance(title, str) else '')
+            or CATEGORY_INDUSTRIES.get(category_label if isinstance(category_label, str) else '')
+            or 'other'
+            for title, company, category_label in zip(titles, companies, category_labels)]
@@ -0,0 +1,175 @@
+"""
+Keyword labelling for job titles and descriptions
+
+One keyword table, compiled once, labels a job in a single call:
+
+    seniority  'sr' / 'mid' / 'jr' from title keywords (None if the title has none)
+    is_remote  remote / work from home / wfh anywhere in the text
+    job_type   'intern' (title), else 'part-time' / 'full-time' / 'contract', default 'full-time'
+
+The table compiles into one regex per kind of text (TITLE_MATCHER: every
+label, TEXT_MATCHER: the description labels). Each keyword is found from
+its rarest letter, with a lookbehind for the letters before it, and sits
+in a named group that maps back to its label. The regex engine therefore
+skips, in C, every position holding none of the anchor letters.
+classify_texts joins a whole column into one string and scans it once,
+mapping each match back to its row by offset. Whole-word matching stops
+the false hits the old substring checks had ('sr' in 'classroom', 'lead'
+in 'leadership', 'intern' in 'internal').
+
+Roman numerals ("Data Analyst II") only count in title position: after a
+word, and at the end of the title or before a separator ("Analyst I -
+Remote"). "I.T. Support Analyst" or a standalone "I" is not 'jr'.
+"""
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+
+# Label -> keywords (a space matches any run of spaces or hyphens: 'part-time', 'entry level')
+KEYWORDS = {
+    'sr': ['senior', 'sr', 'lead', 'principal', 'director', 'head', 'vp', 'vice president',
+           'executive', 'president'],
+    'mid': ['experienced', 'manager', 'mid level', 'midlevel', 'intermediate'],
+    'jr': ['junior', 'jr', 'associate', 'entry level', 'graduate'],
+    'intern': ['intern', 'interns', 'internship', 'co op', 'coop'],
+    'remote': ['remote', 'remotely', 'work from home', 'wfh', 'telecommute', 'telework'],
+    'part_time': ['part time', 'parttime'],
+    'full_time': ['full time', 'fulltime'],
+    'contract': ['contract', 'contractor', 'temporary'],
+}
+
+# Label -> roman numeral levels, matched only in title position
+ROMAN_NUMERALS = {
+    'sr': ['iv'],
+    'mid': ['iii', 'ii'],
+    'jr': ['i'],
+}
+
+# Seniority precedence when a title has several tags ("Senior Associate" -> sr)
+SENIORITY_ORDER = ('sr', 'mid', 'jr')
+
+# Labels also read from the description (seniority and intern come from the title only)
+TEXT_LABELS = ('remote', 'part_time', 'full_time', 'contract')
+
+NO_LABELS = frozenset()
+
+# Joins the texts of a column; neither a word character nor a keyword separator
+ROW_SEPARATOR = '\x00'
+
+# Letters from rarest to most common in English text: each keyword is found by its rarest letter
+LETTER_RARITY = 'zqxjkvbpygfwmucldrhsnioate'
+
+# Lookbehind that starts a keyword (the text up to and including its anchor letter, then {}),
+# and the check after it: words are whole words; numerals follow a word and end the title or precede a separator
+WORD_BOUNDS = (r"(?<=\b{})", r"\b")
+TITLE_POSITION = (r"(?<=\w\s{})", r"(?=\s*(?:$|[\x00,(/|:\u2013-]))")
+
+def _compile(labels, numerals=False):
+    """
+    (regex, group name -> label) for `labels`
+    The top level is one branch per anchor letter (the rarest letter of a keyword's first word), so the
+    regex engine's charset prefix skips, in C, every position holding none of them; the branch then checks
+    the keyword's start with a lookbehind and matches the rest. One named group per (label, anchor, start).
+    """
+    branches = defaultdict(lambda: defaultdict(list))
+    for label in labels:
+        kinds = [(WORD_BOUNDS, KEYWORDS[label])]
+        if numerals and label in ROMAN_NUMERALS:
+            kinds.append((TITLE_POSITION, ROMAN_NUMERALS[label]))
+        for bounds, keywords in kinds:
+            for keyword in keywords:
+                first, *others = keyword.split(' ')
+                anchor = min(range(len(first)), key=lambda i: LETTER_RARITY.index(first[i]))
+                rest = r'[\s-]+'.join([re.escape(first[anchor + 1:]), *map(re.escape, others)])
+                branches[first[anchor]][(label, bounds, first[:anchor + 1])].append(rest)
+
+    pattern, groups = [], {}
+    for letter, options in sorted(branches.items()):
+        inner = []
+        for (label, (before, after), start), rests in options.items():
+            group = f"{label}__{len(groups)}"
+            groups[group] = label
+            inner.append(f"{before.format(re.escape(start))}(?P<{group}>{'|'.join(sorted(rests, key=len, reverse=True))}){after}")
+        pattern.append(re.escape(letter) + "(?:" + "|".join(inner) + ")")
+    return re.compile("|".join(pattern)), groups
+
+TITLE_MATCHER = _compile(KEYWORDS, numerals=True)
+TEXT_MATCHER = _compile(TEXT_LABELS)
+
+def find_labels(text, matcher=TITLE_MATCHER):
+    """Labels with a keyword in `text` (already lowercased); TITLE_MATCHER: every label, TEXT_MATCHER: TEXT_LABELS"""
+    pattern, groups = matcher
+    return {groups[match.lastgroup] for match in pattern.finditer(text)}
+
+def scan_column(texts, matcher=TITLE_MATCHER):
+    """
+    find_labels over a whole column in one regex pass: the texts are lowercased, joined with ROW_SEPARATOR
+    and scanned once; each match goes to the row its offset falls in
+    Returns one label set per text (None counts as ''); texts without a keyword share one empty frozenset
+    """
+    pattern, groups = matcher
+    lowered = [(text or "").lower() for text in texts]
+    starts = list(accumulate((len(text) + 1 for text in lowered[:-1]), initial=0))
+    labels = defaultdict(set)
+    for match in pattern.finditer(ROW_SEPARATOR.join(lowered)):
+        labels[bisect_right(starts, match.start()) - 1].add(groups[match.lastgroup])
+    return [labels.get(row, NO_LABELS) for row in range(len(lowered))]
+
+def match_labels(title, description=""):
+    """
+    Label one job from its title and description
+    Returns {'seniority', 'is_remote', 'job_type'}
+    """
+    title = (title or "").lower()
+    description = (description or "").lower()
+    return _combine(find_labels(title), find_labels(description, TEXT_MATCHER))
+
+def _combine(title_hits, description_hits):
+    """Labels from the title's hits (all labels) and the description's (TEXT_LABELS only)"""
+    hits = title_hits | description_hits
+    seniority = next((label for label in SENIORITY_ORDER if label in title_hits), None)
+    if seniority is None and 'intern' in title_hits:
+        seniority = 'jr'
+
+    if 'intern' in title_hits:
+        job_type = 'intern'
+    elif 'part_time' in hits:
+        job_type = 'part-time'
+    elif 'full_time' in hits:
+        job_type = 'full-time'
+    elif 'contract' in hits:
+        job_type = 'contract'
+    else:
+        job_type = 'full-time'
+
+    return {
+        'seniority': seniority,
+        'is_remote': 'remote' in hits,
+        'job_type': job_type,
+    }
+
+def classify_texts(titles, descriptions):
+    """
+    match_labels over parallel sequences of titles and descriptions
+    Distinct titles and all descriptions are each scanned as one column (scan_column)
+    Returns {'seniority': [...], 'is_remote': [...], 'job_type': [...]} (one entry per text)
+    """
+    titles = [title if isinstance(title, str) else "" for title in titles]
+    distinct_titles = list(dict.fromkeys(titles))
+    title_hits = dict(zip(distinct_titles, scan_column(distinct_titles, TITLE_MATCHER)))
+    description_hits = scan_column([description if isinstance(description, str) else "" for description in descriptions],
+                                   TEXT_MATCHER)
+
+    # few distinct (title, description labels) pairs: combine each once
+    combined = {}
+    seniority, is_remote, job_type = [], [], []
+    for title, hits in zip(titles, description_hits):
+        key = (title, frozenset(hits))
+        labels = combined.get(key)
+        if labels is None:
+            labels = combined[key] = _combine(title_hits[title], hits)
+        seniority.append(labels['seniority'])
+        is_remote.append(labels['is_remote'])
+        job_type.append(labels['job_type'])
+    return {'seniority': seniority, 'is_remote': is_remote, 'job_type': job_type}
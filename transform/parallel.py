@@ -0,0 +1,155 @@
+"""
+Process-pool enrichment for large backlogs
+
+Splits the pending bronze.raw_jobs rows into keyset ranges of job_id (every
+chunk_size-th id is a boundary), then each worker process reads its range,
+enriches it with enrich_adzuna_batch and writes it with the same bulk
+upsert the single-process path uses (upsert_silver_jobs_bulk). Ranges don't
+overlap, so chunks never contend for the same silver rows and a failed
+chunk can simply be picked up by the next run. Jobs whose payload hasn't
+changed take the touch path first (prepare_enrichment_run), so only new,
+changed or out-of-date jobs are chunked.
+
+    ENRICH_WORKERS       worker processes (default: CPU count)
+    ENRICH_CHUNK_SIZE    jobs per chunk (default: 5000)
+
+Use full=True to re-enrich every Adzuna job after a schema change or a
+classifier update, not only new/updated ones.
+
+keyset_ranges and map_chunks are shared with the other bulk passes that
+run on the same pool: run_jsearch_enrichment (transform/enrich_jsearch.py)
+and run_backfill / backfill_all_seniority (transform/backfill.py) take a
+workers argument.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from sqlalchemy import text
+from database.db import get_engine, dispose_engines
+from transform.enrich_batch import enrich_adzuna_batch, ENRICHMENT_VERSION
+from transform.enrich_adzuna_v2 import (upsert_silver_jobs_bulk, update_gold_aggregations,
+                                        pending_jobs_condition, prepare_enrichment_run)
+
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", "0")) or os.cpu_count() or 1
+ENRICH_CHUNK_SIZE = int(os.getenv("ENRICH_CHUNK_SIZE", "5000"))
+
+def keyset_ranges(engine, keys, from_sql, chunk_size, params=None):
+    """
+    Keyset ranges [(lower, upper), ...] over the rows of `from_sql` ("FROM ... WHERE ...") ordered by `keys`,
+    about chunk_size rows each; every chunk_size-th key is a boundary
+    lower is inclusive, upper exclusive; the last range has upper=None
+    Boundaries are scalars for one key column and tuples for several ("s.source", "s.job_id")
+    """
+    selected = ', '.join(f"{key} AS k{i}" for i, key in enumerate(keys))
+    order = ', '.join(f"k{i}" for i in range(len(keys)))
+    query = text(f"""
+        SELECT {order}
+        FROM (
+            SELECT {selected}, ROW_NUMBER() OVER (ORDER BY {', '.join(keys)}) AS rn
+            {from_sql}
+        ) pending
+        WHERE (rn - 1) % :chunk_size = 0
+        ORDER BY {order}
+    """)
+    with engine.connect() as conn:
+        rows = conn.execute(query, {**(params or {}), 'chunk_size': chunk_size}).all()
+    boundaries = [row[0] if len(keys) == 1 else tuple(row) for row in rows]
+    return list(zip(boundaries, boundaries[1:] + [None]))
+
+def get_chunk_ranges(engine, chunk_size, full=False):
+    """Keyset ranges of job_id covering the pending Adzuna jobs (see keyset_ranges)"""
+    return keyset_ranges(engine, ['r.job_id'], f"""
+        FROM bronze.raw_jobs r
+        LEFT JOIN silver.jobs_v2 s
+            ON s.source = r.source AND s.job_id = r.job_id
+        WHERE {pending_jobs_condition(full)}
+    """, chunk_size, {'enrichment_version': ENRICHMENT_VERSION})
+
+def enrich_range(lower, upper, full=False):
+    """
+    Enrich and upsert the pending jobs with lower <= job_id < upper (upper=None: no upper bound)
+    Runs inside a worker process; returns (rows, enrich seconds, write seconds)
+    """
+    query = text(f"""
+        SELECT r.job_id, r.payload, r.payload_hash, r.first_seen, r.last_seen, r.times_seen
+        FROM bronze.raw_jobs r
+        LEFT JOIN silver.jobs_v2 s
+            ON s.source = r.source AND s.job_id = r.job_id
+        WHERE {pending_jobs_condition(full)}
+            AND r.job_id >= :lower
+            AND (CAST(:upper AS text) IS NULL OR r.job_id < :upper)
+    """)
+    with get_engine().connect() as conn:
+        df_raw = pd.read_sql(query, conn, params={'lower': lower, 'upper': upper, 'enrichment_version': ENRICHMENT_VERSION})
+
+    started = time.perf_counter()
+    df_enriched = enrich_adzuna_batch(df_raw)
+    enrich_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    upsert_silver_jobs_bulk(df_enriched, df_raw['payload_hash'])
+    write_seconds = time.perf_counter() - started
+
+    return len(df_enriched), enrich_seconds, write_seconds
+
+def map_chunks(fn, chunks, workers):
+    """
+    Run fn(*chunk) for every chunk across `workers` processes (inline when workers <= 1)
+    Yields (chunk, result, error) as chunks finish
+    Each worker drops the engines it inherited from the parent before touching the database
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            try:
+                yield chunk, fn(*chunk), None
+            except Exception as e:
+                yield chunk, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=dispose_engines) as pool:
+        futures = {pool.submit(fn, *chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+def run_parallel_enrichment(workers=ENRICH_WORKERS, chunk_size=ENRICH_CHUNK_SIZE, full=False):
+    """
+    Enrich pending Adzuna jobs (every Adzuna job with full=True) into silver.jobs_v2 across a process pool
+    Returns {'rows': jobs written, 'chunks': chunk count, 'failed_chunks': [(lower, upper), ...]}
+    """
+    engine = get_engine()
+    to_enrich = prepare_enrichment_run(engine, full)
+    if not to_enrich:
+        if to_enrich == 0:
+            update_gold_aggregations()
+        return {'rows': 0, 'chunks': 0, 'failed_chunks': []}
+
+    ranges = get_chunk_ranges(engine, chunk_size, full)
+
+    print(f"Enriching {'all' if full else 'pending'} Adzuna jobs in {len(ranges)} chunks of up to {chunk_size} "
+          f"across {workers} worker(s)")
+
+    started = time.perf_counter()
+    total_rows = 0
+    failed_chunks = []
+    chunks = [(lower, upper, full) for lower, upper in ranges]
+    for done, (chunk, result, error) in enumerate(map_chunks(enrich_range, chunks, workers), start=1):
+        if error is not None:
+            failed_chunks.append(chunk[:2])
+            print(f"  ❌ chunk {chunk[0]}..{chunk[1] or 'end'} failed: {error}")
+            continue
+        rows, enrich_seconds, write_seconds = result
+        total_rows += rows
+        print(f"  [{done}/{len(chunks)}] {rows} jobs (enrich {enrich_seconds:.1f}s, write {write_seconds:.1f}s)")
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Processed {total_rows} jobs into silver.jobs_v2 in {elapsed:.1f}s "
+          f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    if failed_chunks:
+        print(f"⚠️  {len(failed_chunks)} chunk(s) failed - rerun to pick up their jobs")
+
+    update_gold_aggregations()
+    return {'rows': total_rows, 'chunks': len(chunks), 'failed_chunks': failed_chunks}
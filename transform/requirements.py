@@ -0,0 +1,144 @@
+"""
+Years-of-experience and education extraction from job descriptions
+
+Patterns are compiled once at import. Like transform/keywords.py, str.find
+locates the literal words a match must contain ("year" / "yr", "bachelor",
+"ms", ...) and the patterns are only tried at those positions, so the regex
+engine never scans a whole description. extract_requirements() fills both
+columns for a batch in one pass, scanning each distinct description once.
+
+    yoe_min    lower bound of the first experience requirement:
+               "3-5 years" -> 3, "4+ yrs" -> 4, "minimum of five years" -> 5
+               company-age / non-experience phrases are skipped
+               ("over 20 years in business", "18 years of age", "2 year contract")
+    education  lowest degree mentioned ("BS required, MS preferred" -> bachelor's),
+               with " or equivalent" when the degree's own sentence says experience
+               can substitute ("Bachelor's degree or equivalent experience")
+"""
+import re
+import numpy as np
+import pandas as pd
+
+# Above this a number next to "years" is company age, not a requirement
+YOE_MAX = 20
+
+WORD_NUMBERS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+
+YEAR_ANCHORS = ('year', 'yr')
+YEAR_UNIT = re.compile(r"(?<![a-z])y(?:ea)?rs?(?!\w)\.?")
+
+# the number (or range) right before a year unit; searched with endpos at the unit
+NUMBER = r"\d{1,2}|" + "|".join(WORD_NUMBERS)
+YOE_NUMBER = re.compile(
+    rf"(?<![\w.])(?P<low>{NUMBER})(?:\s*(?:-|–|to)\s*(?P<high>{NUMBER}))?\s*\+?\s*$"
+)
+
+# phrases that make "N years" company age or a duration rather than a requirement
+YOE_BEFORE = re.compile(
+    r"\b(?:for|since|within|after|every|next|first|past|last|founded|established|celebrating)"
+    r"\s+(?:over\s+|more\s+than\s+|nearly\s+|almost\s+|the\s+)?$"
+)
+YOE_AFTER = re.compile(
+    r"\s+(?:old|of\s+age|in\s+business|in\s+operation|serving|running|strong|"
+    r"of\s+(?:company|service|history|operation|excellence|growth|innovation|success|serving)|"
+    r"contract|term|assignment|program|degree|college|university|warranty)\b"
+)
+
+# Degree levels, lowest first: (column value, words a match starts with, whole-word pattern)
+EDUCATION_LEVELS = {
+    'high_school': ('high school', ('high', 'ged', 'hs'), r"high\s+school|ged|hs\s+diploma"),
+    'associate': ("associate's", ('associate', 'a.a', 'aas'), r"associate(?:'s|s|’s)?\s+degree|a\.a\.s?\.|aas"),
+    'bachelor': ("bachelor's", ('bachelor', 'b.', 'bs', 'ba', 'undergraduate', '4', 'four'),
+                 r"bachelor(?:'s|s|’s)?|b\.[sa]\.|bs|ba(?=\s*(?:/|or\b|in\b|degree))|"
+                 r"undergraduate\s+degree|(?:4|four)[\s-]year\s+(?:college\s+)?degree"),
+    'master': ("master's", ('master', 'm.', 'mba', 'ms'),
+               r"master(?:'s|s|’s)|masters?\s+(?:of|degree)|m\.[sa]\.|mba|m\.b\.a\.|"
+               # bare "ms" only in a degree context ("MS in", "BS/MS", "MS or PhD", "MS preferred"):
+               # not "Ms. Jones", "MS Excel"
+               r"ms(?=\s*(?:/|\bor\b|\bin\b|\bdegree|\brequired|\bpreferred|,\s*(?:ph\.?\s?d|mba)))|(?<=/)ms"),
+    'phd': ('phd', ('ph', 'doctor'), r"ph\.?\s?d\.?|doctorate|doctoral\s+degree"),
+}
+
+EDUCATION_MATCHERS = {
+    level: (label, anchors, re.compile(r"(?<!\w)(?:" + pattern + r")(?!\w)"))
+    for level, (label, anchors, pattern) in EDUCATION_LEVELS.items()
+}
+
+EQUIVALENT_PATTERN = re.compile(r"or\s+(?:an?\s+)?equivalent|equivalent\s+(?:work\s+|professional\s+)?experience")
+# "or equivalent" only qualifies a degree in the same sentence, at most this many characters away
+EQUIVALENT_WINDOW = 80
+SENTENCE_END = re.compile(r"[.;!?](?=\s|$)|\n")
+
+def _anchor_positions(text, anchors):
+    """Sorted start positions of every anchor occurrence in `text`"""
+    positions = []
+    for anchor in anchors:
+        position = text.find(anchor)
+        while position != -1:
+            positions.append(position)
+            position = text.find(anchor, position + 1)
+    return sorted(positions)
+
+def _yoe(text):
+    """extract_yoe on already-lowercased text"""
+    for position in _anchor_positions(text, YEAR_ANCHORS):
+        unit = YEAR_UNIT.match(text, position)
+        if not unit:
+            continue
+        number = YOE_NUMBER.search(text, max(0, position - 24), position)
+        if not number:
+            continue
+        if YOE_BEFORE.search(text, max(0, number.start() - 32), number.start()) or YOE_AFTER.match(text, unit.end()):
+            continue
+        years = WORD_NUMBERS.get(number['low']) or int(number['low'])
+        if years <= YOE_MAX:
+            return years
+    return None
+
+def _equivalent_near(text, start, end):
+    """Whether EQUIVALENT_PATTERN occurs within EQUIVALENT_WINDOW of text[start:end], without crossing a sentence end"""
+    before = text[max(0, start - EQUIVALENT_WINDOW):start]
+    sentence_ends = [boundary.end() for boundary in SENTENCE_END.finditer(before)]
+    if sentence_ends:
+        before = before[sentence_ends[-1]:]
+    after = text[end:end + EQUIVALENT_WINDOW]
+    boundary = SENTENCE_END.search(after)
+    if boundary:
+        after = after[:boundary.start()]
+    return bool(EQUIVALENT_PATTERN.search(before) or EQUIVALENT_PATTERN.search(after))
+
+def _education(text):
+    """extract_education on already-lowercased text"""
+    for label, anchors, pattern in EDUCATION_MATCHERS.values():
+        matches = [match for match in (pattern.match(text, position) for position in _anchor_positions(text, anchors)) if match]
+        if matches:
+            equivalent = any(_equivalent_near(text, match.start(), match.end()) for match in matches)
+            return f"{label} or equivalent" if equivalent else label
+    return None
+
+def extract_yoe(description):
+    """Minimum years of experience asked for in `description`, or None"""
+    return _yoe((description or "").lower())
+
+def extract_education(description):
+    """Lowest degree mentioned in `description` ("bachelor's", "master's or equivalent", ...), or None"""
+    return _education((description or "").lower())
+
+def extract_requirements(descriptions):
+    """
+    yoe_min and education for a whole column of descriptions
+    Each distinct description is lowercased and scanned once
+    Returns a DataFrame (yoe_min, education) on the same index, None where nothing was found
+    """
+    descriptions = pd.Series(descriptions, dtype=object).fillna('').astype(str)
+    codes, uniques = pd.factorize(descriptions)
+    texts = [description.lower() for description in uniques]
+    yoe_min = np.array([_yoe(text) for text in texts] + [None], dtype=object)
+    education = np.array([_education(text) for text in texts] + [None], dtype=object)
+    return pd.DataFrame({
+        'yoe_min': yoe_min[codes],
+        'education': education[codes],
+    }, index=descriptions.index, dtype=object)
@@ -1,4 +1,8 @@
-import re
+from transform.keywords import match_labels
+from transform.requirements import extract_yoe, extract_education
+from transform.geo import lookup_cbsa, nearest_place, US_STATE_ABBREV
+from transform.industry import resolve_industry
+
 
 # In transform/utils.py
 def get_state_abbreviation(state_input):
@@ -45,16 +49,11 @@ def get_state_abbreviation(state_input):
     return state_name_to_abbrev.get(normalized_input, state_input)
 
 def check_title_keywords(title):
-    role = title.lower()
-    senior_role_tags = ('sr', 'senior', 'iv', 'lead', 'principal', 'director', 'head', 'vp', 'executive', 'president')
-    mid_tags = ('ii', 'experienced', 'manager', 'iii')
-    junior_role_tags = ('jr', 'associate', 'junior', 'intern', 'entry level')
-    
-    if any(tag in role for tag in senior_role_tags):    
-        return "sr"
-    if any(tag in role for tag in mid_tags):
-        return "mid"
-    return "jr"
+    """
+    Seniority from whole-word title tags (see transform/keywords.py)
+    Returns 'sr', 'mid', 'jr', or None if the title has no level tag
+    """
+    return match_labels(title)['seniority']
 
 def check_salary_range(salary_min, salary_max):
     """
@@ -74,26 +73,20 @@ def check_salary_range(salary_min, salary_max):
         return "mid"
     
 def check_description_keywords(txt):
+    """
+    Seniority from the years of experience the description asks for
+    Returns 'jr' (<= 3 years), 'mid', 'sr' (>= 7 years), or None if no YOE is given
+    """
+    return yoe_seniority(extract_yoe(txt))
 
-    # 1) regex for YOE
-    # catches "2 years", "3-5 years", "4+ yrs", or "at least 7 years"
-    patterns = [
-        r'(\d+)\s*-\s*(\d+)\s*years?',
-        r'(\d+)\+?\s*(?:years?|yrs?|yos?)',
-        r'at\s*least\s*(\d+)\s*years?', 
-        r'minimum\s*(?:of\s*)?(\d+)\s*years?'
-    ]
-    
-    for pat in patterns:
-        m = re.search(pat, txt)
-        if m:
-            # if range, take the lower bound
-            years = int(m.group(1))
-            if years <= 3:
-                return "jr"
-            if years >= 7:
-                return "sr"
-            return "mid"
+def yoe_seniority(years):
+    if years is None:
+        return None
+    if years <= 3:
+        return "jr"
+    if years >= 7:
+        return "sr"
+    return "mid"
 
 
 def categorize_role(title, description, salary_min, salary_max, city):
@@ -104,10 +97,6 @@ def categorize_role(title, description, salary_min, salary_max, city):
     3. Description keywords (lower confidence)
     4. Default to 'mid' if unclear
     """
-    role = title.lower()
-    desc = description.lower()
-    txt = " ".join([role or "", desc or ""]).lower()
-    
     title_seniority = check_title_keywords(title)
     if title_seniority:
         return title_seniority
@@ -119,6 +108,10 @@ def categorize_role(title, description, salary_min, salary_max, city):
     
     if description:
         description_seniority = check_description_keywords(description)
+        if description_seniority:
+            return description_seniority
+    
+    return "mid"
 
 
 # def categorize_seniority(title, description=""):
@@ -175,81 +168,51 @@ def get_is_remote(title, description=""):
     """
     Check if job is remote based on title and description   
     """
-    remote_keywords = ['remote', 'work from home', 'wfh']
-    txt = " ".join([title or "", description or ""]).lower()
-    return any(kw in txt for kw in remote_keywords)
+    return match_labels(title, description)['is_remote']
 
 def get_industry(title, company, category):
     """
-    Get industry from title, company, and category
+    Get industry from title, company, and category (see transform/industry.py)
+    Known company or company keyword, else title hint, else Adzuna category label, else 'other'
     """
-    
-    # TODO: infer industry - look for domain hints
-        # 'nurse', 'clinical', 'hospital' -> healthcare
-        # 'software', 'engineer', 'developer' -> tech
-    #! build a small internal dictionary or keyword map of roles -> industries or company names -> industries
-    #! fallback to category if no match
-    
-
-    # WHEN company ~* '\b(google|microsoft|amazon|apple|meta|netflix|tesla|uber|airbnb)\b' THEN 'big_tech'
-    # WHEN company ~* '\b(jpmorgan|goldman|morgan stanley|wells fargo|bank of america|citi)\b' THEN 'finance'
-    # WHEN company ~* '\b(mckinsey|bain|bcg|deloitte|pwc|accenture|kpmg)\b' THEN 'consulting'
-    # WHEN company ~* '\b(pfizer|merck|johnson|roche|novartis|astrazeneca)\b' THEN 'pharma'
-    # WHEN title ~* '\bfintech\b' OR company ~* '\b(stripe|square|robinhood|coinbase)\b' THEN 'fintech'
-    # WHEN title ~* '\bhealthcare?\b' OR company ~* '\b(health|medical|hospital)\b' THEN 'healthcare'
-    # WHEN company ~* '\b(startup|inc\.?|llc)\b' AND 
-    #      (SELECT COUNT(*) FROM jobs_enriched WHERE company = jobs_enriched.company) < 10 THEN 'startup'
-    # ELSE 'other'
-
-    
-    pass
+    return resolve_industry(title, company, category)
 
 def get_job_type(title, description=""):
     """
-    Get job type from description
+    Get job type from title and description
+    'intern' (title), else 'part-time' / 'full-time' / 'contract', default 'full-time'
     """
     
-    # TODO: search desc and title for signals:
-        # look in title and desc: part-time/part time/pt = part time, full-time/full time/ft = full time, etc.
-        # look for hours in desc (e.g. 20 hours/week)
-    
-    if 'intern' in title.lower() or 'internship' in title.lower():
-        return 'intern'
-    if 'part time' in description.lower():
-        return 'part-time'
-    if 'full time' in description.lower():
-        return 'full-time'
-    if 'contract' in description.lower():
-        return 'contract'
-    return 'full-time'
+    # TODO: look for hours in desc (e.g. 20 hours/week)
+    
+    return match_labels(title, description)['job_type']
 
 def get_yoe(description=""):
     """
-    Estimate years of experience based on title and description
+    Minimum years of experience from the description (see transform/requirements.py)
+    "3-5 years" -> 3, "4+ yrs" -> 4, "minimum of five years" -> 5; None if not stated
     """
-    
-    # TODO: use regex to extract yoe from desc bc there's many edge cases
-        # X+ year, X yrs., minimum X years, at least X years, etc.
-        # normalize to integers (3+ years -> 3)
-        # look for ranges (2-3 years -> 2)
-    #! use regex to extract numbers around the words "year" or "years"
-    #! ignore things like "5 years in business", "over 20 years of company experience", etc. 
-
-    pass
+    return extract_yoe(description)
 
 def get_education(description=""):
     """
-    Get education from title and description
+    Lowest degree mentioned in the description (see transform/requirements.py)
+    "BS req, MS preferred" -> "bachelor's"; "or equivalent" is kept; None if not stated
     """
-    
-    # TODO: use regex to extract education from desc
-        # "bachelor's degree required", "BA/BS in CS or related", "master's or PhD preferred", etc.
-        # consider "degree in progress" (internship), "BS req, MS preferred", etc.
-    
-    pass
+    return extract_education(description)
 
-def get_cbsa_code(location):
-    pass
+def get_cbsa_code(location, county=None, latitude=None, longitude=None):
+    """
+    CBSA (metro) code for a "City, ST" location from the offline gazetteer (see transform/geo.py)
+    The county, when known, is tried first, then the city, then the nearest place to the coordinates
+    None outside the gazetteer
+    """
+    city, _, state_code = (location or '').rpartition(',')
+    code = lookup_cbsa(city.strip(), state_code.strip(), county or '')
+    if code is None and latitude is not None and longitude is not None:
+        place = nearest_place(latitude, longitude)
+        code = place[2] if place else None
+    return code
 
 '''
 Functions to standardize job data in the silver schema
@@ -283,7 +246,7 @@ def standardize_job_type(job_type_raw, title, description, source):
     
     if source == 'adzuna':
         # Use existing inference logic
-        return get_job_type(description)  # Returns "full-time", "part-time", etc.
+        return get_job_type(title, description)  # Returns "full-time", "part-time", etc.
     
     elif source == 'jsearch' and job_type_raw:
         return clean_jsearch_job_type(job_type_raw)